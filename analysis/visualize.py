@@ -71,6 +71,16 @@ def print_summary(results: dict):
     print(f"  DET total tokens:    {eff['det_total_tokens']}")
     print(f"  Ratio (DET/Linear):  {eff['ratio']:.2f}x")
 
+    # Latency percentiles (results written before per-call metrics have none)
+    if summary.get("percentiles"):
+        print("\n⏱️  LATENCY / TOKENS (p50 / p90 / p99):")
+        print("-" * 65)
+        print_percentiles(summary["percentiles"])
+        for key, condition in results["conditions"].items():
+            latency = (condition.get("percentiles") or {}).get("latency")
+            if latency:
+                print(f"  {key:<18} latency {latency['p50']:7.2f} / {latency['p90']:7.2f} / {latency['p99']:7.2f}s")
+
     # Key Findings
     print("\n" + "=" * 70)
     print("🎯 KEY FINDINGS")
@@ -95,6 +105,13 @@ def print_summary(results: dict):
     print("\n" + "=" * 70)
 
 
+def print_percentiles(percentiles: dict, indent: str = "  "):
+    """One line per metric with p50 / p90 / p99 (metrics without data are skipped)."""
+    for metric, values in percentiles.items():
+        if values:
+            print(f"{indent}{metric:<18} {values['p50']:9.2f} / {values['p90']:9.2f} / {values['p99']:9.2f}")
+
+
 def create_visualizations(results: dict):
     """Create comparison charts."""
 
@@ -102,7 +119,7 @@ def create_visualizations(results: dict):
 
     conditions = results["conditions"]
     methods = results.get("config", {}).get("methods", ["linear", "det"])
-    sizes = [3, 5, 7]
+    sizes = results.get("config", {}).get("sizes", [3, 5, 7])
 
     det_methods = [m for m in methods if m.startswith("det")]
     preferred_det = "det" if "det" in det_methods else (det_methods[0] if det_methods else None)
@@ -0,0 +1 @@
+from benchmarks.suite import SUITES, compare_results, run_benchmarks
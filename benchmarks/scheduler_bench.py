@@ -0,0 +1,61 @@
+"""
+End-to-end trial throughput against the mock provider.
+
+Runs the pipelined experiment path (scheduler, async client, scoring,
+background writes, events) for a fixed number of trials at several
+concurrency levels. The mock answers after a fixed latency, and the client
+rate limiter and adaptive concurrency limit are disabled, so the numbers
+show how close the pipeline gets to ``concurrency / latency`` rather than
+provider behaviour.
+"""
+import math
+import os
+import time
+from typing import Dict, List, Sequence
+
+from benchmarks.timing import metric
+from core import storage
+from core.experiment import ExperimentRunner
+from core.llm_client import run_sync
+from core.mock_llm import configure_mock_backend
+from core.rate_limiter import TokenBucketRateLimiter
+
+CONCURRENCY_LEVELS = (1, 8, 32, 128)
+
+_MODEL = "bench-e2e"
+_SIZES = [3, 5, 7]
+_METHODS = ["linear", "det"]
+
+
+def bench_end_to_end(concurrency_levels: Sequence[int] = CONCURRENCY_LEVELS, trials: int = 240,
+                     latency: float = 0.02, workdir: str = ".") -> List[Dict]:
+    configure_mock_backend(_MODEL, latency=f"fixed:{latency}", ttft=f"fixed:{latency / 4}",
+                           error_rate=0.0, rate_limit_rate=0.0, time_scale=1.0, playback=False)
+    per_condition = math.ceil(trials / (len(_SIZES) * len(_METHODS)))
+    total = per_condition * len(_SIZES) * len(_METHODS)
+    metrics = []
+    previous = storage.use_database(os.path.join(workdir, "end_to_end.db"))
+    try:
+        storage.init_db()
+        for concurrency in concurrency_levels:
+            runner = ExperimentRunner("mock", _MODEL, max_concurrency=concurrency)
+            for backend in runner.llm.backends.backends:
+                # RATE_LIMIT_RPM pacing would cap the result; measure the pipeline itself
+                backend.rate_limiter = TokenBucketRateLimiter(f"mock:{_MODEL}", rpm=0, tpm=0, state_path=None)
+                # Fixed levels: the adaptive limit would otherwise pick the concurrency itself
+                backend.concurrency_limiter = None
+            runner.session_id = storage.create_session("experiment", "mock", _MODEL,
+                                                       {"concurrency": concurrency, "trials": total})
+            start = time.perf_counter()
+            run_sync(runner._run_pipelined(_SIZES, _METHODS, per_condition))
+            storage.flush()
+            elapsed = time.perf_counter() - start
+            in_flight = min(concurrency, runner.llm.max_concurrency)
+            metrics.append(metric(
+                f"e2e/concurrency={concurrency}", total / elapsed, "trials/s",
+                params={"concurrency": concurrency, "trials": total, "latency": latency},
+                info={"ideal": round(in_flight / latency, 1), "latency": runner.llm.get_stats()["latency"]},
+            ))
+    finally:
+        storage.use_database(previous)
+    return metrics
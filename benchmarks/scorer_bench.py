@@ -0,0 +1,41 @@
+"""
+Scorer throughput: responses scored per second by variable count and
+response length, with ground-truth verification as in a real run.
+
+Responses are synthetic worked solutions (``core.mock_llm``) for generated
+systems, so the inputs are identical on every machine.
+"""
+import random
+from typing import Dict, List, Sequence
+
+from benchmarks.timing import metric, throughput
+from core.mock_llm import synthetic_response
+from core.scorer import ResponseScorer
+from data.equations import get_equations
+from prompts.templates import get_linear_prompt
+
+VARIABLE_COUNTS = (3, 5, 10, 20)
+RESPONSE_TOKENS = (250, 1000, 4000)
+
+
+def bench_scorer(variable_counts: Sequence[int] = VARIABLE_COUNTS,
+                 response_tokens: Sequence[int] = RESPONSE_TOKENS,
+                 samples: int = 50, min_seconds: float = 1.0) -> List[Dict]:
+    scorer = ResponseScorer()
+    metrics = []
+    for num_vars in variable_counts:
+        system = get_equations(num_vars, seed=1)
+        prompt = get_linear_prompt(system["equations"], system["variables"])
+        for tokens in response_tokens:
+            rng = random.Random(f"{num_vars}:{tokens}")
+            responses = [synthetic_response(prompt, rng, tokens) for _ in range(samples)]
+            rate = throughput(
+                lambda response: scorer.score(response, system["variables"], expected=system),
+                responses, min_seconds,
+            )
+            metrics.append(metric(
+                f"scorer/vars={num_vars}/tokens={tokens}", rate, "responses/s",
+                params={"variables": num_vars, "tokens": tokens},
+                info={"avg_chars": round(sum(map(len, responses)) / len(responses))},
+            ))
+    return metrics
@@ -0,0 +1,94 @@
+"""
+Storage throughput at increasing table sizes.
+
+For each trial count a fresh SQLite file is filled through the normal write
+path (``insert_trial``: compression, background writer, rollup triggers)
+and read back: trial rows, decompressed responses and the model overview
+that backs the dashboard.
+"""
+import os
+import random
+import time
+from typing import Dict, List, Sequence
+
+from benchmarks.timing import metric
+from core import storage
+from core.mock_llm import synthetic_response
+from core.scorer import ResponseScorer
+from data.equations import get_equations
+from prompts.templates import get_det_prompt, get_linear_prompt
+
+TRIAL_COUNTS = (10_000, 100_000)
+
+_MODEL = "bench-storage"
+
+
+def _trial_templates(count: int = 24) -> List[tuple]:
+    """(size, method, result) tuples with realistic, scored responses to cycle through."""
+    scorer = ResponseScorer()
+    rng = random.Random(0)
+    templates = []
+    for i in range(count):
+        size, method = (3, 5, 7)[i % 3], ("linear", "det")[i // 3 % 2]
+        system = get_equations(size)
+        build = get_det_prompt if method == "det" else get_linear_prompt
+        response = synthetic_response(build(system["equations"], system["variables"]), rng,
+                                      rng.randint(300, 900))
+        scored = scorer.score(response, system["variables"], expected=system)
+        templates.append((size, method, {
+            "response": response,
+            "score": scored["total"],
+            "completeness": scored["completeness"],
+            "consistency": scored["consistency"],
+            "reasoning": scored["reasoning"],
+            "success": scored["success"],
+            "variables_found": scored["variables_found"],
+            "assignments": scored["assignments"],
+            "correct": scored["correct"],
+            "max_residual": scored["max_residual"],
+            "scorer_version": scored["scorer_version"],
+            "tokens": len(response) // 4 + 150,
+            "time": round(rng.uniform(0.5, 3.0), 3),
+            "latency": round(rng.uniform(0.5, 3.0), 3),
+            "completion_tokens": len(response) // 4,
+        }))
+    return templates
+
+
+def bench_storage(trial_counts: Sequence[int] = TRIAL_COUNTS, workdir: str = ".") -> List[Dict]:
+    templates = _trial_templates()
+    metrics = []
+    for count in trial_counts:
+        path = os.path.join(workdir, f"storage_{count}.db")
+        previous = storage.use_database(path)
+        try:
+            storage.init_db()
+            session_id = storage.create_session("experiment", "mock", _MODEL, {"trials": count})
+            params = {"trials": count}
+
+            start = time.perf_counter()
+            for i in range(count):
+                size, method, result = templates[i % len(templates)]
+                storage.insert_trial(session_id, size, method, i + 1, result)
+            storage.flush()
+            elapsed = time.perf_counter() - start
+            metrics.append(metric(f"storage/insert/trials={count}", count / elapsed, "trials/s", params,
+                                  info={"bytes_per_trial": round(os.path.getsize(path) / count)}))
+
+            start = time.perf_counter()
+            rows = len(storage.fetch_trials(session_id))
+            metrics.append(metric(f"storage/fetch_trials/trials={count}",
+                                  rows / (time.perf_counter() - start), "rows/s", params))
+
+            start = time.perf_counter()
+            responses = sum(len(chunk) for chunk in storage.iter_trial_responses(session_id=session_id))
+            metrics.append(metric(f"storage/fetch_responses/trials={count}",
+                                  responses / (time.perf_counter() - start), "responses/s", params))
+
+            start = time.perf_counter()
+            storage.fetch_model_overview()
+            metrics.append(metric(f"storage/model_overview/trials={count}",
+                                  1 / (time.perf_counter() - start), "calls/s", params))
+        finally:
+            storage.use_database(previous)
+    return metrics
@@ -0,0 +1,98 @@
+"""
+Benchmark runner and baseline comparison.
+
+``run_benchmarks`` runs the selected suites against scratch databases in a
+temporary directory, writes a JSON report to BENCH_DIR and, given a
+baseline report, flags every metric whose throughput dropped by more than
+BENCH_REGRESSION_TOLERANCE.
+"""
+import json
+import os
+import platform
+import tempfile
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from benchmarks.scheduler_bench import CONCURRENCY_LEVELS, bench_end_to_end
+from benchmarks.scorer_bench import bench_scorer
+from benchmarks.storage_bench import TRIAL_COUNTS, bench_storage
+from config.settings import BENCH_DIR, BENCH_REGRESSION_TOLERANCE
+
+SUITES = ("scorer", "storage", "e2e")
+
+
+def run_benchmarks(suites: Optional[Sequence[str]] = None,
+                   trial_counts: Sequence[int] = TRIAL_COUNTS,
+                   concurrency_levels: Sequence[int] = CONCURRENCY_LEVELS,
+                   baseline_path: Optional[str] = None,
+                   tolerance: float = BENCH_REGRESSION_TOLERANCE) -> Dict:
+    suites = list(suites or SUITES)
+    unknown = [s for s in suites if s not in SUITES]
+    if unknown:
+        raise ValueError(f"Unknown benchmark suite(s): {', '.join(unknown)} (expected {', '.join(SUITES)})")
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "numpy": np.__version__,
+        },
+        "suites": suites,
+        "metrics": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        for suite in suites:
+            print(f"\n⏱️  Benchmark: {suite}")
+            if suite == "scorer":
+                metrics = bench_scorer()
+            elif suite == "storage":
+                metrics = bench_storage(trial_counts, workdir=workdir)
+            else:
+                metrics = bench_end_to_end(concurrency_levels, workdir=workdir)
+            for m in metrics:
+                report["metrics"][m["name"]] = m
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            report["comparison"] = compare_results(json.load(f), report, tolerance)
+    report["path"] = _save_report(report)
+    return report
+
+
+def compare_results(baseline: Dict, current: Dict, tolerance: float = BENCH_REGRESSION_TOLERANCE) -> Dict:
+    """Per-metric change against a baseline report; a drop beyond ``tolerance`` is a regression."""
+    rows: List[Dict] = []
+    for name, m in current["metrics"].items():
+        before = baseline.get("metrics", {}).get(name)
+        if not before or not before.get("value"):
+            continue
+        change = m["value"] / before["value"] - 1
+        rows.append({
+            "name": name,
+            "unit": m["unit"],
+            "baseline": before["value"],
+            "current": m["value"],
+            "change": round(change * 100, 1),
+            "regression": change < -tolerance,
+        })
+    return {
+        "baseline": baseline.get("timestamp"),
+        "tolerance": tolerance,
+        "metrics": rows,
+        "regressions": [r["name"] for r in rows if r["regression"]],
+        "missing": sorted(set(baseline.get("metrics", {})) - set(current["metrics"])),
+    }
+
+
+def _save_report(report: Dict) -> str:
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filepath = os.path.join(BENCH_DIR, f"bench_{stamp}.json")
+    with open(filepath, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    return filepath
@@ -0,0 +1,34 @@
+"""
+Timing helpers shared by the benchmarks.
+
+Every benchmark reports metrics as dicts with a ``name`` (unique within a
+report, used to match against a baseline), a throughput ``value`` where
+higher is better, its ``unit``, the ``params`` that produced it and
+optional ``info`` that is shown but never compared.
+"""
+import time
+from typing import Any, Callable, Dict, Optional, Sequence
+
+
+def throughput(fn: Callable[[Any], Any], items: Sequence[Any], min_seconds: float = 1.0) -> float:
+    """Items per second, cycling through ``items`` until at least ``min_seconds`` have passed."""
+    done = 0
+    start = time.perf_counter()
+    while True:
+        for item in items:
+            fn(item)
+        done += len(items)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds or not items:
+            return done / elapsed if elapsed > 0 else 0.0
+
+
+def metric(name: str, value: float, unit: str, params: Optional[Dict[str, Any]] = None,
+           info: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "value": round(value, 2),
+        "unit": unit,
+        "params": params or {},
+        "info": info or {},
+    }
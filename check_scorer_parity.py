@@ -0,0 +1,78 @@
+"""
+Parity check: the compiled AssignmentExtractor must reproduce the original
+per-variable regex extraction on every response stored in experiments.db.
+
+Run:
+    python3 check_scorer_parity.py
+"""
+import re
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core import storage
+from core.scorer import ResponseScorer
+from data.equations import get_equations
+
+
+def legacy_find_variable_value(response: str, var: str):
+    """Original per-variable extraction (reference implementation)."""
+    clean_text = response
+    clean_text = re.sub(rf'\\\(\s*{var}\s*\\\)', var, clean_text, flags=re.IGNORECASE)
+    clean_text = re.sub(rf'\*\*{var}\*\*', var, clean_text, flags=re.IGNORECASE)
+
+    search_areas = []
+    think_blocks = re.findall(r'<think>.*?</think>', response, flags=re.DOTALL)
+    if think_blocks:
+        main_content = re.sub(r'<think>.*?</think>', '', response, flags=re.DOTALL)
+        if main_content.strip():
+            search_areas.append(main_content)
+    search_areas.append(clean_text)
+
+    patterns = [
+        rf'{var}\s*[:=]\s*\\frac\{{\s*(-?\d+)\s*\}}\{{\s*(\d+)\s*\}}',
+        rf'\b{var}\s*[:=]\s*(-?\d+)/(\d+)\b',
+        rf'\b{var}\s*[:=]\s*(-?\d+\.?\d*)\b(?!\s*/)',
+        rf'\b{var}\s+(?:is|equals?)\s+(-?\d+\.?\d*)\b',
+        rf'{var}\s*=\s*(-?\d+\.?\d*)',
+    ]
+    for area in search_areas:
+        for i, pattern in enumerate(patterns):
+            matches = re.findall(pattern, area, re.IGNORECASE | re.MULTILINE)
+            if matches:
+                try:
+                    if i in [0, 1]:
+                        num, den = matches[-1]
+                        return float(num) / float(den)
+                    return float(matches[-1])
+                except (ValueError, ZeroDivisionError, IndexError):
+                    continue
+    return None
+
+
+def check_parity():
+    scorer = ResponseScorer()
+    storage.init_db()
+    checked = 0
+    mismatches = 0
+    for trial_id, size, problem_seed, response in (
+        row for chunk in storage.iter_trial_responses() for row in chunk
+    ):
+        checked += 1
+        variables = get_equations(size, problem_seed)["variables"]
+        expected = {}
+        for var in variables:
+            value = legacy_find_variable_value(response, var)
+            if value is not None:
+                expected[var] = value
+        actual = scorer.score(response, variables)["assignments"]
+        if actual != expected:
+            mismatches += 1
+            print(f"❌ trial {trial_id}: expected {expected}, got {actual}")
+
+    print(f"Checked {checked} stored responses: {mismatches} mismatches")
+    return mismatches == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check_parity() else 1)
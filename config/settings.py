@@ -6,8 +6,18 @@ load_dotenv()
 # API + provider config
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434/v1")
+# Load balancing: comma-separated pools of API keys / Ollama endpoints (default: the single
+# key / URL above). Each is a backend with its own rate limit, concurrency limit and
+# circuit breaker; requests go to the least-loaded healthy one.
+GROQ_API_KEYS = [k.strip() for k in os.getenv("GROQ_API_KEYS", "").split(",") if k.strip()] or [GROQ_API_KEY]
+OLLAMA_BASE_URLS = [u.strip() for u in os.getenv("OLLAMA_BASE_URLS", "").split(",") if u.strip()] or [OLLAMA_BASE_URL]
+# Circuit breaker: a backend failing this many times in a row (5xx, timeouts, connection
+# errors) is ejected for the cooldown, then readmitted after one successful probe
+BACKEND_FAILURE_THRESHOLD = int(os.getenv("BACKEND_FAILURE_THRESHOLD", "3"))
+BACKEND_COOLDOWN_SECONDS = float(os.getenv("BACKEND_COOLDOWN_SECONDS", "30"))
 
-# Provider: "groq" (Groq-hosted Llama) or "ollama" (local Ollama with cloud-tagged models)
+# Provider: "groq" (Groq-hosted Llama), "ollama" (local Ollama with cloud-tagged models)
+# or "mock" (offline playback / synthetic answers, see MOCK_* below)
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq")
 
 # Preset lists per provider (for help/validation)
@@ -27,19 +37,103 @@ OLLAMA_MODEL_PRESETS = [
 GROQ_MODEL_NAME = os.getenv("GROQ_MODEL_NAME", GROQ_MODEL_PRESETS[1])
 OLLAMA_MODEL_NAME = os.getenv("OLLAMA_MODEL_NAME", OLLAMA_MODEL_PRESETS[0])
 
+# Mock models: "synthetic" answers from the equations in the prompt; "recorded"
+# replays stored responses of any model; any other name replays that model's responses
+MOCK_MODEL_PRESETS = ["synthetic", "recorded"]
+MOCK_MODEL_NAME = os.getenv("MOCK_MODEL_NAME", MOCK_MODEL_PRESETS[0])
+
 if LLM_PROVIDER == "groq":
     MODEL_NAME = GROQ_MODEL_NAME
+elif LLM_PROVIDER == "mock":
+    MODEL_NAME = MOCK_MODEL_NAME
 else:
     MODEL_NAME = OLLAMA_MODEL_NAME
 
 NUM_TRIALS = 5
+
+# System sizes swept by full experiments (3, 5 and 7 use the hand-written systems)
+EXPERIMENT_SIZES = [int(n) for n in os.getenv("EXPERIMENT_SIZES", "3,5,7").split(",") if n.strip()]
+# fixed: one system per size | per_trial: trial N solves generated system seed N
+PROBLEM_MODE = os.getenv("PROBLEM_MODE", "fixed")
+EQUATIONS_CACHE_DIR = os.getenv("EQUATIONS_CACHE_DIR", "data/generated")
+# Ground-truth check: an answer is correct when every residual |A·x − b| is
+# within this fraction of the equation's scale (tolerates 2-decimal rounding)
+VERIFY_RTOL = float(os.getenv("VERIFY_RTOL", "0.01"))
+
 TEMPERATURE = 0.7
 MAX_TOKENS = 25000
 API_DELAY_SECONDS = 0.05
 MAX_RETRIES = 3
 
+# Token-bucket rate limits per provider/model (0 = unlimited; TPM is learned from
+# response headers when unset). Point RATE_LIMIT_STATE_PATH at a SQLite file to
+# share one budget across processes.
+RATE_LIMIT_RPM = float(os.getenv("RATE_LIMIT_RPM", str(60 / API_DELAY_SECONDS)))
+RATE_LIMIT_TPM = float(os.getenv("RATE_LIMIT_TPM", "0"))
+RATE_LIMIT_STATE_PATH = os.getenv("RATE_LIMIT_STATE_PATH", "")
+
+# Async client: max requests in flight per client (shared keep-alive pool per provider SDK)
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "64"))
+# Adaptive concurrency (AIMD) per provider/model, capped by MAX_CONCURRENT_REQUESTS:
+# +1 in-flight request per healthy round trip, x CONCURRENCY_BACKOFF on 429/5xx/timeouts
+# and a smaller cut when per-token latency exceeds CONCURRENCY_LATENCY_TOLERANCE x its
+# long-run average. The learned limit is stored in the results DB for the next run.
+ADAPTIVE_CONCURRENCY = os.getenv("ADAPTIVE_CONCURRENCY", "1").lower() in ("1", "true", "yes")
+CONCURRENCY_INITIAL = int(os.getenv("CONCURRENCY_INITIAL", "8"))
+CONCURRENCY_MIN = int(os.getenv("CONCURRENCY_MIN", "1"))
+CONCURRENCY_BACKOFF = float(os.getenv("CONCURRENCY_BACKOFF", "0.5"))
+CONCURRENCY_LATENCY_TOLERANCE = float(os.getenv("CONCURRENCY_LATENCY_TOLERANCE", "2.0"))
+# Streaming: consume chunks incrementally and cancel once the answer is complete.
+# Stop conditions: final_block (a block of "var = value" lines covering every
+# variable), all_variables (every variable assigned anywhere), never
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "0").lower() in ("1", "true", "yes")
+STREAM_STOP_CONDITION = os.getenv("STREAM_STOP_CONDITION", "final_block")
+# Full experiments: global budget of trials in flight across all conditions
+MAX_CONCURRENT_TRIALS = int(os.getenv("MAX_CONCURRENT_TRIALS", "16"))
+
 RESULTS_DIR = "data/results"
 RESULTS_DB_PATH = os.getenv("RESULTS_DB_PATH", os.path.join(RESULTS_DIR, "experiments.db"))
+
+# SQLite writes: trial inserts go through a background writer in batched transactions
+DB_ASYNC_WRITES = os.getenv("DB_ASYNC_WRITES", "1").lower() in ("1", "true", "yes")
+DB_WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", "200"))
+DB_WRITE_FLUSH_INTERVAL = float(os.getenv("DB_WRITE_FLUSH_INTERVAL", "0.05"))
+
+# Raw responses are stored compressed out of row: zlib | zstd (needs the zstandard package)
+RESPONSE_CODEC = os.getenv("RESPONSE_CODEC", "zlib")
+
+# Progress events: persisted to the results DB so the dashboard can stream them (SSE)
+EVENTS_PERSIST = os.getenv("EVENTS_PERSIST", "1").lower() in ("1", "true", "yes")
+EVENTS_POLL_INTERVAL = float(os.getenv("EVENTS_POLL_INTERVAL", "0.25"))
+
+# Distributed runs: workers lease queued trials; an expired lease is claimable again
+WORK_LEASE_SECONDS = float(os.getenv("WORK_LEASE_SECONDS", "300"))
+WORK_MAX_ATTEMPTS = int(os.getenv("WORK_MAX_ATTEMPTS", "3"))
+WORK_POLL_INTERVAL = float(os.getenv("WORK_POLL_INTERVAL", "1.0"))
+
+# Opt-in response cache: off | read_through | record | replay
+RESPONSE_CACHE_MODE = os.getenv("RESPONSE_CACHE_MODE", "off")
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", os.path.join(RESULTS_DIR, "response_cache.db"))
+RESPONSE_CACHE_MAX_MB = float(os.getenv("RESPONSE_CACHE_MAX_MB", "512"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "0"))  # 0 = never expires
+
+# Mock provider. Distributions: fixed:S | uniform:LO,HI | lognormal:MEDIAN,SIGMA | exp:MEAN
+MOCK_DB_PATH = os.getenv("MOCK_DB_PATH", os.path.join(RESULTS_DIR, "experiments.db"))  # recordings
+MOCK_LATENCY = os.getenv("MOCK_LATENCY", "lognormal:1.0,0.5")  # seconds per call
+MOCK_TTFT = os.getenv("MOCK_TTFT", "fixed:0.2")  # seconds to first token / error
+MOCK_COMPLETION_TOKENS = os.getenv("MOCK_COMPLETION_TOKENS", "uniform:300,900")  # synthetic length
+MOCK_ACCURACY = float(os.getenv("MOCK_ACCURACY", "0.7"))  # share of correct synthetic answers
+MOCK_ERROR_RATE = float(os.getenv("MOCK_ERROR_RATE", "0"))  # injected 500s
+MOCK_RATE_LIMIT_RATE = float(os.getenv("MOCK_RATE_LIMIT_RATE", "0"))  # injected 429s
+MOCK_RETRY_AFTER = os.getenv("MOCK_RETRY_AFTER", "1")  # retry-after header on 429s
+MOCK_TIME_SCALE = float(os.getenv("MOCK_TIME_SCALE", "1"))  # 0 = never sleep (pure throughput)
+MOCK_SEED = int(os.getenv("MOCK_SEED", "0"))
+
+# Benchmarks (--mode bench): one JSON report per run; a throughput drop larger
+# than the tolerance against a --baseline report counts as a regression
+BENCH_DIR = os.getenv("BENCH_DIR", os.path.join(RESULTS_DIR, "bench"))
+BENCH_REGRESSION_TOLERANCE = float(os.getenv("BENCH_REGRESSION_TOLERANCE", "0.15"))
+
 LINEAR_RESULTS_FILE = "data/results/linear_results.json"
 DET_RESULTS_FILE = "data/results/det_results.json"
 COMPARISON_FILE = "data/results/comparison.json"
@@ -47,3 +141,4 @@ COMPARISON_FILE = "data/results/comparison.json"
 # Quick env hints:
 #   LLM_PROVIDER=groq   GROQ_MODEL_NAME=llama-3.1-70b-versatile
 #   LLM_PROVIDER=ollama OLLAMA_MODEL_NAME=deepseek-v3.1:671b-cloud
+#   LLM_PROVIDER=mock   MOCK_MODEL_NAME=recorded MOCK_TIME_SCALE=0
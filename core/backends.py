@@ -0,0 +1,237 @@
+"""
+Backend pools for load-balanced LLM clients.
+
+A provider's backends are its API keys (GROQ_API_KEYS) or endpoints
+(OLLAMA_BASE_URLS); the mock has a single one. Every backend has its own
+token-bucket rate limiter and adaptive concurrency limit (so each key's
+quota is used in full) plus a circuit breaker that ejects it for
+BACKEND_COOLDOWN_SECONDS after BACKEND_FAILURE_THRESHOLD consecutive
+failures. ``BackendPool.pick`` routes each attempt to the least-loaded
+healthy backend, and raises ``BackendUnavailable`` (with the time until
+one reopens) while every backend is ejected.
+
+A pool of one keeps the provider/model limiter keys, so single-key setups
+share state with earlier runs exactly as before.
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.concurrency import AdaptiveConcurrencyLimiter, get_concurrency_limiter
+from core.rate_limiter import TokenBucketRateLimiter, get_rate_limiter
+from config.settings import (
+    ADAPTIVE_CONCURRENCY,
+    BACKEND_COOLDOWN_SECONDS,
+    BACKEND_FAILURE_THRESHOLD,
+    GROQ_API_KEYS,
+    OLLAMA_BASE_URLS,
+)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# Retry hint while a half-open backend's probe is still in flight
+_PROBE_POLL = 1.0
+
+
+class BackendUnavailable(Exception):
+    """Every backend of a pool is ejected; ``retry_after`` is the seconds until one can be tried."""
+
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(f"All {provider} backends are ejected; next probe in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    closed -> open after ``threshold`` consecutive failures; open ->
+    half_open once ``cooldown`` has passed, letting a single probe through;
+    the probe's outcome closes or re-opens it. Attempts that were already in
+    flight when it opened do not re-arm it.
+    """
+
+    def __init__(self, threshold: int = BACKEND_FAILURE_THRESHOLD, cooldown: float = BACKEND_COOLDOWN_SECONDS):
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self.failures = 0
+        self.ejections = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    def state(self, now: Optional[float] = None) -> str:
+        if self.opened_at is None:
+            return CLOSED
+        now = time.monotonic() if now is None else now
+        return HALF_OPEN if now - self.opened_at >= self.cooldown else OPEN
+
+    def available(self, now: float) -> bool:
+        state = self.state(now)
+        return state == CLOSED or (state == HALF_OPEN and not self._probing)
+
+    def reopens_in(self, now: float) -> float:
+        return 0.0 if self.opened_at is None else max(0.0, self.opened_at + self.cooldown - now)
+
+    def retry_in(self, now: float) -> float:
+        """Seconds until an unavailable breaker may let an attempt through."""
+        return self.reopens_in(now) or _PROBE_POLL
+
+    def on_start(self, now: float) -> bool:
+        """Count an attempt let through by ``available``; True if it is the half-open probe."""
+        if self.state(now) == HALF_OPEN:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self, now: float, probe: bool = False) -> None:
+        self.failures += 1
+        if probe:
+            # Failed probe: eject for another cooldown
+            self.opened_at = now
+            self._probing = False
+        elif self.opened_at is None and self.failures >= self.threshold:
+            self.opened_at = now
+            self.ejections += 1
+
+    def release_probe(self, probe: bool = True) -> None:
+        """The attempt ended without a verdict (client error, 429, cancellation)."""
+        if probe:
+            self._probing = False
+
+
+class Backend:
+    """One API key or endpoint of a provider."""
+
+    def __init__(self, provider: str, model: str, name: Optional[str],
+                 api_key: Optional[str] = None, base_url: Optional[str] = None):
+        self.provider = provider
+        self.name = name or provider
+        self.api_key = api_key
+        self.base_url = base_url
+        self.rate_limiter: TokenBucketRateLimiter = get_rate_limiter(provider, model, name)
+        self.concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = (
+            get_concurrency_limiter(provider, model, name) if ADAPTIVE_CONCURRENCY else None
+        )
+        self.breaker = CircuitBreaker()
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.rate_limited = 0
+        self.tokens = 0
+
+    def capacity(self) -> float:
+        return self.concurrency_limiter.limit if self.concurrency_limiter else 1.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "name": self.name,
+            "state": self.breaker.state(now),
+            "reopens_in": round(self.breaker.reopens_in(now), 1) or None,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "rate_limited": self.rate_limited,
+            "ejections": self.breaker.ejections,
+            "tokens": self.tokens,
+            "concurrency_limit": round(self.concurrency_limiter.limit, 2) if self.concurrency_limiter else None,
+        }
+
+
+class BackendPool:
+    """Least-loaded routing over a provider's backends, skipping ejected ones."""
+
+    def __init__(self, backends: List[Backend]):
+        if not backends:
+            raise ValueError("A backend pool needs at least one backend")
+        self.backends = backends
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.backends)
+
+    def pick(self, tokens: int = 0, avoid: Optional[Backend] = None) -> Tuple[Backend, bool]:
+        """
+        Claim the healthy backend with the lowest load (in flight / concurrency
+        limit, then rate-limit wait, then round robin) and count it as in flight;
+        returns it and whether the attempt is its half-open probe.
+        ``avoid`` (the backend a retry just failed on) is skipped when another
+        is healthy. Raises ``BackendUnavailable`` when none is.
+        """
+        with self._lock:
+            now = time.monotonic()
+            healthy = [b for b in self.backends if b.breaker.available(now)]
+            if not healthy:
+                raise BackendUnavailable(
+                    self.backends[0].provider, min(b.breaker.retry_in(now) for b in self.backends)
+                )
+            if avoid is not None and len(healthy) > 1:
+                healthy = [b for b in healthy if b is not avoid] or healthy
+            start = self._next
+            order = {id(b): (i - start) % len(self.backends) for i, b in enumerate(self.backends)}
+            backend = min(healthy, key=lambda b: (
+                b.in_flight / max(1.0, b.capacity()),
+                b.rate_limiter.pending_wait(tokens) if len(healthy) > 1 else 0.0,
+                order[id(b)],
+            ))
+            self._next = (self.backends.index(backend) + 1) % len(self.backends)
+            probe = backend.breaker.on_start(now)
+            backend.in_flight += 1
+            return backend, probe
+
+    def healthy_count(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            return sum(1 for b in self.backends if b.breaker.state(now) != OPEN)
+
+    def finish(self, backend: Backend, probe: bool = False, failed: bool = False,
+               rate_limited: bool = False, tokens: int = 0, counts: bool = True) -> None:
+        """
+        Record the end of an attempt on ``backend`` (``probe`` as returned by
+        ``pick``); ``failed`` counts against its circuit breaker,
+        ``counts=False`` leaves the breaker untouched.
+        """
+        with self._lock:
+            backend.in_flight -= 1
+            backend.requests += 1
+            backend.tokens += tokens
+            backend.rate_limited += rate_limited
+            if failed:
+                backend.failures += 1
+                backend.breaker.record_failure(time.monotonic(), probe)
+            elif counts and not rate_limited:
+                backend.breaker.record_success()
+            else:
+                backend.breaker.release_probe(probe)
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [b.get_stats() for b in self.backends]
+
+
+def _key_label(index: int, key: Optional[str]) -> str:
+    """'key1 (…a1b2)': identifies a key in stats and limiter state without exposing it."""
+    return f"key{index}" + (f" (…{key[-4:]})" if key and len(key) > 8 else "")
+
+
+def build_backend_pool(provider: str, model: str) -> BackendPool:
+    """The configured backends of a provider, as a pool."""
+    if provider == "groq":
+        keys = GROQ_API_KEYS
+        backends = [
+            Backend(provider, model, _key_label(i, key) if len(keys) > 1 else None, api_key=key)
+            for i, key in enumerate(keys, 1)
+        ]
+    elif provider == "ollama":
+        urls = OLLAMA_BASE_URLS
+        backends = [
+            Backend(provider, model, url if len(urls) > 1 else None, api_key="ollama", base_url=url)
+            for url in urls
+        ]
+    else:
+        backends = [Backend(provider, model, None)]
+    return BackendPool(backends)
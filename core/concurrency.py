@@ -0,0 +1,215 @@
+"""
+Adaptive (AIMD) concurrency limit per provider/model.
+
+Every LLM call attempt holds one slot of the limiter for its provider/model.
+The limit grows additively (about +1 per round trip's worth of successful
+responses, and only while at least half of it is in use) and shrinks
+multiplicatively on overload: by CONCURRENCY_BACKOFF on 429s, 5xx and
+timeouts, and by a smaller step when latency spikes. Latency is compared
+per completion token, so a long answer is not mistaken for a slow server:
+a spike is a short-run average more than CONCURRENCY_LATENCY_TOLERANCE
+times the long-run one. Decreases are spaced at least one round trip apart
+so a burst of failures from the same window only counts once.
+
+The learned limit and latency are saved in the results DB at exit
+(``storage.save_concurrency_limits``, one write for every limiter; nothing
+touches the DB while requests are in flight) and picked up by the next
+run, so a fast model starts saturated and a slow one starts gentle. The
+table comes from ``storage.init_db``; a DB that has not been migrated is
+only read.
+"""
+import asyncio
+import atexit
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from core import storage
+from config.settings import (
+    CONCURRENCY_BACKOFF,
+    CONCURRENCY_INITIAL,
+    CONCURRENCY_LATENCY_TOLERANCE,
+    CONCURRENCY_MIN,
+    MAX_CONCURRENT_REQUESTS,
+)
+
+# Attempt outcomes reported to ``release``
+OK, OVERLOAD, ERROR = "ok", "overload", "error"
+
+# Multiplicative cut on a latency spike (gentler than on errors)
+_LATENCY_BACKOFF = 0.9
+# EWMA weights of the short- and long-run seconds-per-token averages
+_SHORT_ALPHA = 0.3
+_LONG_ALPHA = 0.02
+
+
+class AdaptiveConcurrencyLimiter:
+    """In-flight request limit for one provider/model, shared by every client and event loop."""
+
+    def __init__(self, key: str, initial: int = CONCURRENCY_INITIAL, min_limit: int = CONCURRENCY_MIN,
+                 max_limit: int = MAX_CONCURRENT_REQUESTS, backoff: float = CONCURRENCY_BACKOFF,
+                 latency_tolerance: float = CONCURRENCY_LATENCY_TOLERANCE, persist: bool = True):
+        self.key = key
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.persist = persist
+        self.in_flight = 0
+        self.increases = 0
+        self.decreases = 0
+        self._short: Optional[float] = None
+        self._long: Optional[float] = None
+        self._rtt: Optional[float] = None
+        self._last_decrease = 0.0
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._lock = threading.Lock()
+
+        stored = self._load() if persist else None
+        if stored:
+            self._long = stored["latency"]
+        self.limit = self._clamp(stored["limit"] if stored else initial)
+        self._saved_limit = round(self.limit, 2)
+
+    def _clamp(self, value: float) -> float:
+        return float(min(self.max_limit, max(self.min_limit, value)))
+
+    # -- slots -----------------------------------------------------------------
+
+    async def acquire(self) -> float:
+        """Wait for a slot; returns the seconds spent waiting."""
+        start = time.time()
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return time.time() - start
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # A wake-up meant for this waiter goes to the next one
+                with self._lock:
+                    self._wake()
+                raise
+
+    def release(self, outcome: str = OK, latency: Optional[float] = None,
+                completion_tokens: Optional[int] = None) -> None:
+        """Free a slot and feed the attempt's outcome (OK / OVERLOAD / ERROR) into the limit."""
+        with self._lock:
+            # Only grow a limit that is in use: at least half of it was in flight
+            was_saturated = self.in_flight * 2 >= self.limit
+            self.in_flight -= 1
+            now = time.monotonic()
+            if outcome == OVERLOAD:
+                self._decrease(self.backoff, now)
+            elif outcome == OK and latency is not None:
+                self._observe(latency, completion_tokens, was_saturated, now)
+            self._wake()
+
+    def _observe(self, latency: float, completion_tokens: Optional[int], was_saturated: bool,
+                 now: float) -> None:
+        self._rtt = latency if self._rtt is None else (1 - _SHORT_ALPHA) * self._rtt + _SHORT_ALPHA * latency
+        per_token = latency / max(1, completion_tokens or 0)
+        self._short = per_token if self._short is None else (1 - _SHORT_ALPHA) * self._short + _SHORT_ALPHA * per_token
+        self._long = per_token if self._long is None else (1 - _LONG_ALPHA) * self._long + _LONG_ALPHA * per_token
+        if self._short > self._long * self.latency_tolerance:
+            self._decrease(_LATENCY_BACKOFF, now)
+        elif was_saturated and self.limit < self.max_limit:
+            # +1/limit per response adds ~1 slot per round trip at full load
+            self.limit = self._clamp(self.limit + 1.0 / self.limit)
+            self.increases += 1
+
+    def _decrease(self, factor: float, now: float) -> None:
+        if now - self._last_decrease < (self._rtt or 0.0):
+            return
+        self._last_decrease = now
+        self.limit = self._clamp(self.limit * factor)
+        self.decreases += 1
+
+    def _wake(self) -> None:
+        """Wake as many waiters as there are free slots (called with the lock held)."""
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            loop, waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            loop.call_soon_threadsafe(_resolve, waiter)
+            free -= 1
+
+    # -- persistence -------------------------------------------------------------
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        # A plain read: building a client must never migrate the results DB
+        try:
+            return storage.fetch_concurrency_limit(self.key)
+        except sqlite3.Error:
+            return None
+
+    def _unsaved(self) -> Optional[Tuple[str, float, Optional[float]]]:
+        """(key, limit, latency) if the limit changed since the last save, marking it saved."""
+        if not self.persist:
+            return None
+        with self._lock:
+            limit = round(self.limit, 2)
+            if limit == self._saved_limit:
+                return None
+            self._saved_limit = limit
+            return self.key, limit, self._long
+
+    def save(self) -> None:
+        _save([self])
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "waiting": sum(1 for _, waiter in self._waiters if not waiter.done()),
+                "increases": self.increases,
+                "decreases": self.decreases,
+                "sec_per_token": round(self._short, 5) if self._short is not None else None,
+                "sec_per_token_baseline": round(self._long, 5) if self._long is not None else None,
+            }
+
+
+def _resolve(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+_limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_concurrency_limiter(provider: str, model: str, backend: Optional[str] = None) -> AdaptiveConcurrencyLimiter:
+    """
+    Process-wide adaptive limiter for a provider/model, or for one backend
+    of a load-balanced pool (seeded from the stored limit).
+    """
+    key = f"{provider}:{model}" if backend is None else f"{provider}:{model}@{backend}"
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = AdaptiveConcurrencyLimiter(key)
+        return _limiters[key]
+
+
+def _save(limiters: List[AdaptiveConcurrencyLimiter]) -> None:
+    rows = [row for row in (limiter._unsaved() for limiter in limiters) if row]
+    try:
+        storage.save_concurrency_limits(rows)
+    except sqlite3.Error:
+        pass
+
+
+def _save_all() -> None:
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    _save(limiters)
+
+
+atexit.register(_save_all)
@@ -0,0 +1,127 @@
+"""
+Distributed trial execution over the SQLite work queue.
+
+A coordinator (``main.py --mode experiment --distributed``) enqueues a
+session's trial specs and waits for them; any number of ``main.py --mode
+worker`` processes, on this host or on others sharing the results DB, lease
+specs, run and score the trials and store them. A worker that dies simply
+lets its leases expire and another worker picks the trials up.
+"""
+import asyncio
+import os
+import socket
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+from core import storage
+from core.experiment import ExperimentRunner
+from data.equations import get_equations
+from config.settings import (
+    MAX_CONCURRENT_TRIALS,
+    WORK_LEASE_SECONDS,
+    WORK_MAX_ATTEMPTS,
+    WORK_POLL_INTERVAL,
+)
+
+
+class TrialWorker:
+    """Lease queued trials, run up to ``max_concurrency`` at once and report results."""
+
+    def __init__(self, worker_id: Optional[str] = None,
+                 max_concurrency: int = MAX_CONCURRENT_TRIALS,
+                 lease_seconds: float = WORK_LEASE_SECONDS,
+                 max_attempts: int = WORK_MAX_ATTEMPTS,
+                 poll_interval: float = WORK_POLL_INTERVAL):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.max_concurrency = max(1, max_concurrency)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.completed = 0
+        self.failed = 0
+        self.lost = 0
+        self._runners: Dict[Tuple[str, str], ExperimentRunner] = {}
+
+    def _runner(self, provider: str, model: str) -> ExperimentRunner:
+        # One runner (client, rate limiter, cache) per provider/model served by this worker
+        key = (provider, model)
+        if key not in self._runners:
+            self._runners[key] = ExperimentRunner(provider=provider, model_name=model)
+        return self._runners[key]
+
+    async def _execute(self, item: Dict) -> None:
+        runner = self._runner(item["provider"], item["model"])
+        eq_data = get_equations(item["size"], item["problem_seed"])
+        runner.events.emit("trial_started", item["session_id"], size=item["size"],
+                           method=item["method"], trial=item["trial"], worker=self.worker_id)
+        try:
+            result = await runner.arun_single_trial(eq_data["equations"], eq_data["variables"],
+                                                    item["method"], seed=item["trial"])
+        except Exception as e:
+            await asyncio.to_thread(storage.fail_work, item, self.worker_id, f"{type(e).__name__}: {e}",
+                                    self.max_attempts)
+            self.failed += 1
+            print(f"❌ {item['method']}_{item['size']}var trial {item['trial']} "
+                  f"(attempt {item['attempts']}): {e}")
+            return
+        result["trial"] = item["trial"]
+        result["problem_seed"] = item["problem_seed"]
+        if await asyncio.to_thread(storage.complete_work, item, self.worker_id, result):
+            self.completed += 1
+            runner._emit_trial_finished(item["size"], item["method"], result, session_id=item["session_id"])
+        else:
+            # Lease expired and the trial was handed to another worker; drop this result
+            self.lost += 1
+
+    async def run(self, idle_exit: Optional[float] = None) -> Dict:
+        """
+        Work until stopped, or until the queue has been empty for ``idle_exit``
+        seconds. Queue writes (BEGIN IMMEDIATE, busy timeout) run in threads so
+        a locked DB never stalls the LLM calls sharing this event loop.
+        """
+        in_flight: Dict[asyncio.Task, Dict] = {}
+        idle_since = last_renewal = time.monotonic()
+        while True:
+            free = self.max_concurrency - len(in_flight)
+            if free > 0:
+                claimed = await asyncio.to_thread(storage.claim_work, self.worker_id, free,
+                                                  self.lease_seconds, self.max_attempts)
+                for item in claimed:
+                    in_flight[asyncio.create_task(self._execute(item))] = item
+
+            now = time.monotonic()
+            if in_flight:
+                idle_since = now
+            elif idle_exit is not None and now - idle_since >= idle_exit:
+                break
+            if in_flight and now - last_renewal >= self.lease_seconds / 3:
+                await asyncio.to_thread(storage.renew_leases, self.worker_id,
+                                        [item["id"] for item in in_flight.values()], self.lease_seconds)
+                last_renewal = now
+
+            if in_flight:
+                done, _ = await asyncio.wait(in_flight, timeout=self.poll_interval,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    item = in_flight.pop(task)
+                    try:
+                        task.result()
+                    except Exception as e:
+                        # Not recorded (e.g. the DB stayed locked): the lease expires and the trial is retried
+                        self.failed += 1
+                        print(f"❌ {item['method']}_{item['size']}var trial {item['trial']}: "
+                              f"could not record result: {type(e).__name__}: {e}")
+            else:
+                await asyncio.sleep(self.poll_interval)
+
+        await asyncio.to_thread(storage.flush)
+        return self.get_stats()
+
+    def get_stats(self) -> Dict:
+        return {
+            "worker": self.worker_id,
+            "completed": self.completed,
+            "failed": self.failed,
+            "lost_leases": self.lost,
+        }
@@ -0,0 +1,68 @@
+"""
+Experiment progress events.
+
+The runner emits ``session_started``, ``trial_started``, ``trial_finished``,
+``condition_finished`` and ``session_finished`` events. Subscribers in the same
+process are called synchronously; with EVENTS_PERSIST the events are also
+appended to the results DB so another process (the web dashboard) can tail them.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from core import storage
+from config.settings import EVENTS_PERSIST
+
+EVENT_KINDS = (
+    "session_started",
+    "trial_started",
+    "trial_finished",
+    "condition_finished",
+    "session_finished",
+)
+
+Subscriber = Callable[[Dict[str, Any]], None]
+
+
+class EventBus:
+    """Fan experiment events out to local subscribers and the events table."""
+
+    def __init__(self, persist: bool = EVENTS_PERSIST):
+        self.persist = persist
+        self._subscribers: List[Subscriber] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Subscriber) -> Callable[[], None]:
+        """Register ``callback``; returns a function that unsubscribes it."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def emit(self, kind: str, session_id: Optional[int], **data: Any) -> Dict[str, Any]:
+        if kind not in EVENT_KINDS:
+            raise ValueError(f"Unknown event kind: {kind}")
+        event = {"kind": kind, "session_id": session_id, "ts": time.time(), **data}
+        if self.persist and session_id is not None:
+            storage.insert_event(session_id, kind, event)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                # A broken viewer must never take the experiment down
+                print(f"⚠️  Event subscriber failed on {kind}: {e}")
+        return event
+
+
+_bus = EventBus()
+
+
+def get_event_bus() -> EventBus:
+    """Process-wide event bus."""
+    return _bus
@@ -1,6 +1,7 @@
 """
 Standardized experiment runner for Linear vs DET.
 """
+import asyncio
 import json
 import os
 import time
@@ -10,12 +11,32 @@ from tqdm import tqdm
 import numpy as np
 import concurrent.futures
 
-from core.llm_client import get_llm_client
-from core.scorer import ResponseScorer
+from core.events import get_event_bus
+from core.llm_client import get_llm_client, run_sync
+from core.metrics import CALL_METRICS, summarize
+from core.scheduler import TrialScheduler, TrialSpec
+from core.scorer import ResponseScorer, StreamingStopHook
+from core.verifier import accuracy
 from core import storage
 from prompts.templates import get_linear_prompt, get_det_prompt
 from data.equations import get_equations
-from config.settings import NUM_TRIALS, RESULTS_DIR, LLM_PROVIDER, MODEL_NAME
+from data.generator import get_suite
+from config.settings import (
+    NUM_TRIALS,
+    EXPERIMENT_SIZES,
+    PROBLEM_MODE,
+    RESULTS_DIR,
+    LLM_PROVIDER,
+    MODEL_NAME,
+    MAX_CONCURRENT_TRIALS,
+    STREAM_RESPONSES,
+    STREAM_STOP_CONDITION,
+    WORK_MAX_ATTEMPTS,
+    WORK_POLL_INTERVAL,
+)
+
+
+PROBLEM_MODES = ("fixed", "per_trial")
 
 
 class ExperimentRunner: 
@@ -23,37 +44,79 @@ class ExperimentRunner:
     Standardized experiment runner comparing LINEAR vs DET.
     """
     
-    def __init__(self, provider: Optional[str] = None, model_name: Optional[str] = None):
+    def __init__(self, provider: Optional[str] = None, model_name: Optional[str] = None,
+                 max_concurrency: int = MAX_CONCURRENT_TRIALS, problem_mode: str = PROBLEM_MODE,
+                 dedicated_pool: bool = False):
+        if problem_mode not in PROBLEM_MODES:
+            raise ValueError(f"Unsupported problem mode: {problem_mode} (expected one of {', '.join(PROBLEM_MODES)})")
         self.provider = provider or LLM_PROVIDER
         self.model_name = model_name or MODEL_NAME
-        self.llm = get_llm_client(self.provider, self.model_name)
+        self.max_concurrency = max_concurrency
+        self.problem_mode = problem_mode
+        self.llm = get_llm_client(self.provider, self.model_name, dedicated_pool=dedicated_pool)
         self.scorer = ResponseScorer()
+        self.events = get_event_bus()
         self.session_id: Optional[int] = None
     
-    def get_prompt(self, equations: List[str], method: str) -> str:
+    def get_prompt(self, equations: List[str], method: str,
+                   variables: Optional[List[str]] = None) -> str:
         """Get prompt based on method."""
         if method == "det": 
-            return get_det_prompt(equations)
-        return get_linear_prompt(equations)
+            return get_det_prompt(equations, variables)
+        return get_linear_prompt(equations, variables)
+
+    def problem_seed(self, trial_num: int) -> Optional[int]:
+        """Generated-system seed for a trial (None: the default system for the size)."""
+        return trial_num if self.problem_mode == "per_trial" else None
     
     def run_single_trial(self, equations: List[str], variables: List[str], 
-                         method: str, temperature: float = 0.7) -> Dict:
-        """Run a single trial."""
-        prompt = self.get_prompt(equations, method)
-        response, tokens, time_taken = self.llm.generate(prompt, temperature)
-        score_result = self.scorer.score(response, variables)
+                         method: str, temperature: float = 0.7,
+                         seed: Optional[int] = None) -> Dict:
+        """Run a single trial (``seed`` keys repeated trials apart in the response cache)."""
+        prompt = self.get_prompt(equations, method, variables)
+        generation = self.llm.generate_with_stats(prompt, temperature, seed,
+                                                  stop_when=self._stop_hook(variables))
+        return self._build_trial_result(generation, equations, variables)
+
+    async def arun_single_trial(self, equations: List[str], variables: List[str],
+                                method: str, temperature: float = 0.7,
+                                seed: Optional[int] = None) -> Dict:
+        """Run a single trial without blocking the event loop on the API call or scoring."""
+        prompt = self.get_prompt(equations, method, variables)
+        generation = await self.llm.agenerate_with_stats(prompt, temperature, seed,
+                                                         stop_when=self._stop_hook(variables))
+        return await asyncio.to_thread(self._build_trial_result, generation, equations, variables)
+
+    def _stop_hook(self, variables: List[str]) -> Optional[StreamingStopHook]:
+        """Early-termination hook for streamed generations (None when not streaming)."""
+        if not STREAM_RESPONSES:
+            return None
+        return StreamingStopHook(variables, STREAM_STOP_CONDITION)
+
+    def _build_trial_result(self, generation: Dict, equations: List[str],
+                            variables: List[str]) -> Dict:
+        response = generation["text"]
+        system = {"equations": equations, "variables": variables}
+        score_result = self.scorer.score(response, variables, expected=system)
         
         return {
             "response": response,
-            "tokens": tokens,
-            "time": round(time_taken, 2),
+            "tokens": generation["tokens"],
+            "time": round(generation["time"], 2),
+            "ttft": generation["ttft"],
+            "tokens_per_sec": generation["tokens_per_sec"],
+            "stopped_early": generation["stopped_early"],
             "score": score_result["total"],
             "completeness": score_result["completeness"],
             "consistency": score_result["consistency"],
             "reasoning": score_result["reasoning"],
             "success": score_result["success"],
             "variables_found": score_result["variables_found"],
-            "assignments": score_result["assignments"]
+            "assignments": score_result["assignments"],
+            "correct": score_result["correct"],
+            "max_residual": score_result["max_residual"],
+            "scorer_version": score_result["scorer_version"],
+            **{name: generation.get(name) for name in CALL_METRICS},
         }
     
     def run_condition(self, size: int, method: str, num_trials: int = NUM_TRIALS) -> Dict:
@@ -67,11 +130,13 @@ class ExperimentRunner:
         trials = [None] * num_trials
         
         def run_indexed_trial(idx):
-            res = self.run_single_trial(equations, variables, method)
+            self.events.emit("trial_started", self.session_id, size=size, method=method, trial=idx + 1)
+            res = self.run_single_trial(equations, variables, method, seed=idx + 1)
             res["trial"] = idx + 1
             return idx, res
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=min(num_trials, 5)) as executor:
+        # In-flight API calls are paced by the client's adaptive concurrency limit
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(num_trials, self.max_concurrency)) as executor:
             future_to_idx = {executor.submit(run_indexed_trial, i): i for i in range(num_trials)}
             for future in tqdm(concurrent.futures.as_completed(future_to_idx), total=num_trials, desc=f"{method}_{size}var"):
                 idx, trial_result = future.result()
@@ -85,7 +150,33 @@ class ExperimentRunner:
                         trial_num=idx + 1,
                         result=trial_result,
                     )
+                self._emit_trial_finished(size, method, trial_result)
         
+        return self._finalize_condition(size, method, trials)
+
+    def _emit_trial_finished(self, size: int, method: str, result: Dict,
+                             session_id: Optional[int] = None) -> None:
+        self.events.emit(
+            "trial_finished",
+            session_id or self.session_id,
+            size=size,
+            method=method,
+            trial=result["trial"],
+            score=result["score"],
+            success=result["success"],
+            correct=result.get("correct"),
+            tokens=result["tokens"],
+            time=result["time"],
+            ttft=result["ttft"],
+            tokens_per_sec=result["tokens_per_sec"],
+            stopped_early=result["stopped_early"],
+            latency=result.get("latency"),
+            retries=result.get("retries"),
+        )
+
+    def _finalize_condition(self, size: int, method: str, trials: List[Dict]) -> Dict:
+        """Compute per-condition stats and persist them for the session."""
+        num_trials = len(trials)
         scores = [t["score"] for t in trials]
         tokens = [t["tokens"] for t in trials]
         times = [t["time"] for t in trials]
@@ -102,6 +193,8 @@ class ExperimentRunner:
                 "max": round(max(scores), 2)
             },
             "success_rate": round(sum(successes) / len(successes) * 100, 1),
+            "accuracy": accuracy(trials),
+            "percentiles": summarize(trials),
             "tokens": {
                 "mean": round(np.mean(tokens), 1),
                 "total": sum(tokens)
@@ -114,64 +207,286 @@ class ExperimentRunner:
         }
         
         if self.session_id:
+            # Trial rows are written in the background; make them durable with their condition
+            storage.flush()
             storage.insert_condition(
                 session_id=self.session_id,
                 size=size,
                 method=method,
                 stats=stats,
             )
+        self.events.emit(
+            "condition_finished",
+            self.session_id,
+            size=size,
+            method=method,
+            num_trials=num_trials,
+            mean_score=stats["scores"]["mean"],
+            success_rate=stats["success_rate"],
+            accuracy=stats["accuracy"],
+            mean_tokens=stats["tokens"]["mean"],
+            mean_time=stats["time"]["mean"],
+        )
 
         return stats
     
-    def run_full_experiment(self, methods: List[str] = None) -> Dict:
-        """Run the complete experiment."""
+    def run_full_experiment(self, methods: List[str] = None,
+                            resume_session_id: Optional[int] = None,
+                            distributed: bool = False,
+                            sizes: Optional[List[int]] = None,
+                            sweep_id: Optional[int] = None) -> Dict:
+        """
+        Run the complete experiment. With ``resume_session_id`` the stored
+        session's configuration is reused, only its missing trials are run and
+        every condition is recomputed from the stored + new trials. With
+        ``distributed`` the trials are queued for ``--mode worker`` processes
+        instead of being run here. Sessions of a sweep (``sweep_id``) leave
+        saving the results file to ``core.sweep``.
+        """
         if methods is None: 
             methods = ["linear", "det"]
-        
-        num_conditions = len(methods) * 3
-        total_trials = NUM_TRIALS * num_conditions
+        sizes = sizes or EXPERIMENT_SIZES
+        num_trials = NUM_TRIALS
+        completed: Dict[TrialSpec, Dict] = {}
         
         print("=" * 60)
         print("🧪 DYNAMIC EXPRESSION TREE EXPERIMENT (CONSOLIDATED)")
         print("=" * 60)
 
         storage.init_db()
-        self.session_id = storage.create_session(
-            mode="experiment",
-            provider=self.provider,
-            model=self.model_name,
-            config={
-                "trials_per_condition": NUM_TRIALS,
-                "sizes": [3, 5, 7],
-                "methods": methods,
-            },
-        )
+        if resume_session_id is not None:
+            session = storage.fetch_session(resume_session_id)
+            if session is None or session["mode"] != "experiment":
+                raise ValueError(f"No experiment session with id {resume_session_id}")
+            if (session["provider"], session["model"]) != (self.provider, self.model_name):
+                raise ValueError(
+                    f"Session {resume_session_id} was run with {session['provider']}/{session['model']}, "
+                    f"not {self.provider}/{self.model_name}"
+                )
+            config = session["config"]
+            methods = config.get("methods", methods)
+            sizes = config.get("sizes", sizes)
+            num_trials = config.get("trials_per_condition", num_trials)
+            self.problem_mode = config.get("problem_mode", "fixed")
+            self.session_id = resume_session_id
+            completed = self._load_completed_trials(resume_session_id)
+            # Conditions are rebuilt from all trials once the missing ones have run
+            storage.delete_conditions(resume_session_id)
+            print(f"↩️  Resuming session {resume_session_id}: {len(completed)} trials already stored")
+        else:
+            self.session_id = storage.create_session(
+                mode="experiment",
+                provider=self.provider,
+                model=self.model_name,
+                config={
+                    "trials_per_condition": num_trials,
+                    "sizes": sizes,
+                    "methods": methods,
+                    "problem_mode": self.problem_mode,
+                },
+                sweep_id=sweep_id,
+            )
         
         results = {
             "timestamp": datetime.now().isoformat(),
             "config": {
-                "trials_per_condition": NUM_TRIALS,
-                "sizes": [3, 5, 7],
+                "trials_per_condition": num_trials,
+                "sizes": sizes,
                 "methods": methods,
+                "problem_mode": self.problem_mode,
                 "provider": self.provider,
                 "model": self.model_name,
                 "session_id": self.session_id,
+                "sweep_id": sweep_id,
             },
             "conditions": {},
             "summary": {}
         }
         
-        for size in [3, 5, 7]:
+        if self.problem_mode == "per_trial":
+            # Trial N solves seed N: load (or generate and cache) each size's suite once
+            for size in sizes:
+                get_suite(size, num_trials, base_seed=1)
+        total_trials = num_trials * len(methods) * len(sizes) - len(completed)
+        self.events.emit("session_started", self.session_id, provider=self.provider,
+                         model=self.model_name, total_trials=total_trials,
+                         resumed=resume_session_id is not None)
+        try:
+            if distributed:
+                by_condition = self._run_distributed(sizes, methods, num_trials, completed)
+            else:
+                by_condition = run_sync(self._run_pipelined(sizes, methods, num_trials, completed))
+        except BaseException as e:
+            self.events.emit("session_finished", self.session_id, status="failed", error=str(e))
+            storage.flush()
+            raise
+        for size in sizes:
             for method in methods: 
                 key = f"{method}_{size}var"
-                results["conditions"][key] = self.run_condition(size, method)
+                results["conditions"][key] = by_condition[(size, method)]
         
-        results["summary"] = self._calculate_summary(results["conditions"], methods)
-        self._save_results(results)
+        results["summary"] = self._calculate_summary(results["conditions"], methods, sizes)
+        if sweep_id is None:
+            self._save_results(results)
+        self.events.emit("session_finished", self.session_id, status="completed",
+                         best_method=results["summary"]["best_method"]["name"])
+        storage.flush()
         
         return results
+
+    @staticmethod
+    def _load_completed_trials(session_id: int, size: Optional[int] = None,
+                               method: Optional[str] = None) -> Dict[TrialSpec, Dict]:
+        """
+        Stored trials of a session (or of one size/method condition) as trial
+        results keyed by (size, method, trial).
+        """
+        completed = {}
+        # Ordered by trial then id: a duplicate row from an interrupted batch is replaced by the latest
+        for row in storage.fetch_trials(session_id, include_response=True, size=size, method=method):
+            if row["size"] is None or row["method"] is None or row["trial"] is None:
+                continue
+            if method is not None and row["method"] != method:
+                continue  # the method filter also matches variants of its family
+            completed[(row["size"], row["method"], row["trial"])] = {
+                "response": row["response"],
+                "tokens": row["tokens"],
+                "time": row["time"],
+                "ttft": row["ttft"],
+                "tokens_per_sec": row["tokens_per_sec"],
+                "stopped_early": bool(row["stopped_early"]),
+                "score": row["score"],
+                "completeness": row["completeness"],
+                "consistency": row["consistency"],
+                "reasoning": row["reasoning"],
+                "success": bool(row["success"]),
+                "variables_found": row["variables_found"],
+                "assignments": json.loads(row["assignments"]) if row["assignments"] else {},
+                "correct": None if row["correct"] is None else bool(row["correct"]),
+                "max_residual": row["max_residual"],
+                "scorer_version": row["scorer_version"],
+                "problem_seed": row["problem_seed"],
+                **{name: row[name] for name in CALL_METRICS},
+                "trial": row["trial"],
+            }
+        return completed
     
-    def _calculate_summary(self, conditions: Dict, methods: List[str]) -> Dict:
+    async def _run_pipelined(self, sizes: List[int], methods: List[str],
+                             num_trials: int,
+                             completed: Optional[Dict[TrialSpec, Dict]] = None) -> Dict:
+        """
+        Run every trial of every condition through one global work queue,
+        skipping the specs already in ``completed``.
+        """
+        completed = completed or {}
+        specs = [(size, method, n) for size in sizes for method in methods
+                 for n in range(1, num_trials + 1) if (size, method, n) not in completed]
+        stats_by_condition = {}
+
+        def condition_trials(size, method, new_trials):
+            merged = {n: t for (s, m, n), t in completed.items() if (s, m) == (size, method)}
+            merged.update((t["trial"], t) for t in new_trials)
+            return [merged[n] for n in sorted(merged)]
+
+        print(f"\n📊 Running {len(specs)} trials across {len(sizes) * len(methods)} conditions "
+              f"(up to {self.max_concurrency} in flight) [Provider: {self.provider.upper()} | Model: {self.model_name}]")
+        progress = tqdm(total=len(specs), desc="trials")
+
+        async def run_trial(spec):
+            size, method, trial_num = spec
+            problem_seed = self.problem_seed(trial_num)
+            eq_data = get_equations(size, problem_seed)
+            self.events.emit("trial_started", self.session_id, size=size, method=method, trial=trial_num)
+            result = await self.arun_single_trial(eq_data["equations"], eq_data["variables"], method,
+                                                  seed=trial_num)
+            result["problem_seed"] = problem_seed
+            return result
+
+        # Storage calls (compression, flushes) run in threads: the loop is shared by every in-flight call
+        async def on_trial_done(spec, result):
+            size, method, trial_num = spec
+            result["trial"] = trial_num
+            progress.update(1)
+            if self.session_id:
+                await asyncio.to_thread(
+                    storage.insert_trial,
+                    session_id=self.session_id,
+                    size=size,
+                    method=method,
+                    trial_num=trial_num,
+                    result=result,
+                )
+            self._emit_trial_finished(size, method, result)
+
+        async def on_condition_done(size, method, trials):
+            stats = await asyncio.to_thread(self._finalize_condition, size, method,
+                                            condition_trials(size, method, trials))
+            stats_by_condition[(size, method)] = stats
+            progress.write(f"✅ {method}_{size}var: mean score {stats['scores']['mean']} | "
+                           f"success {stats['success_rate']}% | accuracy {stats['accuracy']}%")
+
+        scheduler = TrialScheduler(
+            run_trial,
+            max_concurrency=self.max_concurrency,
+            on_trial_done=on_trial_done,
+            on_condition_done=on_condition_done,
+        )
+        try:
+            await scheduler.run(specs)
+        finally:
+            progress.close()
+        # Conditions that were already complete before a resume
+        for size in sizes:
+            for method in methods:
+                if (size, method) not in stats_by_condition:
+                    stats_by_condition[(size, method)] = await asyncio.to_thread(
+                        self._finalize_condition, size, method, condition_trials(size, method, []))
+        return stats_by_condition
+
+    def _run_distributed(self, sizes: List[int], methods: List[str], num_trials: int,
+                         completed: Dict[TrialSpec, Dict]) -> Dict:
+        """Queue the missing trials for workers and finalize conditions as they complete."""
+        specs = [(size, method, n) for size in sizes for method in methods
+                 for n in range(1, num_trials + 1) if (size, method, n) not in completed]
+        storage.enqueue_trials(self.session_id, self.provider, self.model_name,
+                               [(*spec, self.problem_seed(spec[2])) for spec in specs])
+        print(f"\n📬 Queued {len(specs)} trials for session {self.session_id} "
+              f"[Provider: {self.provider.upper()} | Model: {self.model_name}]")
+        print("   Start workers with: python3 main.py --mode worker")
+
+        stats_by_condition = {}
+        waiting = [(size, method) for size in sizes for method in methods]
+        progress = tqdm(total=len(specs), desc="trials")
+        try:
+            while waiting:
+                work = storage.fetch_work_progress(self.session_id)
+                done = sum(counts.get("done", 0) for counts in work.values())
+                progress.update(done - progress.n)
+                failed = storage.fetch_work_errors(self.session_id)
+                if failed:
+                    raise RuntimeError(
+                        f"{len(failed)} trials failed after {WORK_MAX_ATTEMPTS} attempts "
+                        f"(first: {failed[0]['error']}); re-run with --resume {self.session_id}"
+                    )
+                for size, method in list(waiting):
+                    counts = work.get((size, method), {})
+                    if counts.get("pending") or counts.get("leased"):
+                        continue
+                    # Read once per condition, when it is done (not on every poll)
+                    trials = [t for _, t in sorted(self._load_completed_trials(self.session_id, size, method).items())]
+                    stats = self._finalize_condition(size, method, trials)
+                    stats_by_condition[(size, method)] = stats
+                    waiting.remove((size, method))
+                    progress.write(f"✅ {method}_{size}var: mean score {stats['scores']['mean']} | "
+                                   f"success {stats['success_rate']}% | accuracy {stats['accuracy']}%")
+                if waiting:
+                    time.sleep(WORK_POLL_INTERVAL)
+        finally:
+            progress.close()
+        return stats_by_condition
+
+    def _calculate_summary(self, conditions: Dict, methods: List[str],
+                           sizes: Optional[List[int]] = None) -> Dict:
         """Calculate summary statistics for visualization."""
         summary = {
             "by_method": {},
@@ -184,22 +499,26 @@ class ExperimentRunner:
         for method in methods:
             m_scores = []
             m_success = []
+            m_accuracy = []
             m_tokens = []
             
             for key, data in conditions.items():
                 if data["method"] == method: 
                     m_scores.append(data["scores"]["mean"])
                     m_success.append(data["success_rate"])
+                    if data.get("accuracy") is not None:
+                        m_accuracy.append(data["accuracy"])
                     m_tokens.append(data["tokens"]["mean"])
             
             summary["by_method"][method] = {
                 "avg_score": round(np.mean(m_scores), 2),
                 "avg_success_rate": round(np.mean(m_success), 1),
+                "avg_accuracy": round(np.mean(m_accuracy), 1) if m_accuracy else None,
                 "avg_tokens": round(np.mean(m_tokens), 1)
             }
         
         # By Size and Scaling
-        sizes = [3, 5, 7]
+        sizes = sizes or [3, 5, 7]
         linear_scores = []
         det_scores = []
         
@@ -220,9 +539,12 @@ class ExperimentRunner:
                 "det_advantage": round(d_score - l_score, 1)
             }
             
-        # Scaling (Simple slopes)
-        l_slope = np.polyfit(sizes, linear_scores, 1)[0]
-        d_slope = np.polyfit(sizes, det_scores, 1)[0]
+        # Scaling (Simple slopes; undefined for a single size)
+        if len(sizes) > 1:
+            l_slope = np.polyfit(sizes, linear_scores, 1)[0]
+            d_slope = np.polyfit(sizes, det_scores, 1)[0]
+        else:
+            l_slope = d_slope = 0.0
         
         summary["scaling_analysis"] = {
             "linear_slope": round(l_slope, 2),
@@ -245,6 +567,9 @@ class ExperimentRunner:
             "name": best_method[0],
             "avg_score": best_method[1]["avg_score"]
         }
+
+        # Latency/token percentiles over every trial of the run (one model)
+        summary["percentiles"] = summarize([t for data in conditions.values() for t in data.get("trials", [])])
         return summary
     
     def _save_results(self, results: Dict):
@@ -256,7 +581,16 @@ class ExperimentRunner:
         print(f"\n✅ Results saved to {filepath}")
 
 
-def run_experiment(methods: List[str] = None, provider: str = None, model_name: str = None) -> Dict:
-    """Main entry point."""
-    runner = ExperimentRunner(provider=provider, model_name=model_name)
-    return runner.run_full_experiment(methods)
+def run_experiment(methods: List[str] = None, provider: str = None, model_name: str = None,
+                   resume_session_id: Optional[int] = None, distributed: bool = False,
+                   sizes: Optional[List[int]] = None, problem_mode: str = PROBLEM_MODE) -> Dict:
+    """Main entry point (``resume_session_id`` continues a stored session with its own provider/model)."""
+    if resume_session_id is not None:
+        storage.init_db()
+        session = storage.fetch_session(resume_session_id)
+        if session is None:
+            raise ValueError(f"No session with id {resume_session_id}")
+        provider, model_name = session["provider"], session["model"]
+    runner = ExperimentRunner(provider=provider, model_name=model_name, problem_mode=problem_mode)
+    return runner.run_full_experiment(methods, resume_session_id=resume_session_id,
+                                      distributed=distributed, sizes=sizes)
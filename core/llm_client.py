@@ -1,116 +1,473 @@
 """
-Multi-modal LLM Client supporting Groq Cloud and local Ollama.
+Multi-modal LLM Client supporting Groq Cloud, local Ollama and an offline
+mock (``core.mock_llm``).
+
+Requests go through the async SDK clients. Every client on the same event
+loop shares one keep-alive connection pool per provider, and the blocking
+``generate`` submits to a background loop so thread-based callers reuse
+that pool instead of each holding their own sockets. Pacing and 429 backoff
+are handled by the provider/model token bucket in ``core.rate_limiter``, and
+the number of requests in flight by the adaptive limiter in
+``core.concurrency``.
+
+With several API keys (GROQ_API_KEYS) or endpoints (OLLAMA_BASE_URLS) each
+attempt is routed to the least-loaded healthy backend (``core.backends``),
+which has its own rate limit, concurrency limit and circuit breaker.
 """
-from groq import Groq
-from openai import OpenAI
+from groq import AsyncGroq, DefaultAsyncHttpxClient as GroqHttpClient, Groq
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient as OpenAIHttpClient, OpenAI
+import asyncio
+import random
+import threading
 import time
-from typing import Tuple
+import weakref
+from collections import deque
+from typing import Any, Callable, Coroutine, Dict, Optional, Tuple, TypeVar
+from core import concurrency
+from core.backends import Backend, BackendUnavailable, build_backend_pool
+from core.metrics import CALL_METRICS, percentiles
+from core.mock_llm import MockAsyncClient, MockClient
+from core.rate_limiter import retry_after_seconds
+from core.response_cache import get_response_cache
 from config.settings import (
-    GROQ_API_KEY,
-    OLLAMA_BASE_URL,
     LLM_PROVIDER,
     MODEL_NAME,
     MAX_RETRIES,
-    API_DELAY_SECONDS,
     TEMPERATURE,
     MAX_TOKENS,
+    MAX_CONCURRENT_REQUESTS,
+    STREAM_RESPONSES,
 )
 
+T = TypeVar("T")
+
+_background_loop: asyncio.AbstractEventLoop | None = None
+_http_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+_loop_lock = threading.Lock()
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    """Start (once) the daemon event loop used by blocking callers."""
+    global _background_loop
+    with _loop_lock:
+        if _background_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="llm-client-loop", daemon=True).start()
+            _background_loop = loop
+        return _background_loop
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine on the shared background loop and block for its result."""
+    loop = _get_background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_sync() cannot be called from the client event loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+def _shared_http_client(provider: str, pool_key: Optional[str] = None) -> Any:
+    """Keep-alive HTTP pool for the running loop, shared by every client with the same key (default: provider)."""
+    loop = asyncio.get_running_loop()
+    key = pool_key or provider
+    with _loop_lock:
+        pools = _http_pools.setdefault(loop, {})
+        if key not in pools:
+            pools[key] = GroqHttpClient() if provider == "groq" else OpenAIHttpClient()
+        return pools[key]
+
 
 class LLMClient:
     """Multi-provider API client with usage tracking."""
-    
-    def __init__(self, provider: str | None = None, model_name: str | None = None):
+
+    def __init__(
+        self,
+        provider: str | None = None,
+        model_name: str | None = None,
+        max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+        dedicated_pool: bool = False,
+    ):
         # Allow override at call-site; fall back to settings
         self.provider = provider or LLM_PROVIDER
         self.model_name = model_name or MODEL_NAME
+        self.max_concurrency = max(1, max_concurrency)
+        # Sweeps give each model its own connection pool so one slow model cannot starve another
+        self.pool_key = f"{self.provider}:{self.model_name}" if dedicated_pool else None
 
+        if self.provider not in ("groq", "ollama", "mock"):
+            raise ValueError(f"Unsupported LLM provider: {self.provider}")
+        # API keys / endpoints with their own rate limits, concurrency limits and circuit breakers
+        self.backends = build_backend_pool(self.provider, self.model_name)
+        # Blocking SDK client on the first backend (for ad-hoc callers such as debug scripts)
+        primary = self.backends.backends[0]
         if self.provider == "groq":
-            self.client = Groq(api_key=GROQ_API_KEY)
+            self.client = Groq(api_key=primary.api_key)
         elif self.provider == "ollama":
             # Ollama provides an OpenAI-compatible API
             self.client = OpenAI(
                 api_key="ollama",  # Dummy key required by the client
-                base_url=OLLAMA_BASE_URL,
+                base_url=primary.base_url,
             )
         else:
-            raise ValueError(f"Unsupported LLM provider: {self.provider}")
-            
+            self.client = MockClient(self.model_name)
+
         self.total_requests = 0
         self.total_tokens = 0
-        self.last_request_time = 0
-    
-    def generate(self, prompt: str, temperature: float = TEMPERATURE) -> Tuple[str, int, float]:
+        self.cache_hits = 0
+        self.early_stops = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        # Recent per-call latencies for get_stats percentiles
+        self._latencies: deque = deque(maxlen=1024)
+        self.cache = get_response_cache()
+        # Running estimate of completion size, used to reserve TPM budget up front
+        self._expected_completion_tokens = 0.0
+        self._lock = threading.Lock()
+        # Async SDK clients per backend + in-flight semaphore, one pair per event loop
+        self._loop_state: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[Dict[str, Any], asyncio.Semaphore]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _async_client(self, backend: Backend) -> Any:
+        # SDK retries are disabled so 429s reach the shared rate limiter
+        if self.provider == "mock":
+            return MockAsyncClient(self.model_name)
+        http_client = _shared_http_client(self.provider, self.pool_key)
+        if self.provider == "groq":
+            return AsyncGroq(api_key=backend.api_key, http_client=http_client, max_retries=0)
+        return AsyncOpenAI(api_key="ollama", base_url=backend.base_url, http_client=http_client, max_retries=0)
+
+    def _async_state(self) -> Tuple[Dict[str, Any], asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._loop_state.get(loop)
+            if state is None:
+                clients = {backend.name: self._async_client(backend) for backend in self.backends.backends}
+                state = (clients, asyncio.Semaphore(self.max_concurrency))
+                self._loop_state[loop] = state
+            return state
+
+    @classmethod
+    def _outcome(cls, error: Exception) -> str:
+        """How a failed attempt counts for the adaptive concurrency limit."""
+        status = getattr(error, "status_code", None)
+        if cls._is_rate_limit(error) or (isinstance(status, int) and status >= 500) or isinstance(
+            error, (asyncio.TimeoutError, TimeoutError)
+        ) or "timeout" in type(error).__name__.lower():
+            return concurrency.OVERLOAD
+        return concurrency.ERROR
+
+    @staticmethod
+    def _is_backend_failure(error: Exception) -> bool:
+        """Errors that count against a backend's circuit breaker: 5xx, timeouts, connection failures."""
+        status = getattr(error, "status_code", None)
+        if isinstance(status, int):
+            return status >= 500
+        name = type(error).__name__.lower()
+        return isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)) or (
+            "timeout" in name or "connection" in name
+        )
+
+    @staticmethod
+    def _is_rate_limit(error: Exception) -> bool:
+        error_str = str(error).lower()
+        return (getattr(error, "status_code", None) == 429
+                or "429" in error_str or "resource_exhausted" in error_str or "quota" in error_str)
+
+    async def _retry_delay(self, error: Exception, attempt: int, backend: Backend) -> float:
+        """Seconds to wait before retrying, or re-raise if the error is final."""
+        error_str = str(error).lower()
+        if "insufficient_quota" in error_str or "check your plan and billing" in error_str:
+            print(f"\n❌ Permanent Quota Error ({self.provider}): Your OpenAI account balance is likely $0. Please add credits at https://platform.openai.com/settings/organization/billing")
+            raise error
+
+        if self._is_rate_limit(error):
+            headers = getattr(getattr(error, "response", None), "headers", None)
+            wait_time = retry_after_seconds(headers)
+            if wait_time is None:
+                # No hint from the server: exponential backoff with jitter
+                wait_time = min(60.0, 2.0 ** (attempt + 1)) + random.uniform(0, 1)
+            await backend.rate_limiter.aupdate_from_headers(headers)
+            await backend.rate_limiter.apenalize(wait_time)
+            where = self.provider if len(self.backends) == 1 else f"{self.provider} {backend.name}"
+            print(f"⏳ Rate limited ({where}). Backing off {wait_time:.1f}s...")
+            # The limiter now holds every caller of this backend until the window reopens
+            return 0.0
+        if attempt < MAX_RETRIES - 1:
+            # Another healthy backend can take the retry right away
+            return 0.0 if self.backends.healthy_count() > 1 else 2 ** attempt
+        raise Exception(f"Failed after {MAX_RETRIES} attempts ({self.provider}): {error}")
+
+    async def agenerate_with_stats(
+        self,
+        prompt: str,
+        temperature: float = TEMPERATURE,
+        seed: Optional[int] = None,
+        stream: Optional[bool] = None,
+        stop_when: Optional[Callable[[str], bool]] = None,
+    ) -> Dict[str, Any]:
         """
-        Generate response and return (text, tokens_used, time_taken).
+        Generate a response and return it with per-call timing.
+
+        Keys: text, tokens, time, ttft (time to first token, streaming only),
+        tokens_per_sec, stopped_early, cached, plus ``core.metrics.CALL_METRICS``:
+        queue_wait (in-flight slot + rate limiter), ttfb and latency of the
+        final attempt (ttfb is the full response unless streaming), retries,
+        rate_limited (429s), prompt_tokens and completion_tokens.
+
+        At most ``max_concurrency`` calls are in flight per event loop. Each
+        attempt goes to the least-loaded healthy backend (a retry avoids the
+        one that just failed) and holds a slot of that backend's adaptive
+        concurrency limiter (ADAPTIVE_CONCURRENCY), released before any
+        retry backoff. While every backend is ejected an attempt waits for
+        the first to reopen instead of being sent.
+        ``seed`` only distinguishes repeated trials of one prompt in the
+        response cache; cache hits return the recorded tokens and latency.
+        With ``stream`` (default STREAM_RESPONSES), ``stop_when`` is fed each
+        text delta and cancels the request as soon as it returns True; such
+        truncated responses are not written to the response cache.
         """
-        # Rate limiting
-        elapsed = time.time() - self.last_request_time
-        if elapsed < API_DELAY_SECONDS:
-            time.sleep(API_DELAY_SECONDS - elapsed)
-        
+        stream = STREAM_RESPONSES if stream is None else stream
+        cache_key = None
+        if self.cache:
+            cache_key = self.cache.make_key(self.provider, self.model_name, prompt, temperature, MAX_TOKENS, seed)
+            if self.cache.reads:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    with self._lock:
+                        self.cache_hits += 1
+                    text, tokens, time_taken = cached
+                    return self._result(text, tokens, time_taken, cached=True)
+
+        clients, semaphore = self._async_state()
         start_time = time.time()
-        
-        for attempt in range(MAX_RETRIES):
-            try: 
-                self.last_request_time = time.time()
-                
-                if self.provider == "groq":
-                    response = self.client.chat.completions.create(
-                        model=self.model_name,
-                        messages=[{"role": "user", "content": prompt}],
-                        temperature=temperature,
-                        max_tokens=MAX_TOKENS,
-                    )
-                    text = response.choices[0].message.content if response.choices else ""
-                    tokens = response.usage.total_tokens if response.usage else 0
-                
-                elif self.provider == "ollama":
-                    # Ollama uses the same OpenAI-compatible interface
-                    response = self.client.chat.completions.create(
+        # ~4 characters per prompt token plus the completion size seen so far
+        reserved = len(prompt) // 4 + int(self._expected_completion_tokens)
+        rate_limited = 0
+
+        async with semaphore:
+            queue_wait = time.time() - start_time
+            failed_backend = None
+            for attempt in range(MAX_RETRIES):
+                try:
+                    backend, probe = self.backends.pick(reserved, avoid=failed_backend)
+                except BackendUnavailable as e:
+                    if attempt == MAX_RETRIES - 1:
+                        raise Exception(f"Failed after {MAX_RETRIES} attempts ({self.provider}): {e}") from e
+                    print(f"🔌 {e}")
+                    await asyncio.sleep(e.retry_after)
+                    continue
+                limiter = backend.concurrency_limiter
+                request_start = None
+                try:
+                    queue_wait += await backend.rate_limiter.aacquire(reserved)
+                    if limiter:
+                        queue_wait += await limiter.acquire()
+                    request_start = time.time()
+                    # Groq, Ollama and the mock share the OpenAI-compatible interface
+                    raw = await clients[backend.name].chat.completions.with_raw_response.create(
                         model=self.model_name,
                         messages=[{"role": "user", "content": prompt}],
                         temperature=temperature,
                         max_tokens=MAX_TOKENS,
+                        **self._stream_kwargs(stream),
                     )
-                    text = response.choices[0].message.content if response.choices else ""
-                    tokens = response.usage.total_tokens if response.usage else 0
+                    ttfb = time.time() - request_start
+                    await backend.rate_limiter.aupdate_from_headers(raw.headers)
+                    if stream:
+                        text, chunks, usage, ttft, decode_time, stopped_early = await self._consume_stream(
+                            raw.parse(), request_start, stop_when
+                        )
+                    else:
+                        response = raw.parse()
+                        text = response.choices[0].message.content if response.choices else ""
+                        chunks, usage, ttft, decode_time, stopped_early = 0, response.usage, None, None, False
+                except BaseException as e:
+                    is_rate_limit = self._is_rate_limit(e)
+                    if request_start is not None and limiter:
+                        limiter.release(self._outcome(e))
+                    # Cancelled while queued: no verdict on the backend
+                    self.backends.finish(backend, probe,
+                                         failed=request_start is not None and self._is_backend_failure(e),
+                                         rate_limited=is_rate_limit, counts=False)
+                    if not isinstance(e, Exception):
+                        raise
+                    await backend.rate_limiter.areconcile(reserved, 0)
+                    rate_limited += is_rate_limit
+                    failed_backend = backend
+                    await asyncio.sleep(await self._retry_delay(e, attempt, backend))
+                    continue
 
-                self.total_requests += 1
-                self.total_tokens += tokens
-                time_taken = time.time() - start_time
-                
-                return text, tokens, time_taken
-                
-            except Exception as e:
-                error_str = str(e).lower()
-                if "insufficient_quota" in error_str or "check your plan and billing" in error_str:
-                    print(f"\n❌ Permanent Quota Error ({self.provider}): Your OpenAI account balance is likely $0. Please add credits at https://platform.openai.com/settings/organization/billing")
-                    raise e
-                
-                if "429" in error_str or "resource_exhausted" in error_str or "quota" in error_str:
-                    wait_time = 15 * (attempt + 1)
-                    print(f"⏳ Rate limited ({self.provider}). Waiting {wait_time}s...")
-                    time.sleep(wait_time)
-                elif attempt < MAX_RETRIES - 1:
-                    time.sleep(2 ** attempt)
+                if usage:
+                    tokens, completion = usage.total_tokens, usage.completion_tokens
+                    prompt_tokens = usage.prompt_tokens
+                elif stream:
+                    # Cancelled streams never report usage: count chunks (~1 token each)
+                    completion = chunks
+                    prompt_tokens = len(prompt) // 4
+                    tokens = prompt_tokens + chunks
                 else:
-                    raise Exception(f"Failed after {MAX_RETRIES} attempts ({self.provider}): {e}")
-        
-        return "", 0, 0.0
-    
+                    tokens = completion = prompt_tokens = 0
+                await backend.rate_limiter.areconcile(reserved, tokens)
+                latency = time.time() - request_start
+                if limiter:
+                    limiter.release(concurrency.OK, latency, completion)
+                self.backends.finish(backend, probe, tokens=tokens)
+
+                with self._lock:
+                    self.total_requests += 1
+                    self.total_tokens += tokens
+                    self.retries += attempt
+                    self.rate_limited += rate_limited
+                    self.prompt_tokens += prompt_tokens
+                    self.completion_tokens += completion
+                    self._latencies.append(latency)
+                    if stopped_early:
+                        self.early_stops += 1
+                    self._expected_completion_tokens = (
+                        0.8 * self._expected_completion_tokens + 0.2 * completion
+                    )
+                time_taken = time.time() - start_time
+                # A stream cut short by stop_when is not the full answer the cache key stands for
+                if cache_key and self.cache.writes and not stopped_early:
+                    self.cache.put(cache_key, self.provider, self.model_name, text, tokens, time_taken)
+
+                if decode_time is None:
+                    decode_time = time.time() - request_start
+                return self._result(
+                    text, tokens, time_taken,
+                    ttft=ttft,
+                    tokens_per_sec=round(completion / decode_time, 2) if decode_time > 0 else None,
+                    stopped_early=stopped_early,
+                    queue_wait=round(queue_wait, 3),
+                    ttfb=round(ttfb, 3),
+                    latency=round(latency, 3),
+                    retries=attempt,
+                    rate_limited=rate_limited,
+                    prompt_tokens=prompt_tokens,
+                    completion_tokens=completion,
+                )
+
+        return self._result("", 0, 0.0)
+
+    def _stream_kwargs(self, stream: bool) -> Dict[str, Any]:
+        if not stream:
+            return {}
+        if self.provider == "groq":
+            # Groq reports usage on the final chunk (x_groq.usage) by default
+            return {"stream": True}
+        return {"stream": True, "stream_options": {"include_usage": True}}
+
+    @staticmethod
+    async def _consume_stream(stream: Any, request_start: float,
+                              stop_when: Optional[Callable[[str], bool]]):
+        """Read a chunk stream; returns (text, chunks, usage, ttft, decode_time, stopped_early)."""
+        parts = []
+        usage = None
+        first_token_at = None
+        stopped_early = False
+        if hasattr(stop_when, "reset"):
+            stop_when.reset()  # stateful hooks start over on each retry
+        try:
+            async for chunk in stream:
+                usage = (getattr(chunk, "usage", None)
+                         or getattr(getattr(chunk, "x_groq", None), "usage", None)
+                         or usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.time()
+                parts.append(delta)
+                if stop_when and stop_when(delta):
+                    stopped_early = True
+                    break
+        finally:
+            if stopped_early:
+                await stream.close()
+
+        ttft = round(first_token_at - request_start, 3) if first_token_at else None
+        decode_time = time.time() - first_token_at if first_token_at else None
+        return "".join(parts), len(parts), usage, ttft, decode_time, stopped_early
+
+    @staticmethod
+    def _result(text: str, tokens: int, time_taken: float, ttft: Optional[float] = None,
+                tokens_per_sec: Optional[float] = None, stopped_early: bool = False,
+                cached: bool = False, **metrics: Any) -> Dict[str, Any]:
+        result = {
+            "text": text,
+            "tokens": tokens,
+            "time": time_taken,
+            "ttft": ttft,
+            "tokens_per_sec": tokens_per_sec,
+            "stopped_early": stopped_early,
+            "cached": cached,
+        }
+        # Cache hits made no call, so their call metrics stay None
+        result.update({name: metrics.get(name) for name in CALL_METRICS})
+        return result
+
+    async def agenerate(self, prompt: str, temperature: float = TEMPERATURE,
+                        seed: Optional[int] = None) -> Tuple[str, int, float]:
+        """
+        Generate response and return (text, tokens_used, time_taken).
+        """
+        result = await self.agenerate_with_stats(prompt, temperature, seed)
+        return result["text"], result["tokens"], result["time"]
+
+    def generate_with_stats(self, prompt: str, temperature: float = TEMPERATURE,
+                            seed: Optional[int] = None, stream: Optional[bool] = None,
+                            stop_when: Optional[Callable[[str], bool]] = None) -> Dict[str, Any]:
+        """Blocking wrapper around ``agenerate_with_stats``."""
+        return run_sync(self.agenerate_with_stats(prompt, temperature, seed, stream, stop_when))
+
+    def generate(self, prompt: str, temperature: float = TEMPERATURE,
+                 seed: Optional[int] = None) -> Tuple[str, int, float]:
+        """
+        Generate response and return (text, tokens_used, time_taken).
+
+        Blocking wrapper around ``agenerate``; safe to call from many threads.
+        """
+        return run_sync(self.agenerate(prompt, temperature, seed))
+
     def get_stats(self) -> dict:
+        with self._lock:
+            latencies = list(self._latencies)
         return {
             "total_requests": self.total_requests,
             "total_tokens": self.total_tokens,
             "model": self.model_name,
-            "provider": self.provider
+            "provider": self.provider,
+            "max_concurrency": self.max_concurrency,
+            "pool": self.pool_key or self.provider,
+            "cache_hits": self.cache_hits,
+            "early_stops": self.early_stops,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "latency": percentiles(latencies),
+            "concurrency": (
+                self.backends.backends[0].concurrency_limiter.get_stats()
+                if len(self.backends) == 1 and self.backends.backends[0].concurrency_limiter else None
+            ),
+            "backends": self.backends.get_stats(),
+            "cache": self.cache.get_stats() if self.cache else None,
         }
 
 
 _client_instance: LLMClient | None = None
 
-def get_llm_client(provider: str | None = None, model_name: str | None = None) -> LLMClient:
+def get_llm_client(provider: str | None = None, model_name: str | None = None,
+                   dedicated_pool: bool = False) -> LLMClient:
     """Singleton-style accessor with optional override for provider/model.
 
     If overrides are supplied, a new client is created each call to avoid
@@ -119,7 +476,7 @@ def get_llm_client(provider: str | None = None, model_name: str | None = None) -
     global _client_instance
 
     if provider or model_name:
-        return LLMClient(provider=provider, model_name=model_name)
+        return LLMClient(provider=provider, model_name=model_name, dedicated_pool=dedicated_pool)
 
     if _client_instance is None:
         _client_instance = LLMClient()
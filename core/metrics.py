@@ -0,0 +1,70 @@
+"""
+Per-call latency and token metrics.
+
+Every LLM call reports the fields in ``CALL_METRICS``; they are stored as
+trial columns and summarized as p50/p90/p99 per condition and per model
+(the latter from bucketed histograms, see ``storage.fetch_model_percentiles``).
+"""
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Stored per trial (seconds, counts and token counts)
+CALL_METRICS = (
+    "queue_wait",         # waiting for an in-flight slot and the rate limiter
+    "ttfb",               # request sent -> response headers, final attempt
+    "latency",            # request sent -> response complete, final attempt
+    "retries",            # attempts after the first
+    "rate_limited",       # 429 responses seen
+    "prompt_tokens",
+    "completion_tokens",
+)
+
+# Summarized metrics: the call metrics plus end-to-end time and time to first token
+SUMMARY_METRICS = ("time", "ttft") + CALL_METRICS
+
+PERCENTILES = (50, 90, 99)
+
+
+def percentiles(values: Iterable[Optional[float]], qs: Sequence[int] = PERCENTILES) -> Optional[Dict[str, float]]:
+    """{'p50': ..., 'p90': ..., 'p99': ...} over the non-null values (None if there are none)."""
+    data = np.array([v for v in values if v is not None], dtype=float)
+    if not data.size:
+        return None
+    return {f"p{q}": round(float(v), 3) for q, v in zip(qs, np.percentile(data, qs))}
+
+
+def histogram_percentiles(buckets: Sequence[Tuple[float, int]],
+                          qs: Sequence[int] = PERCENTILES) -> Optional[Dict[str, float]]:
+    """
+    ``percentiles`` over (value, count) buckets sorted by value: numpy's
+    linear interpolation on the expanded values, without expanding them.
+    """
+    total = sum(n for _, n in buckets)
+    if not total:
+        return None
+    values = [v for v, _ in buckets]
+    # Bucket i holds the sorted positions [ends[i-1], ends[i])
+    ends = np.cumsum([n for _, n in buckets])
+    out = {}
+    for q in qs:
+        pos = q / 100 * (total - 1)
+        lo = int(np.floor(pos))
+        low = values[int(np.searchsorted(ends, lo, side="right"))]
+        high = values[int(np.searchsorted(ends, min(lo + 1, total - 1), side="right"))]
+        out[f"p{q}"] = round(float(low + (high - low) * (pos - lo)), 3)
+    return out
+
+
+def summarize(rows: Sequence[Mapping], metrics: Sequence[str] = SUMMARY_METRICS) -> Dict[str, Optional[Dict[str, float]]]:
+    """Percentiles of each metric over trial results or rows."""
+    return {metric: percentiles(row.get(metric) for row in rows) for metric in metrics}
+
+
+def summarize_groups(rows: Iterable[Mapping], keys: Sequence[str],
+                     metrics: Sequence[str] = SUMMARY_METRICS) -> Dict[tuple, Dict]:
+    """``summarize`` per distinct value of ``keys``."""
+    groups: Dict[tuple, List[Mapping]] = {}
+    for row in rows:
+        groups.setdefault(tuple(row[k] for k in keys), []).append(row)
+    return {key: summarize(group, metrics) for key, group in groups.items()}
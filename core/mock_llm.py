@@ -0,0 +1,353 @@
+"""
+Offline mock provider.
+
+``MockClient`` and ``MockAsyncClient`` stand in for the Groq/OpenAI SDK
+clients (``chat.completions.create`` and ``.with_raw_response.create``,
+plain or streamed), so ``LLMClient`` and everything above it run unchanged
+without network access. Models:
+
+    synthetic   solve the equations found in the prompt; the answer is right
+                with probability MOCK_ACCURACY, otherwise one value is off
+    recorded    replay stored responses of any model for the same prompt
+    <name>      replay that model's stored responses
+
+Prompts without a recording fall back to a synthetic answer. Recordings are
+read from MOCK_DB_PATH (any schema version) and matched by regenerating the
+prompt of each stored trial.
+
+Latency, time to first token and synthetic completion length are drawn from
+the MOCK_* distributions, and 500s / 429s are injected at MOCK_ERROR_RATE /
+MOCK_RATE_LIMIT_RATE. Every draw comes from an RNG seeded by (MOCK_SEED,
+model, prompt, call number for that prompt), so a run is reproducible.
+"""
+import asyncio
+import hashlib
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from core import storage
+from data.equations import get_equations
+from data.linear_system import compile_equations
+from prompts.templates import get_det_prompt, get_linear_prompt
+from config.settings import (
+    MOCK_ACCURACY,
+    MOCK_COMPLETION_TOKENS,
+    MOCK_DB_PATH,
+    MOCK_ERROR_RATE,
+    MOCK_LATENCY,
+    MOCK_RATE_LIMIT_RATE,
+    MOCK_RETRY_AFTER,
+    MOCK_SEED,
+    MOCK_TIME_SCALE,
+    MOCK_TTFT,
+)
+
+# A prompt line that is a whole equation: '2x + 3y - z = 1' (right-hand side may be 'p/q')
+_EQUATION = re.compile(r'^\s*[-+]?\s*\d*(?:/\d+)?\s*[A-Za-z]\w*(?:\s*[-+]\s*\d*(?:/\d+)?\s*[A-Za-z]\w*)*'
+                       r'\s*=\s*-?\d+(?:/\d+)?\s*$')
+
+# Characters per streamed chunk (~1 token, like the real providers)
+_CHUNK_CHARS = 4
+# Streams sleep once this much pacing delay has accumulated, not per chunk
+_MIN_SLEEP = 0.005
+
+_FILLER = (
+    "Substitute the values found so far and simplify.",
+    "Collect like terms on the left-hand side.",
+    "Divide both sides by the leading coefficient.",
+    "Check the arithmetic before moving on.",
+)
+
+
+def parse_distribution(spec: str) -> Callable[[random.Random], float]:
+    """Sampler for 'fixed:S', 'uniform:LO,HI', 'lognormal:MEDIAN,SIGMA' or 'exp:MEAN'."""
+    kind, _, args = spec.strip().partition(":")
+    try:
+        params = [float(a) for a in args.split(",")] if args else []
+    except ValueError:
+        params = []
+    if kind == "fixed" and len(params) == 1:
+        return lambda rng: params[0]
+    if kind == "uniform" and len(params) == 2:
+        return lambda rng: rng.uniform(params[0], params[1])
+    if kind == "lognormal" and len(params) == 2 and params[0] > 0:
+        return lambda rng: rng.lognormvariate(math.log(params[0]), params[1])
+    if kind == "exp" and len(params) == 1:
+        return lambda rng: rng.expovariate(1.0 / params[0]) if params[0] > 0 else 0.0
+    raise ValueError(
+        f"Unknown distribution {spec!r}; expected fixed:S, uniform:LO,HI, lognormal:MEDIAN,SIGMA or exp:MEAN"
+    )
+
+
+class MockAPIError(Exception):
+    """Injected HTTP error, shaped like the SDK errors (``status_code``, ``response.headers``)."""
+
+    def __init__(self, status_code: int, headers: Optional[Dict[str, str]] = None):
+        reason = "Rate limit reached" if status_code == 429 else "Internal server error"
+        super().__init__(f"Error code: {status_code} - {reason} (mock)")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+class _Plan(NamedTuple):
+    """One mocked call: what to answer and how long to take (already time-scaled)."""
+    text: str
+    prompt_tokens: int
+    completion_tokens: int
+    ttft: float
+    latency: float
+    status: Optional[int]
+
+
+class MockBackend:
+    """
+    Draws call plans for one mock model; shared by every client of that model.
+
+    Options default to the MOCK_* settings; ``playback`` defaults to True
+    for every model except ``synthetic``.
+    """
+
+    def __init__(self, model: str, db_path: str = MOCK_DB_PATH, seed: int = MOCK_SEED,
+                 latency: str = MOCK_LATENCY, ttft: str = MOCK_TTFT,
+                 completion_tokens: str = MOCK_COMPLETION_TOKENS, accuracy: float = MOCK_ACCURACY,
+                 error_rate: float = MOCK_ERROR_RATE, rate_limit_rate: float = MOCK_RATE_LIMIT_RATE,
+                 time_scale: float = MOCK_TIME_SCALE, playback: Optional[bool] = None):
+        self.model = model
+        self.db_path = db_path
+        self.seed = seed
+        self.latency = parse_distribution(latency)
+        self.ttft = parse_distribution(ttft)
+        self.completion_tokens = parse_distribution(completion_tokens)
+        self.accuracy = accuracy
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.time_scale = time_scale
+        self.playback = model != "synthetic" if playback is None else playback
+        self._calls: Counter = Counter()
+        self._recordings: Optional[Dict[str, List[str]]] = None
+        self._lock = threading.Lock()
+
+    def recordings(self) -> Dict[str, List[str]]:
+        """Stored responses by prompt (loaded once; empty for the synthetic model)."""
+        with self._lock:
+            if self._recordings is None:
+                self._recordings = self._load_recordings() if self.playback else {}
+            return self._recordings
+
+    def _load_recordings(self) -> Dict[str, List[str]]:
+        model = None if self.model == "recorded" else self.model
+        by_prompt: Dict[str, List[str]] = {}
+        for row in storage.fetch_recorded_responses(model, self.db_path):
+            system = get_equations(row["size"], row["problem_seed"])
+            build = get_det_prompt if storage.method_family(row["method"]) == "det" else get_linear_prompt
+            by_prompt.setdefault(build(system["equations"], system["variables"]), []).append(row["response"])
+        return by_prompt
+
+    def plan(self, prompt: str) -> _Plan:
+        recorded = self.recordings().get(prompt)
+        with self._lock:
+            call = self._calls[prompt]
+            self._calls[prompt] += 1
+        digest = hashlib.sha256(f"{self.seed}\0{self.model}\0{prompt}\0{call}".encode("utf-8")).digest()
+        rng = random.Random(int.from_bytes(digest[:8], "big"))
+
+        latency = max(0.0, self.latency(rng))
+        ttft = min(max(0.0, self.ttft(rng)), latency)
+        roll = rng.random()
+        status = None
+        if roll < self.rate_limit_rate:
+            status = 429
+        elif roll < self.rate_limit_rate + self.error_rate:
+            status = 500
+
+        if recorded:
+            text = recorded[call % len(recorded)]
+        else:
+            text = synthetic_response(prompt, rng, max(1, int(self.completion_tokens(rng))), self.accuracy)
+        return _Plan(
+            text=text,
+            prompt_tokens=len(prompt) // 4,
+            completion_tokens=max(1, len(text) // 4),
+            ttft=ttft * self.time_scale,
+            latency=latency * self.time_scale,
+            status=status,
+        )
+
+    def raise_for_status(self, plan: _Plan) -> None:
+        if plan.status == 429:
+            retry_after = float(MOCK_RETRY_AFTER) * self.time_scale
+            raise MockAPIError(429, {"retry-after": f"{retry_after:g}"})
+        if plan.status:
+            raise MockAPIError(plan.status)
+
+
+_backends: Dict[str, MockBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_mock_backend(model: str) -> MockBackend:
+    with _backends_lock:
+        if model not in _backends:
+            _backends[model] = MockBackend(model)
+        return _backends[model]
+
+
+def configure_mock_backend(model: str, **options: Any) -> MockBackend:
+    """Replace the backend behind a mock model name (``MockBackend`` options override the settings)."""
+    backend = MockBackend(model, **options)
+    with _backends_lock:
+        _backends[model] = backend
+    return backend
+
+
+def _format_value(value: float) -> str:
+    if abs(value - round(value)) < 1e-9:
+        return str(int(round(value)))
+    return f"{value:.4f}"
+
+
+def synthetic_response(prompt: str, rng: random.Random, target_tokens: int,
+                       accuracy: float = MOCK_ACCURACY) -> str:
+    """
+    A worked solution of roughly ``target_tokens`` tokens ending in a
+    'var = value' block, right with probability ``accuracy``.
+    """
+    equations = [line.strip() for line in prompt.splitlines() if _EQUATION.match(line)]
+    if not equations:
+        return "I could not find a system of equations to solve."
+    system = compile_equations(equations)
+    values = [float(v) for v in np.linalg.lstsq(system.A, system.b, rcond=None)[0]]
+    if values and rng.random() >= accuracy:
+        values[rng.randrange(len(values))] += rng.choice((-1, 1)) * rng.randint(1, 5)
+    solution = [(var, _format_value(value)) for var, value in zip(system.variables, values)]
+
+    tree = "TREE DECOMPOSITION" in prompt
+    lines = []
+    for k, equation in enumerate(equations, 1):
+        lines.append(f"{'Branch' if tree else 'Step'} {k}: use equation {k}, {equation}")
+        if tree:
+            known = solution[:min(k, len(solution))]
+            lines.append("Current known: " + ", ".join(f"{var}={value}" for var, value in known))
+    step = len(equations)
+    while sum(len(line) + 1 for line in lines) < target_tokens * 4:
+        step += 1
+        lines.append(f"{'Branch' if tree else 'Step'} {step}: {_FILLER[step % len(_FILLER)]}")
+    lines.append("VERIFY: substitute into equation 1" if tree else "Verification: substituting back checks out.")
+    lines.append("")
+    lines.append("Final answer:")
+    lines.extend(f"{var} = {value}" for var, value in solution)
+    return "\n".join(lines)
+
+
+def _prompt(messages: List[Dict[str, Any]]) -> str:
+    return "\n".join(str(m.get("content", "")) for m in messages if m.get("role") == "user")
+
+
+def _completion(model: str, plan: _Plan) -> SimpleNamespace:
+    return SimpleNamespace(
+        model=model,
+        choices=[SimpleNamespace(index=0, message=SimpleNamespace(role="assistant", content=plan.text),
+                                 finish_reason="stop")],
+        usage=_usage(plan),
+    )
+
+
+def _usage(plan: _Plan) -> SimpleNamespace:
+    return SimpleNamespace(prompt_tokens=plan.prompt_tokens, completion_tokens=plan.completion_tokens,
+                           total_tokens=plan.prompt_tokens + plan.completion_tokens)
+
+
+class _MockStream:
+    """Async chunk stream paced evenly over (latency - ttft), ending with a usage chunk."""
+
+    def __init__(self, plan: _Plan):
+        self.plan = plan
+        self._closed = False
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        text = self.plan.text
+        pieces = [text[i:i + _CHUNK_CHARS] for i in range(0, len(text), _CHUNK_CHARS)]
+        delay = (self.plan.latency - self.plan.ttft) / max(1, len(pieces))
+        pending = 0.0
+        for piece in pieces:
+            if self._closed:
+                return
+            pending += delay
+            if pending >= _MIN_SLEEP:
+                await asyncio.sleep(pending)
+                pending = 0.0
+            yield SimpleNamespace(choices=[SimpleNamespace(index=0, delta=SimpleNamespace(content=piece))],
+                                  usage=None)
+        if pending:
+            await asyncio.sleep(pending)
+        yield SimpleNamespace(choices=[], usage=_usage(self.plan))
+
+    async def close(self) -> None:
+        self._closed = True
+
+
+class _RawResponse:
+    def __init__(self, headers: Dict[str, str], parsed: Any):
+        self.headers = headers
+        self._parsed = parsed
+
+    def parse(self) -> Any:
+        return self._parsed
+
+
+class _AsyncCompletions:
+    def __init__(self, backend: MockBackend):
+        self.backend = backend
+        self.with_raw_response = SimpleNamespace(create=self._create_raw)
+
+    async def create(self, model: str, messages: List[Dict[str, Any]], stream: bool = False, **_: Any) -> Any:
+        return (await self._create_raw(model, messages, stream)).parse()
+
+    async def _create_raw(self, model: str, messages: List[Dict[str, Any]], stream: bool = False,
+                          **_: Any) -> _RawResponse:
+        plan = self.backend.plan(_prompt(messages))
+        await asyncio.sleep(plan.ttft)
+        self.backend.raise_for_status(plan)
+        headers = {"x-mock-model": model}
+        if stream:
+            return _RawResponse(headers, _MockStream(plan))
+        await asyncio.sleep(plan.latency - plan.ttft)
+        return _RawResponse(headers, _completion(model, plan))
+
+
+class _Completions:
+    def __init__(self, backend: MockBackend):
+        self.backend = backend
+
+    def create(self, model: str, messages: List[Dict[str, Any]], **_: Any) -> SimpleNamespace:
+        """Blocking, non-streamed completion (``stream`` is ignored)."""
+        plan = self.backend.plan(_prompt(messages))
+        time.sleep(plan.ttft)
+        self.backend.raise_for_status(plan)
+        time.sleep(plan.latency - plan.ttft)
+        return _completion(model, plan)
+
+
+class MockClient:
+    """Sync stand-in for ``Groq`` / ``OpenAI``."""
+
+    def __init__(self, model: str):
+        self.chat = SimpleNamespace(completions=_Completions(get_mock_backend(model)))
+
+
+class MockAsyncClient:
+    """Async stand-in for ``AsyncGroq`` / ``AsyncOpenAI``."""
+
+    def __init__(self, model: str):
+        self.chat = SimpleNamespace(completions=_AsyncCompletions(get_mock_backend(model)))
@@ -0,0 +1,320 @@
+"""
+Token-bucket rate limiting for LLM providers.
+
+One limiter per provider/model tracks a requests-per-minute and a
+tokens-per-minute bucket. Callers *reserve* capacity and are told how long to
+wait, so concurrent callers are spaced out instead of all retrying at once.
+State lives in memory (thread-safe) or in a small SQLite file when several
+processes share the same provider quota; the ``a*`` methods used on the client
+event loop run SQLite updates in a worker thread.
+"""
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from config.settings import RATE_LIMIT_RPM, RATE_LIMIT_TPM, RATE_LIMIT_STATE_PATH
+
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse provider reset strings like '6.2s', '1m30s', '250ms' or '12' into seconds."""
+    if value is None:
+        return None
+    value = str(value).strip().lower()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(num) * _DURATION_UNITS[unit] for num, unit in parts)
+
+
+def _header(headers: Mapping[str, str], name: str) -> Optional[str]:
+    try:
+        return headers.get(name)
+    except AttributeError:
+        return None
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Server-requested wait from retry-after / retry-after-ms, if present."""
+    if not headers:
+        return None
+    retry_ms = _header(headers, "retry-after-ms")
+    if retry_ms is not None:
+        seconds = parse_duration(retry_ms)
+        return seconds / 1000.0 if seconds is not None else None
+    return parse_duration(_header(headers, "retry-after"))
+
+
+class _MemoryState:
+    """Bucket state guarded by a thread lock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state: Dict[str, Any] = {}
+
+    def update(self, fn: Callable[[Dict[str, Any]], Any]) -> Any:
+        with self._lock:
+            return fn(self._state)
+
+    async def aupdate(self, fn: Callable[[Dict[str, Any]], Any]) -> Any:
+        # Only a lock around arithmetic: cheaper inline than a thread hop
+        return self.update(fn)
+
+    def peek(self, fn: Callable[[Dict[str, Any]], Any]) -> Any:
+        return self.update(fn)
+
+
+class _SQLiteState:
+    """
+    Bucket state shared across processes through a SQLite row per key.
+
+    One connection per key is reused (serialized by the lock); ``peek``
+    answers from this process's last view of the row without any I/O.
+    """
+
+    def __init__(self, path: str, key: str):
+        self.path = path
+        self.key = key
+        self._lock = threading.Lock()
+        self._snapshot: Dict[str, Any] = {}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, state_json TEXT NOT NULL)"
+        )
+
+    def update(self, fn: Callable[[Dict[str, Any]], Any]) -> Any:
+        with self._lock:
+            conn = self._conn
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute("SELECT state_json FROM rate_limits WHERE key = ?", (self.key,)).fetchone()
+                state = json.loads(row[0]) if row else {}
+                result = fn(state)
+                conn.execute(
+                    "INSERT INTO rate_limits (key, state_json) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET state_json = excluded.state_json",
+                    (self.key, json.dumps(state)),
+                )
+                conn.execute("COMMIT")
+                self._snapshot = state
+                return result
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+
+    async def aupdate(self, fn: Callable[[Dict[str, Any]], Any]) -> Any:
+        # BEGIN IMMEDIATE can wait up to the busy timeout on another process
+        return await asyncio.to_thread(self.update, fn)
+
+    def peek(self, fn: Callable[[Dict[str, Any]], Any]) -> Any:
+        with self._lock:
+            return fn(dict(self._snapshot))
+
+
+class TokenBucketRateLimiter:
+    """
+    Requests-per-minute + tokens-per-minute token bucket.
+
+    A limit of 0 disables that bucket. Levels may go negative: a reservation
+    always succeeds and returns how long the caller has to wait for it.
+    """
+
+    def __init__(self, key: str, rpm: float = RATE_LIMIT_RPM, tpm: float = RATE_LIMIT_TPM,
+                 state_path: Optional[str] = RATE_LIMIT_STATE_PATH):
+        self.key = key
+        self.rpm = float(rpm or 0)
+        self.tpm = float(tpm or 0)
+        self._state = _SQLiteState(state_path, key) if state_path else _MemoryState()
+
+    # -- bucket arithmetic (called with the state lock held) ---------------
+
+    def _limits(self, state: Dict[str, Any]):
+        # Header-learned TPM only applies when none was configured
+        return self.rpm, self.tpm or state.get("learned_tpm", 0.0)
+
+    def _refill(self, state: Dict[str, Any], now: float) -> None:
+        rpm, tpm = self._limits(state)
+        last = state.get("updated", now)
+        elapsed = max(0.0, now - last)
+        state["req"] = min(rpm, state.get("req", rpm) + elapsed * rpm / 60.0)
+        state["tok"] = min(tpm, state.get("tok", tpm) + elapsed * tpm / 60.0)
+        state["updated"] = now
+
+    def _deficit_wait(self, state: Dict[str, Any]) -> float:
+        rpm, tpm = self._limits(state)
+        wait = 0.0
+        if rpm and state["req"] < 0:
+            wait = max(wait, -state["req"] / (rpm / 60.0))
+        if tpm and state["tok"] < 0:
+            wait = max(wait, -state["tok"] / (tpm / 60.0))
+        return wait
+
+    # -- public API ---------------------------------------------------------
+
+    # -- state updates (shared by the sync and async API) -------------------
+
+    def _reserve_fn(self, tokens: int) -> Callable[[Dict[str, Any]], float]:
+        def fn(state):
+            now = time.time()
+            self._refill(state, now)
+            rpm, tpm = self._limits(state)
+            if rpm:
+                state["req"] -= 1
+            if tpm:
+                state["tok"] -= min(tokens, tpm)
+            blocked = max(0.0, state.get("blocked_until", 0.0) - now)
+            return max(blocked, self._deficit_wait(state))
+        return fn
+
+    def _reconcile_fn(self, reserved_tokens: int, actual_tokens: int):
+        if actual_tokens == reserved_tokens:
+            return None
+
+        def fn(state):
+            self._refill(state, time.time())
+            if self._limits(state)[1]:
+                state["tok"] -= actual_tokens - reserved_tokens
+        return fn
+
+    def _penalize_fn(self, seconds: float):
+        def fn(state):
+            now = time.time()
+            self._refill(state, now)
+            state["blocked_until"] = max(state.get("blocked_until", 0.0), now + seconds)
+            state["req"] = min(state["req"], 0.0)
+            state["tok"] = min(state["tok"], 0.0)
+        return fn
+
+    def _headers_fn(self, headers: Optional[Mapping[str, str]]):
+        if not headers:
+            return None
+        remaining_req = _header(headers, "x-ratelimit-remaining-requests")
+        remaining_tok = _header(headers, "x-ratelimit-remaining-tokens")
+        limit_tok = _header(headers, "x-ratelimit-limit-tokens")
+        if remaining_req is None and remaining_tok is None and limit_tok is None:
+            return None
+
+        def fn(state):
+            now = time.time()
+            if limit_tok is not None and not self.tpm:
+                try:
+                    state["learned_tpm"] = float(limit_tok)
+                except ValueError:
+                    pass
+            self._refill(state, now)
+            for remaining, level, reset_name in (
+                (remaining_req, "req", "x-ratelimit-reset-requests"),
+                (remaining_tok, "tok", "x-ratelimit-reset-tokens"),
+            ):
+                if remaining is None:
+                    continue
+                try:
+                    remaining = float(remaining)
+                except ValueError:
+                    continue
+                state[level] = min(state[level], remaining)
+                if remaining <= 0:
+                    reset = parse_duration(_header(headers, reset_name))
+                    if reset:
+                        state["blocked_until"] = max(state.get("blocked_until", 0.0), now + reset)
+        return fn
+
+    # -- public API ---------------------------------------------------------
+
+    def reserve(self, tokens: int = 0) -> float:
+        """Claim one request and ``tokens`` tokens; return seconds to wait before sending."""
+        return self._state.update(self._reserve_fn(tokens))
+
+    def pending_wait(self, tokens: int = 0) -> float:
+        """
+        Seconds a ``reserve`` would wait right now, without claiming anything
+        (for routing). Never touches the DB: shared state is read as of this
+        process's last update.
+        """
+        def fn(state):
+            now = time.time()
+            self._refill(state, now)
+            rpm, tpm = self._limits(state)
+            probe = dict(state)
+            if rpm:
+                probe["req"] -= 1
+            if tpm:
+                probe["tok"] -= min(tokens, tpm)
+            blocked = max(0.0, state.get("blocked_until", 0.0) - now)
+            return max(blocked, self._deficit_wait(probe))
+        return self._state.peek(fn)
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Blocking reserve; returns the time spent waiting."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, tokens: int = 0) -> float:
+        """Async reserve; returns the time spent waiting."""
+        wait = await self._state.aupdate(self._reserve_fn(tokens))
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def reconcile(self, reserved_tokens: int, actual_tokens: int) -> None:
+        """Correct the token bucket once real usage is known."""
+        fn = self._reconcile_fn(reserved_tokens, actual_tokens)
+        if fn:
+            self._state.update(fn)
+
+    async def areconcile(self, reserved_tokens: int, actual_tokens: int) -> None:
+        fn = self._reconcile_fn(reserved_tokens, actual_tokens)
+        if fn:
+            await self._state.aupdate(fn)
+
+    def penalize(self, seconds: float) -> None:
+        """Block every caller for ``seconds`` and drain the buckets (after a 429)."""
+        self._state.update(self._penalize_fn(seconds))
+
+    async def apenalize(self, seconds: float) -> None:
+        await self._state.aupdate(self._penalize_fn(seconds))
+
+    def update_from_headers(self, headers: Optional[Mapping[str, str]]) -> None:
+        """Sync bucket levels with the provider's x-ratelimit-* response headers."""
+        fn = self._headers_fn(headers)
+        if fn:
+            self._state.update(fn)
+
+    async def aupdate_from_headers(self, headers: Optional[Mapping[str, str]]) -> None:
+        fn = self._headers_fn(headers)
+        if fn:
+            await self._state.aupdate(fn)
+
+_limiters: Dict[str, TokenBucketRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str, model: str, backend: Optional[str] = None) -> TokenBucketRateLimiter:
+    """
+    Process-wide limiter for a provider/model (state shared via
+    RATE_LIMIT_STATE_PATH if set); ``backend`` names one API key or
+    endpoint of a load-balanced pool, which has its own quota.
+    """
+    key = f"{provider}:{model}" if backend is None else f"{provider}:{model}@{backend}"
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = TokenBucketRateLimiter(key)
+        return _limiters[key]
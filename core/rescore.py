@@ -0,0 +1,69 @@
+"""
+Bulk re-scoring of stored trials.
+
+Streams ``trials.response`` out of SQLite in id-ordered chunks, scores each
+chunk across a process pool and writes the new score columns back with one
+batched UPDATE per chunk, so memory stays bounded by the chunk size.
+Ground-truth checks run in the parent, one NumPy call per system per chunk.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from core import storage
+from core.scorer import ResponseScorer, SCORER_VERSION
+from core.verifier import verify_results
+from data.equations import get_equations
+
+_scorer: Optional[ResponseScorer] = None
+
+
+def _score_row(row: Tuple[int, int, Optional[int], str]) -> Tuple[int, Dict]:
+    """Score one (id, size, problem_seed, response) row; runs inside the worker processes."""
+    global _scorer
+    if _scorer is None:
+        _scorer = ResponseScorer()
+    trial_id, size, problem_seed, response = row
+    variables = get_equations(size, problem_seed)["variables"]
+    return trial_id, _scorer.score(response, variables)
+
+
+def _verify_chunk(chunk: List[Tuple[int, int, Optional[int], str]],
+                  scored: List[Tuple[int, Dict]]) -> List[Tuple[int, Dict]]:
+    """Fill in correct/max_residual for a scored chunk, batched per equation system."""
+    verify_results([
+        (get_equations(size, problem_seed), result)
+        for (_, size, problem_seed, _), (_, result) in zip(chunk, scored)
+    ])
+    return scored
+
+
+def rescore_trials(
+    chunk_size: int = 2000,
+    workers: Optional[int] = None,
+    session_id: Optional[int] = None,
+    only_stale: bool = False,
+) -> Dict:
+    """Re-score stored trials with the current scorer; returns simple throughput stats."""
+    workers = workers or os.cpu_count() or 1
+    storage.init_db()
+
+    start = time.time()
+    total = 0
+    skip = SCORER_VERSION if only_stale else None
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk in storage.iter_trial_responses(chunk_size, session_id=session_id, skip_scorer_version=skip):
+            per_worker = max(1, len(chunk) // (workers * 4))
+            scored = list(pool.map(_score_row, chunk, chunksize=per_worker))
+            total += storage.update_trial_scores(_verify_chunk(chunk, scored))
+            print(f"   rescored {total} trials...", end="\r")
+
+    elapsed = time.time() - start
+    print(f"\n✅ Rescored {total} trials with scorer v{SCORER_VERSION} in {elapsed:.1f}s")
+    return {
+        "trials": total,
+        "seconds": round(elapsed, 2),
+        "trials_per_sec": round(total / elapsed, 1) if elapsed > 0 else 0,
+        "scorer_version": SCORER_VERSION,
+    }
@@ -0,0 +1,171 @@
+"""
+Content-addressed on-disk cache for LLM generations.
+
+Entries are keyed by a hash of (provider, model, prompt, temperature,
+max_tokens, seed) and stored in a small SQLite file with LRU eviction by
+total size and an optional TTL.
+
+Modes:
+    off           no caching
+    read_through  serve hits, call the API on a miss and record the result
+    record        always call the API, record every result
+    replay        serve hits only; a miss raises CacheMissError (offline runs)
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+from config.settings import (
+    RESPONSE_CACHE_MODE,
+    RESPONSE_CACHE_PATH,
+    RESPONSE_CACHE_MAX_MB,
+    RESPONSE_CACHE_TTL_SECONDS,
+)
+
+CACHE_MODES = ("off", "read_through", "record", "replay")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    provider TEXT,
+    model TEXT,
+    text TEXT NOT NULL,
+    tokens INTEGER,
+    time REAL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access);
+"""
+
+
+class CacheMissError(LookupError):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+class ResponseCache:
+    """SQLite-backed response cache (thread-safe, shareable between processes)."""
+
+    def __init__(self, path: str = RESPONSE_CACHE_PATH, mode: str = RESPONSE_CACHE_MODE,
+                 max_bytes: int = int(RESPONSE_CACHE_MAX_MB * 1024 * 1024),
+                 ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unsupported cache mode: {mode} (expected one of {', '.join(CACHE_MODES)})")
+        self.path = path
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def reads(self) -> bool:
+        return self.mode in ("read_through", "replay")
+
+    @property
+    def writes(self) -> bool:
+        return self.mode in ("read_through", "record")
+
+    @staticmethod
+    def make_key(provider: str, model: str, prompt: str, temperature: float,
+                 max_tokens: int, seed: Optional[int] = None) -> str:
+        payload = json.dumps([provider, model, prompt, temperature, max_tokens, seed])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Tuple[str, int, float]]:
+        """Return (text, tokens, time) for a live entry, or None."""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT text, tokens, time, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            if row and self.ttl_seconds and row[3] + self.ttl_seconds < now:
+                with conn:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                if self.mode == "replay":
+                    raise CacheMissError(f"No cached response for key {key[:12]}… (replay mode)")
+                return None
+            with conn:
+                conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0], row[1] or 0, row[2] or 0.0
+
+    def put(self, key: str, provider: str, model: str, text: str, tokens: int, time_taken: float) -> None:
+        """Record a response and evict least-recently-used entries beyond the size cap."""
+        size = len(text.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses "
+                    "(key, provider, model, text, tokens, time, size, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, provider, model, text, tokens, time_taken, size, now, now),
+                )
+                self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        if not self.max_bytes:
+            return
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC"):
+            stale.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def get_stats(self) -> dict:
+        return {"mode": self.mode, "hits": self.hits, "misses": self.misses}
+
+
+_cache_mode = RESPONSE_CACHE_MODE
+_cache_instance: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def configure_response_cache(mode: str) -> None:
+    """Override RESPONSE_CACHE_MODE for clients created after this call (e.g. from the CLI)."""
+    global _cache_mode, _cache_instance
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Unsupported cache mode: {mode}")
+    with _cache_lock:
+        _cache_mode = mode
+        _cache_instance = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Process-wide cache, or None when caching is off."""
+    global _cache_instance
+    with _cache_lock:
+        if _cache_mode == "off":
+            return None
+        if _cache_instance is None:
+            _cache_instance = ResponseCache(mode=_cache_mode)
+        return _cache_instance
@@ -0,0 +1,80 @@
+"""
+Pipelined trial scheduler.
+
+Every trial of every condition goes into one work queue drained by a fixed
+pool of workers, so there is no barrier between conditions: a slow 7-variable
+trial only occupies one slot while the rest of the sweep keeps flowing.
+"""
+import asyncio
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from config.settings import MAX_CONCURRENT_TRIALS
+
+# (size, method, trial_num) with trial_num starting at 1
+TrialSpec = Tuple[int, str, int]
+
+
+class TrialScheduler:
+    """
+    Run trial specs under a global concurrency budget.
+
+    ``on_trial_done(spec, result)`` is awaited as each trial finishes and
+    ``on_condition_done(size, method, trials)`` as soon as the last trial of a
+    condition lands, with ``trials`` ordered by trial number. Both run on the
+    event loop that drives every in-flight request, so blocking work (scoring,
+    storage) belongs in a thread (``asyncio.to_thread``).
+    """
+
+    def __init__(
+        self,
+        run_trial: Callable[[TrialSpec], Awaitable[Dict]],
+        max_concurrency: int = MAX_CONCURRENT_TRIALS,
+        on_trial_done: Optional[Callable[[TrialSpec, Dict], Awaitable[None]]] = None,
+        on_condition_done: Optional[Callable[[int, str, List[Dict]], Awaitable[None]]] = None,
+    ):
+        self.run_trial = run_trial
+        self.max_concurrency = max(1, max_concurrency)
+        self.on_trial_done = on_trial_done
+        self.on_condition_done = on_condition_done
+
+    async def run(self, specs: List[TrialSpec]) -> Dict[Tuple[int, str], List[Dict]]:
+        """Execute all specs; returns trials per (size, method), ordered by trial."""
+        queue: asyncio.Queue = asyncio.Queue()
+        # Largest systems first: the slowest trials start earliest, shortening the tail
+        for spec in sorted(specs, key=lambda s: -s[0]):
+            queue.put_nowait(spec)
+
+        remaining = Counter((size, method) for size, method, _ in specs)
+        finished: Dict[Tuple[int, str], Dict[int, Dict]] = {key: {} for key in remaining}
+
+        async def worker() -> None:
+            while True:
+                try:
+                    spec = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                size, method, trial_num = spec
+                result = await self.run_trial(spec)
+                finished[(size, method)][trial_num] = result
+                if self.on_trial_done:
+                    await self.on_trial_done(spec, result)
+
+                remaining[(size, method)] -= 1
+                if remaining[(size, method)] == 0 and self.on_condition_done:
+                    await self.on_condition_done(size, method, self._ordered(finished[(size, method)]))
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.max_concurrency, len(specs)))]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+
+        return {key: self._ordered(trials) for key, trials in finished.items()}
+
+    @staticmethod
+    def _ordered(trials: Dict[int, Dict]) -> List[Dict]:
+        return [trials[n] for n in sorted(trials)]
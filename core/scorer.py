@@ -1,9 +1,190 @@
 """
 Enhanced scoring system for evaluating responses.
 Score = Completeness(50) + Consistency(30) + Reasoning(20)
+
+Given the equation system, ``correct`` additionally reports whether the
+extracted answer actually solves it (see ``core.verifier``).
 """
 import re
-from typing import Dict, List, Tuple
+from functools import lru_cache
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from core.verifier import get_verifier
+
+# Bump whenever scoring logic changes; stored with each trial score
+SCORER_VERSION = "3"
+
+_THINK_BLOCK = re.compile(r'<think>.*?</think>', re.DOTALL)
+
+# Value patterns in priority order; {var} is filled with an alternation over
+# every variable so each pattern scans the text once for all variables.
+_VALUE_PATTERNS = [
+    # LaTeX fractions: x = \frac{1}{2}
+    (r'(?P<var>{var})\s*[:=]\s*\\frac\{{\s*(-?\d+)\s*\}}\{{\s*(\d+)\s*\}}', True, '\\'),
+    # Plain fractions: x = 5/2
+    (r'\b(?P<var>{var})\s*[:=]\s*(-?\d+)/(\d+)\b', True, '/'),
+    # Standard assignments: x = 5, x : 5 (with lookahead to avoid cutting off fractions)
+    (r'\b(?P<var>{var})\s*[:=]\s*(-?\d+\.?\d*)\b(?!\s*/)', False, None),
+    # Text assignments: "x is 5", "x equals 5"
+    (r'\b(?P<var>{var})\s+(?:is|equals?)\s+(-?\d+\.?\d*)\b', False, None),
+    # Final numerical value catching (more flexible)
+    (r'(?P<var>{var})\s*=\s*(-?\d+\.?\d*)', False, '='),
+]
+
+
+class AssignmentExtractor:
+    """
+    Patterns compiled once per variable set.
+
+    The think-block split and LaTeX/bold cleanup happen once per response,
+    and each value pattern makes one pass over the text for all variables
+    (instead of one per variable), keeping the last match per variable.
+    """
+
+    def __init__(self, variables: Tuple[str, ...]):
+        self.variables = variables
+        self._canonical = {v.lower(): v for v in variables}
+        # Longest names first so e.g. x10 is not read as x1
+        names = "|".join(re.escape(v) for v in sorted(variables, key=len, reverse=True))
+        self._cleanup = re.compile(rf'\\\(\s*(?P<a>{names})\s*\\\)|\*\*(?P<b>{names})\*\*', re.IGNORECASE)
+        self._patterns = [
+            (re.compile(pattern.format(var=names), re.IGNORECASE | re.MULTILINE), is_fraction, required)
+            for pattern, is_fraction, required in _VALUE_PATTERNS
+        ]
+        self._equals = re.compile(rf'\b(?P<var>{names})\s*=\s*(-?\d+\.?\d*)', re.IGNORECASE)
+
+    def _clean(self, response: str) -> str:
+        """Unwrap \\(x\\) and **x** so assignments match plain patterns."""
+        return self._cleanup.sub(
+            lambda m: self._canonical[(m.group('a') or m.group('b')).lower()], response
+        )
+
+    def search_areas(self, response: str) -> List[str]:
+        """Prioritize content outside of <think> blocks, then fall back to the cleaned full text."""
+        areas = []
+        if _THINK_BLOCK.search(response):
+            main_content = _THINK_BLOCK.sub('', response)
+            if main_content.strip():
+                areas.append(main_content)
+        areas.append(self._clean(response))
+        return areas
+
+    def extract(self, response: str) -> Dict[str, float]:
+        """Return {variable: value} for every variable with a usable assignment."""
+        found: Dict[str, float] = {}
+        for area in self.search_areas(response):
+            for pattern, is_fraction, required in self._patterns:
+                if len(found) == len(self.variables):
+                    return self._ordered(found)
+                if required and required not in area:
+                    continue
+                last = {}
+                for match in pattern.finditer(area):
+                    last[self._canonical[match.group('var').lower()]] = match
+                for var, match in last.items():
+                    if var in found:
+                        continue
+                    value = self._value(match, is_fraction)
+                    if value is not None:
+                        found[var] = value
+        return self._ordered(found)
+
+    def equals_values(self, response: str) -> Dict[str, List[str]]:
+        """All raw ``var = number`` values per variable, in order of appearance."""
+        values: Dict[str, List[str]] = {}
+        for match in self._equals.finditer(response):
+            values.setdefault(self._canonical[match.group('var').lower()], []).append(match.group(2))
+        return values
+
+    def _ordered(self, found: Dict[str, float]) -> Dict[str, float]:
+        return {var: found[var] for var in self.variables if var in found}
+
+    @staticmethod
+    def _value(match: re.Match, is_fraction: bool) -> Optional[float]:
+        try:
+            if is_fraction:
+                return float(match.group(2)) / float(match.group(3))
+            return float(match.group(2))
+        except (ValueError, ZeroDivisionError):
+            return None
+
+
+@lru_cache(maxsize=128)
+def _get_extractor(variables: Tuple[str, ...]) -> AssignmentExtractor:
+    return AssignmentExtractor(variables)
+
+
+def get_extractor(variables: List[str]) -> AssignmentExtractor:
+    """Compiled extractor for a variable set (memoized)."""
+    return _get_extractor(tuple(variables))
+
+
+class StreamingStopHook:
+    """
+    Incremental stop condition for streamed generations.
+
+    Fed text deltas; only newly completed lines are examined, so total work
+    stays linear in the response length. Lines inside <think> blocks are
+    ignored. Conditions:
+        final_block    a run of consecutive "var = value" lines covers every variable
+        all_variables  every variable has been assigned on some line
+        never          never stop early
+    """
+
+    CONDITIONS = ("final_block", "all_variables", "never")
+
+    def __init__(self, variables: List[str], condition: str = "final_block"):
+        if condition not in self.CONDITIONS:
+            raise ValueError(f"Unsupported stop condition: {condition}")
+        self.variables = list(variables)
+        self.condition = condition
+        self._canonical = {v.lower(): v for v in variables}
+        names = "|".join(re.escape(v) for v in sorted(variables, key=len, reverse=True))
+        value = r'-?\d+(?:\.\d+)?(?:\s*/\s*\d+)?|\\frac\{-?\d+\}\{\d+\}'
+        self._assignment_line = re.compile(
+            rf'^\s*(?:[-*•]\s*)?(?:\*\*)?(?:\\\()?\s*(?P<var>{names})\s*(?:\\\))?(?:\*\*)?'
+            rf'\s*[:=]\s*(?:\*\*)?\s*(?:{value})\s*(?:\*\*)?\s*[.,;]?\s*$',
+            re.IGNORECASE,
+        )
+        self.reset()
+
+    def reset(self) -> None:
+        self._partial = ""
+        self._in_think = False
+        self._block: set = set()
+        self._seen: set = set()
+        self.done = False
+
+    def __call__(self, delta: str) -> bool:
+        if self.done or self.condition == "never":
+            return self.done
+        lines = (self._partial + delta).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            if self._feed_line(line):
+                self.done = True
+                break
+        return self.done
+
+    def _feed_line(self, line: str) -> bool:
+        if "<think>" in line:
+            self._in_think = True
+        if "</think>" in line:
+            self._in_think = False
+            return False
+        if self._in_think:
+            return False
+
+        match = self._assignment_line.match(line)
+        if not match:
+            if line.strip():
+                self._block = set()
+            return False
+        var = self._canonical[match.group('var').lower()]
+        self._seen.add(var)
+        self._block.add(var)
+        tracked = self._block if self.condition == "final_block" else self._seen
+        return len(tracked) == len(self.variables)
 
 
 class ResponseScorer:
@@ -19,9 +200,13 @@ class ResponseScorer:
             "result", "verify", "verification", "check", "node"
         ]
     
-    def score(self, response: str, variables: List[str], expected: Dict = None) -> Dict:
+    def score(self, response: str, variables: List[str], expected: Optional[Mapping] = None) -> Dict:
         """
         Score a response with improved extraction. 
+
+        ``expected`` is the equation system (a ``LinearSystem`` or a dict with
+        ``equations`` and ``variables``); without it ``correct`` and
+        ``max_residual`` are None.
         """
         # Extract variable assignments
         assignments = self._extract_assignments(response, variables)
@@ -33,6 +218,7 @@ class ResponseScorer:
         
         total = completeness + consistency + reasoning
         success = total >= 70
+        verdict = get_verifier(expected).verify(assignments) if expected else {}
         
         return {
             "total": total,
@@ -42,66 +228,15 @@ class ResponseScorer:
             "success": success,
             "variables_found": len(assignments),
             "variables_expected": len(variables),
-            "assignments":  assignments
+            "assignments":  assignments,
+            "correct": verdict.get("correct"),
+            "max_residual": verdict.get("max_residual"),
+            "scorer_version": SCORER_VERSION,
         }
     
     def _extract_assignments(self, response: str, variables:  List[str]) -> Dict[str, float]:
         """Enhanced variable extraction with multiple patterns."""
-        assignments = {}
-        
-        for var in variables:
-            value = self._find_variable_value(response, var)
-            if value is not None:
-                assignments[var] = value
-        
-        return assignments
-    
-    def _find_variable_value(self, response: str, var: str) -> float:
-        """Find value for a specific variable using multiple patterns."""
-        
-        # Clean response for extraction: handle LaTeX and common LLM bolding
-        # but keep a copy of the original for reasoning scoring
-        clean_text = response
-        clean_text = re.sub(rf'\\\(\s*{var}\s*\\\)', var, clean_text, flags=re.IGNORECASE)
-        clean_text = re.sub(rf'\*\*{var}\*\*', var, clean_text, flags=re.IGNORECASE)
-        
-        # Prioritize content outside of <think> blocks if they exist
-        search_areas = []
-        think_blocks = re.findall(r'<think>.*?</think>', response, flags=re.DOTALL)
-        if think_blocks:
-            main_content = re.sub(r'<think>.*?</think>', '', response, flags=re.DOTALL)
-            if main_content.strip():
-                search_areas.append(main_content)
-        
-        search_areas.append(clean_text) # Fallback to full text
-        
-        patterns = [
-            # LaTeX fractions: x = \frac{1}{2}
-            rf'{var}\s*[:=]\s*\\frac\{{\s*(-?\d+)\s*\}}\{{\s*(\d+)\s*\}}',
-            # Plain fractions: x = 5/2
-            rf'\b{var}\s*[:=]\s*(-?\d+)/(\d+)\b',
-            # Standard assignments: x = 5, x : 5 (with lookahead to avoid cutting off fractions)
-            rf'\b{var}\s*[:=]\s*(-?\d+\.?\d*)\b(?!\s*/)',
-            # Text assignments: "x is 5", "x equals 5"
-            rf'\b{var}\s+(?:is|equals?)\s+(-?\d+\.?\d*)\b',
-            # Final numerical value catching (more flexible)
-            rf'{var}\s*=\s*(-?\d+\.?\d*)',
-        ]
-        
-        for area in search_areas:
-            for i, pattern in enumerate(patterns):
-                matches = re.findall(pattern, area, re.IGNORECASE | re.MULTILINE)
-                if matches:
-                    try:
-                        if i in [0, 1]: # Fraction patterns (LaTeX or Plain)
-                            num, den = matches[-1]
-                            return float(num) / float(den)
-                        else:
-                            return float(matches[-1])
-                    except (ValueError, ZeroDivisionError, IndexError):
-                        continue
-        
-        return None
+        return get_extractor(variables).extract(response)
     
     def _extract_final_section(self, response: str) -> str:
         """Extract the final answer section."""
@@ -136,10 +271,10 @@ class ResponseScorer:
     def _score_consistency(self, response: str, assignments: Dict, variables: List[str]) -> float:
         """Score based on consistency."""
         score = 30
+        values_by_var = get_extractor(variables).equals_values(response)
         
         for var in variables: 
-            pattern = rf'\b{var}\s*=\s*(-?\d+\.?\d*)'
-            matches = re.findall(pattern, response, re. IGNORECASE)
+            matches = values_by_var.get(var, [])
             
             if len(matches) > 1:
                 values = set()
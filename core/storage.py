@@ -1,13 +1,42 @@
 """
 Lightweight SQLite storage for experiment and demo runs.
+
+Each thread keeps one persistent connection (WAL journal, synchronous=NORMAL).
+Trial inserts are queued to a background writer that commits them in
+batched transactions; call ``flush()`` when the rows must be visible (end of
+a condition, before reading back in the same process).
+
+Raw model responses live out of row in ``trial_responses``, compressed
+(zlib, or zstd when installed) with an optional shared dictionary, and are
+only read when a caller asks for them.
 """
+import atexit
 import json
 import os
+import queue
 import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
 from datetime import datetime
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from config.settings import RESULTS_DB_PATH, LLM_PROVIDER, MODEL_NAME
+from config.settings import (
+    RESULTS_DB_PATH,
+    LLM_PROVIDER,
+    MODEL_NAME,
+    DB_ASYNC_WRITES,
+    DB_WRITE_BATCH_SIZE,
+    DB_WRITE_FLUSH_INTERVAL,
+    RESPONSE_CODEC,
+)
+from core.metrics import CALL_METRICS, SUMMARY_METRICS, histogram_percentiles, summarize_groups
+
+try:
+    import zstandard
+except ImportError:  # optional; zlib is always available
+    zstandard = None
 
 
 SCHEMA = """
@@ -58,16 +87,256 @@ CREATE TABLE IF NOT EXISTS conditions (
     created_at TEXT DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY(session_id) REFERENCES sessions(id)
 );
+
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    name TEXT,
+    applied_at TEXT
+);
 """
 
 
+TRIAL_INSERT_SQL = """
+INSERT INTO trials (
+    session_id, size, method, trial, score, completeness, consistency,
+    reasoning, success, tokens, time, variables_found, assignments,
+    scorer_version, ttft, tokens_per_sec, stopped_early, method_family, problem_seed,
+    correct, max_residual, queue_wait, ttfb, latency, retries, rate_limited,
+    prompt_tokens, completion_tokens, created_at
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+RESPONSE_INSERT_SQL = """
+INSERT OR REPLACE INTO trial_responses (trial_id, codec, dict_id, raw_size, data)
+VALUES (?, ?, ?, ?, ?)
+"""
+
+# A queued trial: (trials row, compressed response or None)
+TrialWrite = Tuple[Tuple, Optional[Tuple[str, Optional[int], int, bytes]]]
+
+EVENT_INSERT_SQL = "INSERT INTO events (session_id, kind, payload_json, created_at) VALUES (?, ?, ?, ?)"
+
+# Items drained by the background writer: ("trial", TrialWrite) or ("event", events row)
+QueuedWrite = Tuple[str, Any]
+
+_local = threading.local()
+
+
 def _connect() -> sqlite3.Connection:
-    os.makedirs(os.path.dirname(RESULTS_DB_PATH), exist_ok=True)
-    conn = sqlite3.connect(RESULTS_DB_PATH)
+    """Persistent connection for the calling thread (re-opened after a fork or ``use_database``)."""
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.pid != os.getpid() or _local.path != RESULTS_DB_PATH:
+        os.makedirs(os.path.dirname(RESULTS_DB_PATH) or ".", exist_ok=True)
+        conn = sqlite3.connect(RESULTS_DB_PATH, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL: durable at checkpoints, no fsync per commit
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _local.conn = conn
+        _local.pid = os.getpid()
+        _local.path = RESULTS_DB_PATH
+    return conn
+
+
+def _connect_readonly(path: Optional[str] = None) -> Optional[sqlite3.Connection]:
+    """
+    Read-only connection to a results DB (default: the current one), or None
+    if the file does not exist. Never creates, migrates or converts the file.
+    """
+    path = path or RESULTS_DB_PATH
+    if not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=30)
     conn.row_factory = sqlite3.Row
     return conn
 
 
+def _has_table(name: str) -> bool:
+    conn = _connect_readonly()
+    if conn is None:
+        return False
+    try:
+        return conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        ).fetchone() is not None
+    finally:
+        conn.close()
+
+
+def use_database(path: str) -> str:
+    """
+    Point this process at another results database (benchmarks, scratch
+    runs) and return the previous path. Queued writes are committed to the
+    old one first; every thread reconnects on its next call.
+    """
+    global RESULTS_DB_PATH
+    flush()
+    previous, RESULTS_DB_PATH = RESULTS_DB_PATH, path
+    # Dictionary ids are only meaningful within one database
+    with _dictionary_lock:
+        _dictionaries.clear()
+        _active_dictionary_ids.clear()
+    return previous
+
+
+class _TrialWriter:
+    """Background thread that drains queued trial and event rows in grouped transactions."""
+
+    def __init__(self, batch_size: int = DB_WRITE_BATCH_SIZE,
+                 flush_interval: float = DB_WRITE_FLUSH_INTERVAL):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._error: Optional[BaseException] = None
+
+    def submit(self, row: QueuedWrite) -> None:
+        self._raise_pending()
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._run, name="trial-writer", daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+        self._queue.put(row)
+
+    def flush(self) -> None:
+        """Block until every row submitted so far is committed."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+        self._raise_pending()
+
+    def _raise_pending(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError(f"Background trial writer failed: {error}") from error
+
+    def _next_batch(self) -> Tuple[List[QueuedWrite], List[threading.Event]]:
+        rows: List[QueuedWrite] = []
+        barriers: List[threading.Event] = []
+        item = self._queue.get()
+        while True:
+            if isinstance(item, threading.Event):
+                # A flush only waits for rows queued before it
+                barriers.append(item)
+                return rows, barriers
+            rows.append(item)
+            if len(rows) >= self.batch_size:
+                return rows, barriers
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                return rows, barriers
+
+    def _run(self) -> None:
+        while True:
+            rows, barriers = self._next_batch()
+            if rows:
+                try:
+                    conn = _connect()
+                    with conn:
+                        _write_batch(conn, rows)
+                except Exception as e:
+                    self._error = e
+            for barrier in barriers:
+                barrier.set()
+
+
+_writer = _TrialWriter()
+atexit.register(lambda: _writer.flush())
+
+
+def flush() -> None:
+    """Commit all queued trial inserts."""
+    _writer.flush()
+
+
+def _write_batch(conn: sqlite3.Connection, items: List[QueuedWrite]) -> None:
+    trials = [payload for kind, payload in items if kind == "trial"]
+    events = [payload for kind, payload in items if kind == "event"]
+    if trials:
+        _write_trials(conn, trials)
+    if events:
+        conn.executemany(EVENT_INSERT_SQL, events)
+
+
+def _write_trials(conn: sqlite3.Connection, items: Iterable[TrialWrite]) -> None:
+    for row, blob in items:
+        cur = conn.execute(TRIAL_INSERT_SQL, row)
+        if blob is not None:
+            conn.execute(RESPONSE_INSERT_SQL, (cur.lastrowid, *blob))
+    _bump_data_version(conn)
+
+
+# -- Compressed responses ------------------------------------------------------
+
+_dictionaries: Dict[int, bytes] = {}
+_active_dictionary_ids: Dict[str, Optional[int]] = {}
+_dictionary_lock = threading.Lock()
+
+
+def _response_codec() -> str:
+    return "zstd" if RESPONSE_CODEC == "zstd" and zstandard is not None else "zlib"
+
+
+def _dictionary(conn: sqlite3.Connection, dict_id: Optional[int]) -> Optional[bytes]:
+    if dict_id is None:
+        return None
+    with _dictionary_lock:
+        if dict_id not in _dictionaries:
+            row = conn.execute("SELECT data FROM response_dicts WHERE id = ?", (dict_id,)).fetchone()
+            _dictionaries[dict_id] = bytes(row["data"])
+        return _dictionaries[dict_id]
+
+
+def _active_dictionary_id(conn: sqlite3.Connection, codec: str) -> Optional[int]:
+    """Newest trained dictionary for a codec (looked up once per process)."""
+    with _dictionary_lock:
+        if codec not in _active_dictionary_ids:
+            row = conn.execute(
+                "SELECT MAX(id) AS id FROM response_dicts WHERE codec = ?", (codec,)
+            ).fetchone()
+            _active_dictionary_ids[codec] = row["id"] if row else None
+        return _active_dictionary_ids[codec]
+
+
+def _compress_response(conn: sqlite3.Connection, text: str) -> Tuple[str, Optional[int], int, bytes]:
+    """Return (codec, dict_id, raw_size, data) for a response."""
+    raw = text.encode("utf-8")
+    codec = _response_codec()
+    dict_id = _active_dictionary_id(conn, codec)
+    zdict = _dictionary(conn, dict_id)
+    if codec == "zstd":
+        dict_data = zstandard.ZstdCompressionDict(zdict) if zdict else None
+        data = zstandard.ZstdCompressor(level=9, dict_data=dict_data).compress(raw)
+    else:
+        compressor = zlib.compressobj(9, zdict=zdict) if zdict else zlib.compressobj(9)
+        data = compressor.compress(raw) + compressor.flush()
+    return codec, dict_id, len(raw), data
+
+
+def _decompress_response(conn: sqlite3.Connection, codec: str, dict_id: Optional[int], data: bytes) -> str:
+    return _decompress(codec, _dictionary(conn, dict_id), data)
+
+
+def _decompress(codec: str, zdict: Optional[bytes], data: bytes) -> str:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Response was stored with zstd; install the 'zstandard' package to read it")
+        dict_data = zstandard.ZstdCompressionDict(zdict) if zdict else None
+        raw = zstandard.ZstdDecompressor(dict_data=dict_data).decompress(data)
+    else:
+        decompressor = zlib.decompressobj(zdict=zdict) if zdict else zlib.decompressobj()
+        raw = decompressor.decompress(data) + decompressor.flush()
+    return raw.decode("utf-8")
+
+
 def _ensure_column(conn: sqlite3.Connection, table: str, column: str, coldef: str) -> None:
     cols = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
     if column not in cols:
@@ -88,30 +357,661 @@ def _backfill_provider_model(conn: sqlite3.Connection) -> None:
     )
 
 
+def _migration_legacy_columns(conn: sqlite3.Connection) -> None:
+    """Columns added before versioned migrations existed."""
+    _ensure_column(conn, "sessions", "provider", "TEXT")
+    _ensure_column(conn, "sessions", "model", "TEXT")
+    _ensure_column(conn, "sessions", "config_json", "TEXT")
+    _ensure_column(conn, "trials", "scorer_version", "TEXT")
+    _ensure_column(conn, "trials", "ttft", "REAL")
+    _ensure_column(conn, "trials", "tokens_per_sec", "REAL")
+    _ensure_column(conn, "trials", "stopped_early", "INTEGER")
+    _backfill_provider_model(conn)
+
+
+def _migration_method_family(conn: sqlite3.Connection) -> None:
+    """Store the normalized method family and index the dashboard query paths."""
+    _ensure_column(conn, "trials", "method_family", "TEXT")
+    conn.execute(
+        "UPDATE trials SET method_family = CASE WHEN method LIKE 'det%' THEN 'det' ELSE method END"
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_trials_session_size_method
+        ON trials(session_id, size, method_family, method, score, success, tokens, time)
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_trials_family
+        ON trials(method_family, session_id, score, success, tokens, time)
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_sessions_mode_provider_model
+        ON sessions(mode, provider, model, created_at)
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_conditions_session ON conditions(session_id, size, method)")
+
+
+# -- Rollups ---------------------------------------------------------------
+# trial_rollups keeps per-(provider, model, mode, size, method_family) sums and
+# non-null counts, maintained by triggers on trials, so dashboard aggregates
+# read O(groups) rows. NULL keys are stored as '' / -1 to keep them unique.
+
+ROLLUP_KEY = "provider, model, mode, size, method_family"
+# Measures summed per group; migration 3 created the first four, 9 added correct
+_ROLLUP_MEASURES_V3 = ("score", "success", "tokens", "time")
+_ROLLUP_MEASURES = _ROLLUP_MEASURES_V3 + ("correct",)
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trial_rollups (
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    method_family TEXT NOT NULL,
+    n INTEGER NOT NULL DEFAULT 0,
+    n_score INTEGER NOT NULL DEFAULT 0,
+    sum_score REAL NOT NULL DEFAULT 0,
+    sumsq_score REAL NOT NULL DEFAULT 0,
+    n_success INTEGER NOT NULL DEFAULT 0,
+    sum_success REAL NOT NULL DEFAULT 0,
+    n_tokens INTEGER NOT NULL DEFAULT 0,
+    sum_tokens REAL NOT NULL DEFAULT 0,
+    n_time INTEGER NOT NULL DEFAULT 0,
+    sum_time REAL NOT NULL DEFAULT 0,
+    n_correct INTEGER NOT NULL DEFAULT 0,
+    sum_correct REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (provider, model, mode, size, method_family)
+)
+"""
+
+
+def _rollup_columns(measures: Tuple[str, ...] = _ROLLUP_MEASURES) -> List[str]:
+    cols = ["n"]
+    for col in measures:
+        cols += [f"n_{col}", f"sum_{col}"]
+        if col == "score":
+            cols.append("sumsq_score")
+    return cols
+
+
+_ROLLUP_COLUMNS = ", ".join(_rollup_columns())
+
+
+def _rollup_values(row: str, measures: Tuple[str, ...] = _ROLLUP_MEASURES) -> List[str]:
+    """One trial's contribution to each rollup column (``row`` is NEW, OLD or a table alias)."""
+    parts = ["1"]
+    for col in measures:
+        parts.append(f"({row}.{col} IS NOT NULL)")
+        parts.append(f"IFNULL({row}.{col}, 0)")
+        if col == "score":
+            parts.append(f"IFNULL({row}.score * {row}.score, 0)")
+    return parts
+
+
+def _rollup_key(row: str) -> str:
+    return (f"IFNULL(s.provider, ''), IFNULL(s.model, ''), s.mode, "
+            f"IFNULL({row}.size, -1), IFNULL({row}.method_family, '')")
+
+
+def _rollup_add_sql(row: str, measures: Tuple[str, ...]) -> str:
+    cols = _rollup_columns(measures)
+    updates = ", ".join(f"{c} = {c} + excluded.{c}" for c in cols)
+    return f"""
+        INSERT INTO trial_rollups ({ROLLUP_KEY}, {", ".join(cols)})
+        SELECT {_rollup_key(row)}, {", ".join(_rollup_values(row, measures))}
+        FROM sessions s WHERE s.id = {row}.session_id
+        ON CONFLICT({ROLLUP_KEY}) DO UPDATE SET {updates};
+    """
+
+
+def _rollup_subtract_sql(row: str, measures: Tuple[str, ...]) -> str:
+    cols = _rollup_columns(measures)
+    updates = ", ".join(f"{c} = {c} - {v}" for c, v in zip(cols, _rollup_values(row, measures)))
+    return f"""
+        UPDATE trial_rollups SET {updates}
+        WHERE ({ROLLUP_KEY}) = (SELECT {_rollup_key(row)} FROM sessions s WHERE s.id = {row}.session_id);
+        DELETE FROM trial_rollups WHERE n <= 0;
+    """
+
+
+def _rollup_triggers(measures: Tuple[str, ...]) -> List[str]:
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_trials_rollup_insert AFTER INSERT ON trials
+        BEGIN {_rollup_add_sql("NEW", measures)} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_trials_rollup_delete AFTER DELETE ON trials
+        BEGIN {_rollup_subtract_sql("OLD", measures)} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_trials_rollup_update
+        AFTER UPDATE OF session_id, size, method_family, {", ".join(measures)} ON trials
+        BEGIN {_rollup_subtract_sql("OLD", measures)} {_rollup_add_sql("NEW", measures)} END
+        """,
+    ]
+
+
+def _rollup_rebuild_select(measures: Tuple[str, ...] = _ROLLUP_MEASURES) -> str:
+    return f"""
+    SELECT {_rollup_key("t")},
+           {", ".join(f"SUM({v})" for v in _rollup_values("t", measures))}
+    FROM trials t JOIN sessions s ON s.id = t.session_id
+    GROUP BY 1, 2, 3, 4, 5
+    """
+
+
+def _migration_rollups(conn: sqlite3.Connection) -> None:
+    conn.execute(ROLLUP_SCHEMA)
+    for trigger in _rollup_triggers(_ROLLUP_MEASURES_V3):
+        conn.execute(trigger)
+    _rebuild_rollups(conn, _ROLLUP_MEASURES_V3)
+
+
+def _rebuild_rollups(conn: sqlite3.Connection, measures: Tuple[str, ...] = _ROLLUP_MEASURES) -> None:
+    conn.execute("DELETE FROM trial_rollups")
+    conn.execute(
+        f"INSERT INTO trial_rollups ({ROLLUP_KEY}, {', '.join(_rollup_columns(measures))}) "
+        f"{_rollup_rebuild_select(measures)}"
+    )
+
+
+def rebuild_rollups() -> Dict[str, Any]:
+    """Recompute trial_rollups (and metric_histograms) from trials; returns the rollup groups that had drifted."""
+    flush()
+    conn = _connect()
+    with conn:
+        fresh = {tuple(r[:5]): tuple(r[5:]) for r in conn.execute(_rollup_rebuild_select())}
+        stored = {
+            tuple(r[:5]): tuple(r[5:])
+            for r in conn.execute(f"SELECT {ROLLUP_KEY}, {_ROLLUP_COLUMNS} FROM trial_rollups")
+        }
+        drifted = [
+            key for key in set(fresh) | set(stored)
+            if key not in fresh or key not in stored
+            or any(abs((a or 0) - (b or 0)) > 1e-6 for a, b in zip(fresh[key], stored[key]))
+        ]
+        _rebuild_rollups(conn)
+        _rebuild_metric_histograms(conn)
+    return {"groups": len(fresh), "drifted": sorted(drifted, key=str)}
+
+
+def _rollup_averages(prefix: str = "") -> str:
+    """AVG()-equivalent columns over summed rollup rows."""
+    return f"""
+        SUM({prefix}sum_score) / NULLIF(SUM({prefix}n_score), 0) AS avg_score,
+        SUM({prefix}sum_success) * 100.0 / NULLIF(SUM({prefix}n_success), 0) AS success_rate,
+        SUM({prefix}sum_tokens) / NULLIF(SUM({prefix}n_tokens), 0) AS avg_tokens,
+        SUM({prefix}sum_time) / NULLIF(SUM({prefix}n_time), 0) AS avg_time,
+        SUM({prefix}sum_correct) * 100.0 / NULLIF(SUM({prefix}n_correct), 0) AS accuracy,
+        SUM({prefix}sumsq_score) AS _sumsq_score,
+        SUM({prefix}n_score) AS _n_score
+    """
+
+
+def _finish_rollup_rows(rows: Iterable[sqlite3.Row], drop: Tuple[str, ...] = ()) -> List[Dict[str, Any]]:
+    """Turn rollup rows into dicts, adding the population std of score."""
+    out = []
+    for row in rows:
+        d = dict(row)
+        n, sumsq = d.pop("_n_score"), d.pop("_sumsq_score")
+        if n:
+            mean = d["avg_score"]
+            d["std_score"] = max(0.0, sumsq / n - mean * mean) ** 0.5
+        else:
+            d["std_score"] = None
+        for key in drop:
+            d.pop(key, None)
+        out.append(d)
+    return out
+
+
+# -- Out-of-row responses --------------------------------------------------
+
+RESPONSE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS trial_responses (
+        trial_id INTEGER PRIMARY KEY,
+        codec TEXT NOT NULL,
+        dict_id INTEGER,
+        raw_size INTEGER,
+        data BLOB NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS response_dicts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        codec TEXT NOT NULL,
+        data BLOB NOT NULL,
+        created_at TEXT
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trials_response_delete AFTER DELETE ON trials
+    BEGIN
+        DELETE FROM trial_responses WHERE trial_id = OLD.id;
+    END
+    """,
+]
+
+
+def _migration_response_blobs(conn: sqlite3.Connection) -> None:
+    """
+    Copy trials.response into compressed trial_responses rows. The inline
+    copies are left in place: dropping them rewrites the whole file, so it
+    only happens on request (``compact_responses``, after a backup).
+    """
+    for statement in RESPONSE_SCHEMA:
+        conn.execute(statement)
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, response FROM trials WHERE id > ? AND response IS NOT NULL ORDER BY id LIMIT 500",
+            (last_id,),
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+        conn.executemany(
+            RESPONSE_INSERT_SQL,
+            [(r["id"], *_compress_response(conn, r["response"])) for r in rows],
+        )
+
+
+# -- Data version ------------------------------------------------------------
+# A single counter bumped in the same transaction as every write that changes
+# what readers see, so caches in any process can tell when to recompute.
+
+def _migration_data_version(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+        """
+    )
+    conn.execute("INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0)")
+
+
+def _bump_data_version(conn: sqlite3.Connection) -> None:
+    conn.execute("UPDATE data_version SET version = version + 1 WHERE id = 1")
+
+
+def data_version() -> int:
+    """Counter that changes whenever sessions, trials or conditions change."""
+    with _connect() as conn:
+        row = conn.execute("SELECT version FROM data_version WHERE id = 1").fetchone()
+        return row["version"] if row else 0
+
+
+# -- Events ----------------------------------------------------------------
+# Append-only log of experiment progress events (see core.events) that other
+# processes tail by id.
+
+def _migration_events(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            payload_json TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_events_session ON events(session_id, id)")
+
+
+# -- Work queue ------------------------------------------------------------
+# Trial specs enqueued by a coordinator and claimed by worker processes under
+# time-limited leases; a lease that expires (crashed worker) is claimable again.
+
+def _migration_work_queue(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS work_queue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            method TEXT NOT NULL,
+            trial INTEGER NOT NULL,
+            provider TEXT,
+            model TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            worker TEXT,
+            lease_expires REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            updated_at REAL,
+            UNIQUE (session_id, size, method, trial)
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_work_queue_claim ON work_queue(status, lease_expires)")
+
+
+def _migration_problem_seed(conn: sqlite3.Connection) -> None:
+    """Which generated system a trial solved (NULL: the default system for its size)."""
+    _ensure_column(conn, "trials", "problem_seed", "INTEGER")
+    _ensure_column(conn, "work_queue", "problem_seed", "INTEGER")
+
+
+def _migration_correctness(conn: sqlite3.Connection) -> None:
+    """Ground-truth verdicts per trial and condition, with correct counted in the rollups."""
+    _ensure_column(conn, "trials", "correct", "INTEGER")
+    _ensure_column(conn, "trials", "max_residual", "REAL")
+    _ensure_column(conn, "conditions", "accuracy", "REAL")
+    _ensure_column(conn, "trial_rollups", "n_correct", "INTEGER NOT NULL DEFAULT 0")
+    _ensure_column(conn, "trial_rollups", "sum_correct", "REAL NOT NULL DEFAULT 0")
+    for name in ("insert", "delete", "update"):
+        conn.execute(f"DROP TRIGGER IF EXISTS trg_trials_rollup_{name}")
+    for trigger in _rollup_triggers(_ROLLUP_MEASURES):
+        conn.execute(trigger)
+    _rebuild_rollups(conn)
+
+
+def _migration_sweeps(conn: sqlite3.Connection) -> None:
+    """Sweeps group the concurrent per-model sessions of one --mode sweep run."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sweeps (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            config_json TEXT,
+            created_at TEXT
+        )
+        """
+    )
+    _ensure_column(conn, "sessions", "sweep_id", "INTEGER")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_sweep ON sessions(sweep_id)")
+
+
+_CALL_METRIC_TYPES = {
+    "queue_wait": "REAL", "ttfb": "REAL", "latency": "REAL", "retries": "INTEGER",
+    "rate_limited": "INTEGER", "prompt_tokens": "INTEGER", "completion_tokens": "INTEGER",
+}
+
+
+def _migration_call_metrics(conn: sqlite3.Connection) -> None:
+    """Per-call latency/token columns on trials and percentile summaries on conditions."""
+    for name in CALL_METRICS:
+        _ensure_column(conn, "trials", name, _CALL_METRIC_TYPES[name])
+    _ensure_column(conn, "conditions", "percentiles_json", "TEXT")
+
+
+def _migration_concurrency_limits(conn: sqlite3.Connection) -> None:
+    """Learned in-flight request limits per provider/model, reused by the next run."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS concurrency_limits (
+            key TEXT PRIMARY KEY,
+            limit_value REAL NOT NULL,
+            latency REAL,
+            updated_at TEXT NOT NULL
+        )
+        """
+    )
+
+
+# -- Metric histograms -------------------------------------------------------
+# metric_histograms counts trials per (provider, model,
+# mode, metric, bucket), maintained by triggers like trial_rollups, so model
+# percentiles read O(buckets) rows. Buckets keep ~3 significant digits (at
+# most 0.5% off for values >= 1, 0.0005 absolute below), which bounds the
+# row count per metric to a few thousand however many trials there are.
+
+HISTOGRAM_KEY = "provider, model, mode, metric, bucket"
+
+HISTOGRAM_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metric_histograms (
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    bucket REAL NOT NULL,
+    n INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (provider, model, mode, metric, bucket)
+)
+"""
+
+
+def _histogram_bucket(value: str) -> str:
+    return f"""(CASE WHEN {value} < 1 THEN ROUND({value}, 3) WHEN {value} < 10 THEN ROUND({value}, 2)
+        WHEN {value} < 100 THEN ROUND({value}, 1) WHEN {value} < 1000 THEN ROUND({value})
+        ELSE ROUND({value} / 10.0) * 10 END)"""
+
+
+def _histogram_values(row: str) -> str:
+    """(metric, value) rows of one trial (``row`` is NEW, OLD or a table alias)."""
+    return " UNION ALL ".join(f"SELECT '{m}' AS metric, {row}.{m} AS value" for m in SUMMARY_METRICS)
+
+
+def _histogram_add_sql(row: str) -> str:
+    return f"""
+        INSERT INTO metric_histograms ({HISTOGRAM_KEY}, n)
+        SELECT IFNULL(s.provider, ''), IFNULL(s.model, ''), s.mode, v.metric, {_histogram_bucket("v.value")}, 1
+        FROM sessions s, ({_histogram_values(row)}) v
+        WHERE s.id = {row}.session_id AND v.value IS NOT NULL
+        ON CONFLICT({HISTOGRAM_KEY}) DO UPDATE SET n = n + 1;
+    """
+
+
+def _histogram_subtract_sql(row: str) -> str:
+    return f"""
+        UPDATE metric_histograms SET n = n - 1
+        WHERE ({HISTOGRAM_KEY}) IN (
+            SELECT IFNULL(s.provider, ''), IFNULL(s.model, ''), s.mode, v.metric, {_histogram_bucket("v.value")}
+            FROM sessions s, ({_histogram_values(row)}) v
+            WHERE s.id = {row}.session_id AND v.value IS NOT NULL
+        );
+        DELETE FROM metric_histograms WHERE n <= 0;
+    """
+
+
+def _histogram_triggers() -> List[str]:
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_trials_histogram_insert AFTER INSERT ON trials
+        BEGIN {_histogram_add_sql("NEW")} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_trials_histogram_delete AFTER DELETE ON trials
+        BEGIN {_histogram_subtract_sql("OLD")} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_trials_histogram_update
+        AFTER UPDATE OF session_id, {", ".join(SUMMARY_METRICS)} ON trials
+        BEGIN {_histogram_subtract_sql("OLD")} {_histogram_add_sql("NEW")} END
+        """,
+    ]
+
+
+def _rebuild_metric_histograms(conn: sqlite3.Connection) -> None:
+    conn.execute("DELETE FROM metric_histograms")
+    for metric in SUMMARY_METRICS:
+        conn.execute(
+            f"""
+            INSERT INTO metric_histograms ({HISTOGRAM_KEY}, n)
+            SELECT IFNULL(s.provider, ''), IFNULL(s.model, ''), s.mode, '{metric}',
+                   {_histogram_bucket(f"t.{metric}")}, COUNT(*)
+            FROM trials t JOIN sessions s ON s.id = t.session_id
+            WHERE t.{metric} IS NOT NULL
+            GROUP BY 1, 2, 3, 4, 5
+            """
+        )
+
+
+def _migration_metric_histograms(conn: sqlite3.Connection) -> None:
+    conn.execute(HISTOGRAM_SCHEMA)
+    for trigger in _histogram_triggers():
+        conn.execute(trigger)
+    _rebuild_metric_histograms(conn)
+
+
+# Ordered (version, name, migrate); each runs once, inside the init_db transaction.
+# Migrations only add: anything that drops data or rewrites the file is opt-in.
+MIGRATIONS = [
+    (1, "legacy columns", _migration_legacy_columns),
+    (2, "method family + indexes", _migration_method_family),
+    (3, "trial rollups", _migration_rollups),
+    (4, "compressed out-of-row responses", _migration_response_blobs),
+    (5, "data version counter", _migration_data_version),
+    (6, "progress events", _migration_events),
+    (7, "work queue", _migration_work_queue),
+    (8, "problem seed", _migration_problem_seed),
+    (9, "correctness", _migration_correctness),
+    (10, "sweeps", _migration_sweeps),
+    (11, "call metrics", _migration_call_metrics),
+    (12, "concurrency limits", _migration_concurrency_limits),
+    (13, "metric histograms", _migration_metric_histograms),
+]
+
+
+def _schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
 def init_db() -> None:
-    """Ensure tables exist."""
+    """Ensure tables exist and apply pending migrations."""
+    conn = _connect()
+    conn.executescript(SCHEMA)
+    if _schema_version(conn) >= MIGRATIONS[-1][0]:
+        return
+    # IMMEDIATE takes the write lock up front so concurrent processes migrate once
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        current = _schema_version(conn)
+        for version, name, migrate in MIGRATIONS:
+            if version <= current:
+                continue
+            migrate(conn)
+            conn.execute(
+                "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                (version, name, datetime.utcnow().isoformat()),
+            )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def method_family(method: Optional[str]) -> Optional[str]:
+    """Group DET variants (det, det_v2, ...) under 'det'."""
+    if method and method.lower().startswith("det"):
+        return "det"
+    return method
+
+
+def create_sweep(config: Dict[str, Any]) -> int:
+    """Insert a sweep record (sessions join it via sweep_id) and return its id."""
     with _connect() as conn:
-        conn.executescript(SCHEMA)
-        # Lightweight migrations for legacy DBs missing newer columns
-        _ensure_column(conn, "sessions", "provider", "TEXT")
-        _ensure_column(conn, "sessions", "model", "TEXT")
-        _ensure_column(conn, "sessions", "config_json", "TEXT")
-        _backfill_provider_model(conn)
-        # conditions table is created above; no extra columns yet
+        cur = conn.execute(
+            "INSERT INTO sweeps (config_json, created_at) VALUES (?, ?)",
+            (json.dumps(config), datetime.utcnow().isoformat()),
+        )
+        _bump_data_version(conn)
         conn.commit()
+        return int(cur.lastrowid)
+
+
+def fetch_sweeps(limit: int = 20) -> List[Dict[str, Any]]:
+    """Most recent sweeps with their config and session ids."""
+    with _connect() as conn:
+        rows = conn.execute(
+            """
+            SELECT w.id, w.config_json, w.created_at, GROUP_CONCAT(s.id) AS session_ids
+            FROM sweeps w LEFT JOIN sessions s ON s.sweep_id = w.id
+            GROUP BY w.id
+            ORDER BY w.id DESC
+            LIMIT ?
+            """,
+            (limit,),
+        ).fetchall()
+    sweeps = []
+    for row in rows:
+        sweep = dict(row)
+        sweep["config"] = json.loads(sweep.pop("config_json") or "{}")
+        ids = sweep.pop("session_ids")
+        sweep["session_ids"] = sorted(int(i) for i in ids.split(",")) if ids else []
+        sweeps.append(sweep)
+    return sweeps
 
 
-def create_session(mode: str, provider: str, model: str, config: Dict[str, Any]) -> int:
+def create_session(mode: str, provider: str, model: str, config: Dict[str, Any],
+                   sweep_id: Optional[int] = None) -> int:
     """Insert a session record and return its id."""
     with _connect() as conn:
         cur = conn.execute(
-            "INSERT INTO sessions (mode, provider, model, config_json, created_at) VALUES (?, ?, ?, ?, ?)",
-            (mode, provider, model, json.dumps(config), datetime.utcnow().isoformat()),
+            "INSERT INTO sessions (mode, provider, model, config_json, created_at, sweep_id) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (mode, provider, model, json.dumps(config), datetime.utcnow().isoformat(), sweep_id),
         )
+        _bump_data_version(conn)
         conn.commit()
         return int(cur.lastrowid)
 
 
+def fetch_session(session_id: int) -> Optional[Dict[str, Any]]:
+    """Session row with its config decoded, or None."""
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM sessions WHERE id = ?", (session_id,)).fetchone()
+    if row is None:
+        return None
+    session = dict(row)
+    session["config"] = json.loads(session.pop("config_json") or "{}")
+    return session
+
+
+def _flag(value: Optional[bool]) -> Optional[int]:
+    """Tri-state bool column: NULL when not evaluated."""
+    return None if value is None else int(value)
+
+
+def _trial_write(
+    conn: sqlite3.Connection,
+    session_id: int,
+    size: Optional[int],
+    method: str,
+    trial_num: int,
+    result: Dict[str, Any],
+    response_text: Optional[str] = None,
+) -> TrialWrite:
+    row = (
+        session_id,
+        size,
+        method,
+        trial_num,
+        result.get("score"),
+        result.get("completeness"),
+        result.get("consistency"),
+        result.get("reasoning"),
+        int(result.get("success", False)),
+        result.get("tokens"),
+        result.get("time"),
+        result.get("variables_found"),
+        json.dumps(result.get("assignments")),
+        result.get("scorer_version"),
+        result.get("ttft"),
+        result.get("tokens_per_sec"),
+        int(result.get("stopped_early", False)),
+        method_family(method),
+        result.get("problem_seed"),
+        _flag(result.get("correct")),
+        result.get("max_residual"),
+        *(result.get(name) for name in CALL_METRICS),
+        datetime.utcnow().isoformat(),
+    )
+    response = response_text or result.get("response")
+    blob = _compress_response(conn, response) if response is not None else None
+    return row, blob
+
+
 def insert_trial(
     session_id: int,
     size: Optional[int],
@@ -120,37 +1020,325 @@ def insert_trial(
     result: Dict[str, Any],
     response_text: Optional[str] = None,
 ) -> None:
-    """Insert a single trial row."""
+    """Insert a single trial row (queued to the background writer unless DB_ASYNC_WRITES is off)."""
+    conn = _connect()
+    write = _trial_write(conn, session_id, size, method, trial_num, result, response_text)
+    if DB_ASYNC_WRITES:
+        _writer.submit(("trial", write))
+        return
+    with conn:
+        _write_trials(conn, [write])
+
+
+def iter_trial_responses(
+    chunk_size: int = 1000,
+    session_id: Optional[int] = None,
+    skip_scorer_version: Optional[str] = None,
+) -> Iterable[List[Tuple[int, int, Optional[int], str]]]:
+    """Yield scored-trial rows (id, size, problem_seed, response) in id order, one chunk at a time.
+
+    Only experiment sessions are included: demo sessions store responses
+    truncated to 500 characters, which would rescore as different answers.
+    Uses keyset pagination so no cursor stays open between chunks and the
+    caller can write back while iterating.
+    """
+    flush()
+    last_id = 0
+    while True:
+        clauses = ["t.id > ?", "t.size IS NOT NULL", "s.mode = 'experiment'"]
+        params: List[Any] = [last_id]
+        if session_id is not None:
+            clauses.append("t.session_id = ?")
+            params.append(session_id)
+        if skip_scorer_version is not None:
+            clauses.append("(t.scorer_version IS NULL OR t.scorer_version != ?)")
+            params.append(skip_scorer_version)
+        conn = _connect()
+        with conn:
+            rows = conn.execute(
+                f"""
+                SELECT t.id, t.size, t.problem_seed, r.codec, r.dict_id, r.data
+                FROM trials t
+                JOIN sessions s ON s.id = t.session_id
+                JOIN trial_responses r ON r.trial_id = t.id
+                WHERE {' AND '.join(clauses)}
+                ORDER BY t.id LIMIT ?
+                """,
+                (*params, chunk_size),
+            ).fetchall()
+        if not rows:
+            return
+        last_id = rows[-1]["id"]
+        yield [
+            (r["id"], r["size"], r["problem_seed"], _decompress_response(conn, r["codec"], r["dict_id"], r["data"]))
+            for r in rows
+        ]
+
+
+def update_trial_scores(updates: Iterable[Tuple[int, Dict[str, Any]]]) -> int:
+    """Write back (trial_id, score_result) pairs from ResponseScorer.score in one transaction."""
+    rows = [
+        (
+            result["total"],
+            result["completeness"],
+            result["consistency"],
+            result["reasoning"],
+            int(result["success"]),
+            result["variables_found"],
+            json.dumps(result["assignments"]),
+            result.get("scorer_version"),
+            _flag(result.get("correct")),
+            result.get("max_residual"),
+            trial_id,
+        )
+        for trial_id, result in updates
+    ]
+    with _connect() as conn:
+        conn.executemany(
+            """
+            UPDATE trials
+            SET score = ?, completeness = ?, consistency = ?, reasoning = ?, success = ?,
+                variables_found = ?, assignments = ?, scorer_version = ?,
+                correct = ?, max_residual = ?
+            WHERE id = ?
+            """,
+            rows,
+        )
+        _bump_data_version(conn)
+        conn.commit()
+    return len(rows)
+
+
+def fetch_concurrency_limit(key: str) -> Optional[Dict[str, Any]]:
+    """
+    Stored adaptive concurrency state ({limit, latency, updated_at}) for a
+    provider:model key. Read-only: None if the DB has not been migrated to
+    the concurrency_limits table yet.
+    """
+    conn = _connect_readonly()
+    if conn is None:
+        return None
+    try:
+        row = conn.execute(
+            "SELECT limit_value, latency, updated_at FROM concurrency_limits WHERE key = ?", (key,)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    return {"limit": row["limit_value"], "latency": row["latency"], "updated_at": row["updated_at"]}
+
+
+def save_concurrency_limits(limits: List[Tuple[str, float, Optional[float]]]) -> None:
+    """
+    Store learned (key, limit, latency) rows in one transaction; skipped
+    unless ``init_db`` has already created the table.
+    """
+    if not limits or not _has_table("concurrency_limits"):
+        return
+    now = datetime.utcnow().isoformat()
+    with _connect() as conn:
+        conn.executemany(
+            """
+            INSERT INTO concurrency_limits (key, limit_value, latency, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                limit_value = excluded.limit_value, latency = excluded.latency, updated_at = excluded.updated_at
+            """,
+            [(key, limit, latency, now) for key, limit, latency in limits],
+        )
+
+
+def insert_event(session_id: int, kind: str, payload: Dict[str, Any]) -> None:
+    """Append a progress event; queued with trial rows so both become visible together."""
+    row = (session_id, kind, json.dumps(payload), payload.get("ts") or datetime.utcnow().timestamp())
+    if DB_ASYNC_WRITES:
+        _writer.submit(("event", row))
+        return
+    with _connect() as conn:
+        conn.execute(EVENT_INSERT_SQL, row)
+
+
+def enqueue_trials(session_id: int, provider: str, model: str,
+                   specs: Iterable[Tuple[int, str, int, Optional[int]]]) -> int:
+    """
+    Queue (size, method, trial, problem_seed) specs for workers; finished or
+    failed specs are re-queued.
+    """
+    now = time.time()
+    rows = [(session_id, size, method, trial, problem_seed, provider, model, now)
+            for size, method, trial, problem_seed in specs]
     with _connect() as conn:
+        conn.executemany(
+            """
+            INSERT INTO work_queue (session_id, size, method, trial, problem_seed, provider, model, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (session_id, size, method, trial) DO UPDATE
+            SET status = 'pending', worker = NULL, lease_expires = NULL, attempts = 0, error = NULL,
+                problem_seed = excluded.problem_seed, updated_at = excluded.updated_at
+            WHERE status != 'leased'
+            """,
+            rows,
+        )
+        conn.commit()
+    return len(rows)
+
+
+def claim_work(worker: str, limit: int, lease_seconds: float, max_attempts: int) -> List[Dict[str, Any]]:
+    """
+    Atomically lease up to ``limit`` queued trials (largest systems first).
+    Items whose lease has expired are reclaimed like pending ones, unless
+    they have used up ``max_attempts`` (their workers crashed or hung): those
+    fail for good.
+    """
+    now = time.time()
+    conn = _connect()
+    # IMMEDIATE takes the write lock before reading, so two workers never claim the same row
+    conn.execute("BEGIN IMMEDIATE")
+    try:
         conn.execute(
             """
-            INSERT INTO trials (
-                session_id, size, method, trial, score, completeness, consistency,
-                reasoning, success, tokens, time, response, variables_found, assignments, created_at
+            UPDATE work_queue
+            SET status = 'failed', error = 'lease expired (worker ' || IFNULL(worker, '?') || ')',
+                worker = NULL, lease_expires = NULL, updated_at = ?
+            WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?
+            """,
+            (now, now, max_attempts),
+        )
+        rows = conn.execute(
+            """
+            UPDATE work_queue
+            SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ?
+            WHERE id IN (
+                SELECT id FROM work_queue
+                WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?)
+                ORDER BY size DESC, id
+                LIMIT ?
             )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            RETURNING id, session_id, size, method, trial, problem_seed, provider, model, attempts
             """,
-            (
-                session_id,
-                size,
-                method,
-                trial_num,
-                result.get("score"),
-                result.get("completeness"),
-                result.get("consistency"),
-                result.get("reasoning"),
-                int(result.get("success", False)),
-                result.get("tokens"),
-                result.get("time"),
-                response_text or result.get("response"),
-                result.get("variables_found"),
-                json.dumps(result.get("assignments")),
-                datetime.utcnow().isoformat(),
-            ),
+            (worker, now + lease_seconds, now, now, limit),
+        ).fetchall()
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return [dict(r) for r in rows]
+
+
+def renew_leases(worker: str, item_ids: Iterable[int], lease_seconds: float) -> None:
+    ids = list(item_ids)
+    if not ids:
+        return
+    now = time.time()
+    with _connect() as conn:
+        conn.execute(
+            f"UPDATE work_queue SET lease_expires = ?, updated_at = ? "
+            f"WHERE worker = ? AND status = 'leased' AND id IN ({','.join('?' * len(ids))})",
+            (now + lease_seconds, now, worker, *ids),
         )
         conn.commit()
 
 
+def complete_work(item: Dict[str, Any], worker: str, result: Dict[str, Any]) -> bool:
+    """
+    Store a leased item's trial and mark it done in one transaction. Returns
+    False (and stores nothing) if the lease was lost to another worker.
+    """
+    conn = _connect()
+    write = _trial_write(conn, item["session_id"], item["size"], item["method"], item["trial"], result)
+    with conn:
+        updated = conn.execute(
+            "UPDATE work_queue SET status = 'done', lease_expires = NULL, error = NULL, updated_at = ? "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (time.time(), item["id"], worker),
+        ).rowcount
+        if updated:
+            _write_trials(conn, [write])
+    return bool(updated)
+
+
+def fail_work(item: Dict[str, Any], worker: str, error: str, max_attempts: int) -> None:
+    """Release a leased item after an error; it fails for good after ``max_attempts``."""
+    with _connect() as conn:
+        conn.execute(
+            """
+            UPDATE work_queue
+            SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                worker = NULL, lease_expires = NULL, error = ?, updated_at = ?
+            WHERE id = ? AND worker = ? AND status = 'leased'
+            """,
+            (max_attempts, error, time.time(), item["id"], worker),
+        )
+        conn.commit()
+
+
+def fetch_work_progress(session_id: int) -> Dict[Tuple[int, str], Dict[str, int]]:
+    """Queue item counts per (size, method) and status for a session."""
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT size, method, status, COUNT(*) AS n FROM work_queue WHERE session_id = ? "
+            "GROUP BY size, method, status",
+            (session_id,),
+        ).fetchall()
+    progress: Dict[Tuple[int, str], Dict[str, int]] = {}
+    for r in rows:
+        progress.setdefault((r["size"], r["method"]), {})[r["status"]] = r["n"]
+    return progress
+
+
+def fetch_work_errors(session_id: int) -> List[Dict[str, Any]]:
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT size, method, trial, attempts, error FROM work_queue "
+            "WHERE session_id = ? AND status = 'failed' ORDER BY size, method, trial",
+            (session_id,),
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def delete_conditions(session_id: int) -> None:
+    """Drop a session's condition rows (they are recomputed when a session is resumed)."""
+    with _connect() as conn:
+        conn.execute("DELETE FROM conditions WHERE session_id = ?", (session_id,))
+        _bump_data_version(conn)
+        conn.commit()
+
+
+def fetch_events(after_id: int = 0, session_id: Optional[int] = None, limit: int = 1000) -> List[Dict[str, Any]]:
+    """Events with id > after_id (optionally for one session), oldest first."""
+    clauses, params = ["id > ?"], [after_id]
+    if session_id is not None:
+        clauses.append("session_id = ?")
+        params.append(session_id)
+    with _connect() as conn:
+        rows = conn.execute(
+            f"SELECT id, session_id, kind, payload_json FROM events WHERE {' AND '.join(clauses)} "
+            "ORDER BY id LIMIT ?",
+            (*params, limit),
+        ).fetchall()
+    return [
+        {"id": r["id"], "session_id": r["session_id"], "kind": r["kind"], **json.loads(r["payload_json"])}
+        for r in rows
+    ]
+
+
+def latest_event_id(session_id: Optional[int] = None, kind: Optional[str] = None) -> int:
+    """Id of the newest event (optionally of one session and kind), 0 if there is none."""
+    clauses, params = ["1"], []
+    if session_id is not None:
+        clauses.append("session_id = ?")
+        params.append(session_id)
+    if kind is not None:
+        clauses.append("kind = ?")
+        params.append(kind)
+    with _connect() as conn:
+        return conn.execute(
+            f"SELECT COALESCE(MAX(id), 0) FROM events WHERE {' AND '.join(clauses)}", params
+        ).fetchone()[0]
+
+
 def insert_condition(session_id: int, size: int, method: str, stats: Dict[str, Any]) -> None:
     """Insert aggregated condition stats (per size+method)."""
     with _connect() as conn:
@@ -160,9 +1348,9 @@ def insert_condition(session_id: int, size: int, method: str, stats: Dict[str, A
                 session_id, size, method,
                 mean_score, std_score, min_score, max_score,
                 success_rate, mean_tokens, total_tokens,
-                mean_time, total_time, num_trials, created_at
+                mean_time, total_time, num_trials, accuracy, percentiles_json, created_at
             )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
             (
                 session_id,
@@ -178,9 +1366,12 @@ def insert_condition(session_id: int, size: int, method: str, stats: Dict[str, A
                 stats["time"]["mean"],
                 stats["time"]["total"],
                 stats["num_trials"],
+                stats.get("accuracy"),
+                json.dumps(stats.get("percentiles")),
                 datetime.utcnow().isoformat(),
             ),
         )
+        _bump_data_version(conn)
         conn.commit()
 
 
@@ -199,48 +1390,378 @@ def fetch_summary(limit_sessions: int = 10) -> Dict[str, Any]:
         ).fetchall()
 
         method_summary = conn.execute(
-            """
-            SELECT CASE WHEN t.method LIKE 'det%' THEN 'det' ELSE t.method END AS method,
-                   COUNT(*) AS runs,
-                   AVG(t.score) AS avg_score,
-                   AVG(t.success) * 100.0 AS success_rate,
-                   AVG(t.tokens) AS avg_tokens,
-                   AVG(t.time) AS avg_time
-            FROM trials t
-            JOIN sessions s ON s.id = t.session_id
-            WHERE s.mode = 'experiment'
-            GROUP BY 1
+            f"""
+            SELECT NULLIF(method_family, '') AS method,
+                   SUM(n) AS runs,
+                   {_rollup_averages()}
+            FROM trial_rollups
+            WHERE mode = 'experiment'
+            GROUP BY method_family
             ORDER BY avg_score DESC
             """
         ).fetchall()
 
         size_summary = conn.execute(
-            """
-            SELECT t.size, 
-                   CASE WHEN t.method LIKE 'det%' THEN 'det' ELSE t.method END AS method,
-                   AVG(t.score) AS avg_score,
-                   AVG(t.success) * 100.0 AS success_rate
-            FROM trials t
-            JOIN sessions s ON s.id = t.session_id
-            WHERE s.mode = 'experiment'
-            GROUP BY t.size, 2
-            ORDER BY t.size, 2
+            f"""
+            SELECT NULLIF(size, -1) AS size,
+                   NULLIF(method_family, '') AS method,
+                   {_rollup_averages()}
+            FROM trial_rollups
+            WHERE mode = 'experiment'
+            GROUP BY size, method_family
+            ORDER BY size, method_family
             """
         ).fetchall()
 
         return {
             "sessions": [dict(r) for r in sessions],
-            "method_summary": [dict(r) for r in method_summary],
-            "size_summary": [dict(r) for r in size_summary],
+            "method_summary": _finish_rollup_rows(method_summary),
+            "size_summary": _finish_rollup_rows(size_summary, drop=("avg_tokens", "avg_time")),
         }
 
 
-def fetch_trials(session_id: int) -> List[Dict[str, Any]]:
+# -- Trial reads -----------------------------------------------------------
+# Trial reads project explicit columns (never the response blob unless asked)
+# and share the same filters; iter_trials pages by id for streaming callers.
+
+_SESSION_CREATED = {"session_created": "s.created_at"}
+_MODEL_TRIALS_FROM = "trials t JOIN sessions s ON s.id = t.session_id"
+_MODEL_TRIALS_WHERE = "s.provider = ? AND s.model = ? AND s.mode = 'experiment'"
+
+
+def _trial_projection(
+    conn: sqlite3.Connection,
+    fields: Optional[Iterable[str]] = None,
+    extra: Optional[Dict[str, str]] = None,
+) -> Tuple[str, bool]:
+    """
+    SELECT list over trials ``t`` (plus ``extra`` name -> expression) limited to
+    ``fields``, and whether ``response`` was requested. ``id`` is always
+    selected; unknown fields raise ValueError.
+    """
+    extra = extra or {}
+    columns = [row["name"] for row in conn.execute("PRAGMA table_info(trials)") if row["name"] != "response"]
+    if fields is None:
+        wanted, with_response = columns + list(extra), False
+    else:
+        wanted = list(dict.fromkeys(["id", *fields]))
+        unknown = set(wanted) - set(columns) - set(extra) - {"response"}
+        if unknown:
+            raise ValueError(f"Unknown trial field(s): {', '.join(sorted(unknown))}")
+        with_response = "response" in wanted
+        wanted = [f for f in wanted if f != "response"]
+    select = ", ".join(f"{extra[f]} AS {f}" if f in extra else f"t.{f}" for f in wanted)
+    return select, with_response
+
+
+def _trial_filters(
+    size: Optional[int] = None, method: Optional[str] = None, success: Optional[bool] = None
+) -> Tuple[List[str], List[Any]]:
+    """WHERE clauses for the size/method/success filters (method matches the family too)."""
+    clauses: List[str] = []
+    params: List[Any] = []
+    if size is not None:
+        clauses.append("t.size = ?")
+        params.append(size)
+    if method is not None:
+        clauses.append("(t.method = ? OR t.method_family = ?)")
+        params.extend([method, method])
+    if success is not None:
+        clauses.append("t.success = ?")
+        params.append(int(success))
+    return clauses, params
+
+
+def _attach_responses(conn: sqlite3.Connection, trials: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Decompress and set ``response`` on each trial dict (None when not stored)."""
+    by_id = {t["id"]: t for t in trials}
+    ids = list(by_id)
+    for trial in trials:
+        trial["response"] = None
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        rows = conn.execute(
+            "SELECT trial_id, codec, dict_id, data FROM trial_responses WHERE trial_id IN (%s)"
+            % ",".join("?" * len(chunk)),
+            chunk,
+        ).fetchall()
+        for r in rows:
+            by_id[r["trial_id"]]["response"] = _decompress_response(conn, r["codec"], r["dict_id"], r["data"])
+    return trials
+
+
+def fetch_response(trial_id: int) -> Optional[str]:
+    """Raw model response for one trial, or None."""
     with _connect() as conn:
+        row = conn.execute(
+            "SELECT codec, dict_id, data FROM trial_responses WHERE trial_id = ?", (trial_id,)
+        ).fetchone()
+        return _decompress_response(conn, row["codec"], row["dict_id"], row["data"]) if row else None
+
+
+def fetch_recorded_responses(model: Optional[str] = None, db_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Experiment responses as dicts (provider, model, size, method,
+    problem_seed, response), oldest first, for playback by the mock provider.
+
+    ``db_path`` (default: the results DB) is opened read-only and may be at
+    any schema version, so recordings can come from an unmigrated copy.
+    """
+    path = db_path or RESULTS_DB_PATH
+    if os.path.abspath(path) == os.path.abspath(RESULTS_DB_PATH):
+        flush()
+    conn = _connect_readonly(path)
+    if conn is None:
+        return []
+    try:
+        tables = {row["name"] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(trials)")}
+        blobs = "trial_responses" in tables
+        seed = "t.problem_seed" if "problem_seed" in columns else "NULL"
+        inline = "t.response" if "response" in columns else "NULL"
+        clauses = ["s.mode = 'experiment'", "t.size IS NOT NULL"]
+        params: List[Any] = []
+        if model is not None:
+            clauses.append("s.model = ?")
+            params.append(model)
         rows = conn.execute(
-            "SELECT * FROM trials WHERE session_id = ? ORDER BY trial ASC", (session_id,)
+            f"""
+            SELECT s.provider, s.model, t.size, t.method, {seed} AS problem_seed, {inline} AS inline_response,
+                   {"r.codec, r.dict_id, r.data" if blobs else "NULL AS codec, NULL AS dict_id, NULL AS data"}
+            FROM trials t JOIN sessions s ON s.id = t.session_id
+            {"LEFT JOIN trial_responses r ON r.trial_id = t.id" if blobs else ""}
+            WHERE {' AND '.join(clauses)}
+            ORDER BY t.id
+            """,
+            params,
         ).fetchall()
-        return [dict(r) for r in rows]
+        # Dictionary ids are per database, so never mix these into the process-wide cache
+        dictionaries = (
+            {row["id"]: bytes(row["data"]) for row in conn.execute("SELECT id, data FROM response_dicts")}
+            if "response_dicts" in tables else {}
+        )
+    finally:
+        conn.close()
+
+    recorded = []
+    for r in rows:
+        if r["data"] is not None:
+            response = _decompress(r["codec"], dictionaries.get(r["dict_id"]), r["data"])
+        else:
+            response = r["inline_response"]
+        if response:
+            recorded.append({
+                "provider": r["provider"],
+                "model": r["model"],
+                "size": r["size"],
+                "method": r["method"],
+                "problem_seed": r["problem_seed"],
+                "response": response,
+            })
+    return recorded
+
+
+def train_response_dictionary(sample_size: int = 2000) -> Optional[int]:
+    """
+    Build a shared compression dictionary from recent responses and make it
+    the active one for new writes. Returns the dictionary id (None without samples).
+    """
+    flush()
+    conn = _connect()
+    with conn:
+        rows = conn.execute(
+            "SELECT codec, dict_id, data FROM trial_responses ORDER BY trial_id DESC LIMIT ?",
+            (sample_size,),
+        ).fetchall()
+    samples = [_decompress_response(conn, r["codec"], r["dict_id"], r["data"]) for r in rows]
+    if not samples:
+        return None
+    codec = _response_codec()
+    if codec == "zstd":
+        data = zstandard.train_dictionary(64 * 1024, [s.encode("utf-8") for s in samples]).as_bytes()
+    else:
+        # zlib only looks back 32KB: pack the most common lines, most frequent last
+        counts = Counter(line for s in samples for line in set(s.splitlines()) if line.strip())
+        parts: List[bytes] = []
+        budget = 32 * 1024
+        for line, count in counts.most_common():
+            if count < 2:
+                break
+            encoded = (line + "\n").encode("utf-8")
+            if len(encoded) > budget:
+                continue
+            parts.append(encoded)
+            budget -= len(encoded)
+        if not parts:
+            return None
+        data = b"".join(reversed(parts))
+    with conn:
+        dict_id = conn.execute(
+            "INSERT INTO response_dicts (codec, data, created_at) VALUES (?, ?, ?)",
+            (codec, data, datetime.utcnow().isoformat()),
+        ).lastrowid
+    with _dictionary_lock:
+        _dictionaries[dict_id] = data
+        _active_dictionary_ids[codec] = dict_id
+    return dict_id
+
+
+def _has_inline_responses(conn: sqlite3.Connection) -> bool:
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(trials)")}
+    return "response" in columns and conn.execute(
+        "SELECT 1 FROM trials WHERE response IS NOT NULL LIMIT 1"
+    ).fetchone() is not None
+
+
+def backup_database(suffix: str = "bak") -> str:
+    """Consistent copy of the results DB next to it (``<path>.<timestamp>.<suffix>``); returns its path."""
+    flush()
+    path = f"{RESULTS_DB_PATH}.{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{suffix}"
+    target = sqlite3.connect(path)
+    try:
+        _connect().backup(target)
+    finally:
+        target.close()
+    return path
+
+
+def compact_responses(chunk_size: int = 500) -> Dict[str, Any]:
+    """
+    Recompress every stored response with the active codec/dictionary, drop
+    the inline trials.response copies left by the blob migration (after
+    backing the DB up), then VACUUM.
+    """
+    flush()
+    conn = _connect()
+    backup = backup_database() if _has_inline_responses(conn) else None
+    inline_dropped = 0
+    while backup:
+        with conn:
+            # Only rows whose compressed copy exists
+            dropped = conn.execute(
+                "UPDATE trials SET response = NULL WHERE id IN ("
+                "SELECT t.id FROM trials t JOIN trial_responses r ON r.trial_id = t.id "
+                "WHERE t.response IS NOT NULL LIMIT ?)",
+                (chunk_size,),
+            ).rowcount
+        inline_dropped += dropped
+        if dropped < chunk_size:
+            break
+    codec = _response_codec()
+    active = _active_dictionary_id(conn, codec)
+    recompressed = 0
+    last_id = 0
+    while True:
+        with conn:
+            rows = conn.execute(
+                "SELECT trial_id, codec, dict_id, data FROM trial_responses WHERE trial_id > ? "
+                "ORDER BY trial_id LIMIT ?",
+                (last_id, chunk_size),
+            ).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1]["trial_id"]
+            stale = [r for r in rows if r["codec"] != codec or r["dict_id"] != active]
+            conn.executemany(
+                RESPONSE_INSERT_SQL,
+                [
+                    (r["trial_id"], *_compress_response(
+                        conn, _decompress_response(conn, r["codec"], r["dict_id"], r["data"])))
+                    for r in stale
+                ],
+            )
+            recompressed += len(stale)
+    with conn:
+        raw, stored, count = conn.execute(
+            "SELECT COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(data)), 0), COUNT(*) FROM trial_responses"
+        ).fetchone()
+    conn.execute("VACUUM")
+    return {
+        "responses": count,
+        "recompressed": recompressed,
+        "inline_dropped": inline_dropped,
+        "backup": backup,
+        "codec": codec,
+        "dict_id": active,
+        "raw_bytes": raw,
+        "stored_bytes": stored,
+        "ratio": raw / stored if stored else None,
+    }
+
+
+def fetch_trials(
+    session_id: int,
+    include_response: bool = False,
+    fields: Optional[Iterable[str]] = None,
+    size: Optional[int] = None,
+    method: Optional[str] = None,
+    success: Optional[bool] = None,
+) -> List[Dict[str, Any]]:
+    with _connect() as conn:
+        select, with_response = _trial_projection(conn, fields)
+        clauses, params = _trial_filters(size, method, success)
+        rows = conn.execute(
+            f"SELECT {select} FROM trials t WHERE {' AND '.join(['t.session_id = ?', *clauses])} "
+            "ORDER BY t.trial ASC, t.id ASC",
+            (session_id, *params),
+        ).fetchall()
+        trials = [dict(r) for r in rows]
+        return _attach_responses(conn, trials) if include_response or with_response else trials
+
+
+def iter_trials(
+    session_id: Optional[int] = None,
+    provider: Optional[str] = None,
+    model: Optional[str] = None,
+    fields: Optional[Iterable[str]] = None,
+    size: Optional[int] = None,
+    method: Optional[str] = None,
+    success: Optional[bool] = None,
+    after_id: int = 0,
+    limit: Optional[int] = None,
+    include_response: bool = False,
+    chunk_size: int = 500,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream trials of one session, or of a provider/model's experiments, in id
+    order starting after ``after_id`` (keyset cursor). Reads ``chunk_size``
+    rows per query so memory stays flat. Fields are validated up front.
+    """
+    if (session_id is None) == (provider is None or model is None):
+        raise ValueError("Pass either session_id or provider and model")
+    with _connect() as conn:
+        if session_id is not None:
+            select, with_response = _trial_projection(conn, fields)
+            source, scope, scope_params = "trials t", "t.session_id = ?", [session_id]
+        else:
+            select, with_response = _trial_projection(conn, fields, _SESSION_CREATED)
+            source, scope, scope_params = _MODEL_TRIALS_FROM, _MODEL_TRIALS_WHERE, [provider, model]
+    clauses, params = _trial_filters(size, method, success)
+    sql = (
+        f"SELECT {select} FROM {source} WHERE {' AND '.join([scope, 't.id > ?', *clauses])} "
+        "ORDER BY t.id LIMIT ?"
+    )
+    with_response = include_response or with_response
+
+    def generate() -> Iterator[Dict[str, Any]]:
+        cursor, remaining = after_id, limit
+        while remaining is None or remaining > 0:
+            batch = chunk_size if remaining is None else min(chunk_size, remaining)
+            conn = _connect()
+            with conn:
+                trials = [dict(r) for r in conn.execute(sql, (*scope_params, cursor, *params, batch))]
+                if with_response:
+                    _attach_responses(conn, trials)
+            if not trials:
+                return
+            yield from trials
+            cursor = trials[-1]["id"]
+            if remaining is not None:
+                remaining -= len(trials)
+            if len(trials) < batch:
+                return
+
+    return generate()
 
 
 def fetch_conditions(session_id: int) -> List[Dict[str, Any]]:
@@ -248,67 +1769,139 @@ def fetch_conditions(session_id: int) -> List[Dict[str, Any]]:
         rows = conn.execute(
             "SELECT * FROM conditions WHERE session_id = ? ORDER BY size, method", (session_id,)
         ).fetchall()
-        return [dict(r) for r in rows]
+    conditions = []
+    for row in rows:
+        condition = dict(row)
+        condition["percentiles"] = json.loads(condition.pop("percentiles_json", None) or "null")
+        conditions.append(condition)
+    return conditions
 
 
-def fetch_model_overview() -> List[Dict[str, Any]]:
-    """Aggregate across all sessions grouped by provider/model."""
+def fetch_model_percentiles(sweep_id: Optional[int] = None) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """
+    p50/p90/p99 of each summary metric per (provider, model) over experiment
+    trials: from metric_histograms across all sessions, or from the trials
+    of one sweep (which the histograms do not key on).
+    """
+    flush()
     with _connect() as conn:
+        if sweep_id is not None:
+            rows = conn.execute(
+                f"""
+                SELECT s.provider, s.model, {", ".join(f"t.{m}" for m in SUMMARY_METRICS)}
+                FROM trials t JOIN sessions s ON s.id = t.session_id
+                WHERE s.mode = 'experiment' AND s.sweep_id = ?
+                """,
+                (sweep_id,),
+            ).fetchall()
+            return summarize_groups((dict(r) for r in rows), ("provider", "model"))
         rows = conn.execute(
             """
-            SELECT s.provider,
-                   s.model,
-                   COUNT(t.id) AS total_trials,
-                   AVG(t.score) AS avg_score,
-                   AVG(t.success) * 100.0 AS success_rate,
-                   AVG(t.tokens) AS avg_tokens,
-                   MAX(s.created_at) AS last_run
-            FROM trials t
-            JOIN sessions s ON s.id = t.session_id
-            WHERE s.mode = 'experiment'
-            GROUP BY s.provider, s.model
-            ORDER BY last_run DESC
+            SELECT NULLIF(provider, '') AS provider, NULLIF(model, '') AS model, metric, bucket, n
+            FROM metric_histograms
+            WHERE mode = 'experiment'
+            ORDER BY provider, model, metric, bucket
             """
         ).fetchall()
-        return [dict(r) for r in rows]
+    histograms: Dict[Tuple[str, str], Dict[str, List[Tuple[float, int]]]] = {}
+    for r in rows:
+        histograms.setdefault((r["provider"], r["model"]), {}).setdefault(r["metric"], []).append(
+            (r["bucket"], r["n"])
+        )
+    return {
+        key: {metric: histogram_percentiles(by_metric.get(metric, [])) for metric in SUMMARY_METRICS}
+        for key, by_metric in histograms.items()
+    }
+
+
+def fetch_model_overview(sweep_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Aggregate across all sessions grouped by provider/model, or across the
+    sessions of one sweep (summed from its trials, which the rollups do not key on).
+    ``last_run`` only counts sessions that stored a trial, so an aborted or
+    still-queued run does not move a model to the top.
+    """
+    if sweep_id is None:
+        source = "trial_rollups r"
+        params: Tuple[Any, ...] = ()
+        last_run_filter = "s.mode = 'experiment'"
+    else:
+        sums = ", ".join(f"SUM({v}) AS {c}" for v, c in zip(_rollup_values("t"), _rollup_columns()))
+        source = f"""(
+            SELECT IFNULL(s.provider, '') AS provider, IFNULL(s.model, '') AS model, s.mode AS mode, {sums}
+            FROM trials t JOIN sessions s ON s.id = t.session_id
+            WHERE s.sweep_id = ?
+            GROUP BY 1, 2, 3
+        ) r"""
+        params = (sweep_id, sweep_id)
+        last_run_filter = "s.mode = 'experiment' AND s.sweep_id = ?"
+    with _connect() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT NULLIF(r.provider, '') AS provider,
+                   NULLIF(r.model, '') AS model,
+                   SUM(r.n) AS total_trials,
+                   {_rollup_averages("r.")},
+                   (SELECT MAX(s.created_at) FROM sessions s
+                    WHERE {last_run_filter}
+                      AND IFNULL(s.provider, '') = r.provider AND IFNULL(s.model, '') = r.model
+                      AND EXISTS (SELECT 1 FROM trials t WHERE t.session_id = s.id)) AS last_run
+            FROM {source}
+            WHERE r.mode = 'experiment'
+            GROUP BY r.provider, r.model
+            ORDER BY last_run DESC
+            """,
+            params,
+        ).fetchall()
+        overview = _finish_rollup_rows(rows, drop=("avg_time",))
+    by_model = fetch_model_percentiles(sweep_id)
+    for row in overview:
+        row["percentiles"] = by_model.get((row["provider"], row["model"]))
+    return overview
 
 
-def fetch_model_trials(provider: str, model: str) -> List[Dict[str, Any]]:
+def fetch_model_trials(
+    provider: str,
+    model: str,
+    include_response: bool = False,
+    fields: Optional[Iterable[str]] = None,
+    size: Optional[int] = None,
+    method: Optional[str] = None,
+    success: Optional[bool] = None,
+) -> List[Dict[str, Any]]:
     """Return all trials for a given provider/model across sessions."""
     with _connect() as conn:
+        select, with_response = _trial_projection(conn, fields, _SESSION_CREATED)
+        clauses, params = _trial_filters(size, method, success)
         rows = conn.execute(
-            """
-            SELECT t.*, s.created_at AS session_created
-            FROM trials t
-            JOIN sessions s ON s.id = t.session_id
-            WHERE s.provider = ? AND s.model = ? AND s.mode = 'experiment'
+            f"""
+            SELECT {select}
+            FROM {_MODEL_TRIALS_FROM}
+            WHERE {' AND '.join([_MODEL_TRIALS_WHERE, *clauses])}
             ORDER BY s.created_at, t.trial
             """,
-            (provider, model),
+            (provider, model, *params),
         ).fetchall()
-        return [dict(r) for r in rows]
+        trials = [dict(r) for r in rows]
+        return _attach_responses(conn, trials) if include_response or with_response else trials
 
 
 def fetch_model_method_summary(provider: str, model: str) -> List[Dict[str, Any]]:
     """Aggregate per-method stats for a given model across sessions."""
     with _connect() as conn:
         rows = conn.execute(
-            """
-            SELECT CASE WHEN t.method LIKE 'det%' THEN 'det' ELSE t.method END AS method,
-                   COUNT(*) AS runs,
-                   AVG(t.score) AS avg_score,
-                   AVG(t.success) * 100.0 AS success_rate,
-                   AVG(t.tokens) AS avg_tokens,
-                   AVG(t.time) AS avg_time
-            FROM trials t
-            JOIN sessions s ON s.id = t.session_id
-            WHERE s.provider = ? AND s.model = ? AND s.mode = 'experiment'
-            GROUP BY 1
+            f"""
+            SELECT NULLIF(method_family, '') AS method,
+                   SUM(n) AS runs,
+                   {_rollup_averages()}
+            FROM trial_rollups
+            WHERE provider = ? AND model = ? AND mode = 'experiment'
+            GROUP BY method_family
             ORDER BY avg_score DESC
             """,
             (provider, model),
         ).fetchall()
-        return [dict(r) for r in rows]
+        return _finish_rollup_rows(rows)
 
 
 def fetch_sessions_by_model(provider: str, model: str) -> List[Dict[str, Any]]:
@@ -335,8 +1928,8 @@ def fetch_model_sessions_detailed(provider: str, model: str) -> List[Dict[str, A
                    COUNT(t.id) as total_trials,
                    AVG(t.score) as avg_score,
                    AVG(t.success) * 100.0 as success_rate,
-                   AVG(CASE WHEN t.method LIKE 'det%' THEN t.score END) as det_score,
-                   AVG(CASE WHEN t.method LIKE 'det%' THEN t.success END) * 100.0 as det_success,
+                   AVG(CASE WHEN t.method_family = 'det' THEN t.score END) as det_score,
+                   AVG(CASE WHEN t.method_family = 'det' THEN t.success END) * 100.0 as det_success,
                    AVG(CASE WHEN t.method = 'linear' THEN t.score END) as linear_score,
                    AVG(CASE WHEN t.method = 'linear' THEN t.success END) * 100.0 as linear_success
             FROM sessions s
@@ -354,22 +1947,18 @@ def fetch_model_size_summary(provider: str, model: str) -> List[Dict[str, Any]]:
     """Aggregate per-size and per-method stats for a model across all its experiments."""
     with _connect() as conn:
         rows = conn.execute(
-            """
-            SELECT t.size, 
-                   CASE WHEN t.method LIKE 'det%' THEN 'det' ELSE t.method END AS method,
-                   AVG(t.score) AS avg_score,
-                   AVG(t.success) * 100.0 AS success_rate,
-                   AVG(t.tokens) AS avg_tokens,
-                   AVG(t.time) AS avg_time
-            FROM trials t
-            JOIN sessions s ON s.id = t.session_id
-            WHERE s.provider = ? AND s.model = ? AND s.mode = 'experiment'
-            GROUP BY t.size, 2
-            ORDER BY t.size, 2
+            f"""
+            SELECT NULLIF(size, -1) AS size,
+                   NULLIF(method_family, '') AS method,
+                   {_rollup_averages()}
+            FROM trial_rollups
+            WHERE provider = ? AND model = ? AND mode = 'experiment'
+            GROUP BY size, method_family
+            ORDER BY size, method_family
             """,
             (provider, model),
         ).fetchall()
-        return [dict(r) for r in rows]
+        return _finish_rollup_rows(rows)
 
 
 def fetch_session_size_summary(session_id: int) -> List[Dict[str, Any]]:
@@ -378,7 +1967,7 @@ def fetch_session_size_summary(session_id: int) -> List[Dict[str, Any]]:
         rows = conn.execute(
             """
             SELECT t.size, 
-                   CASE WHEN t.method LIKE 'det%' THEN 'det' ELSE t.method END AS method,
+                   t.method_family AS method,
                    AVG(t.score) AS avg_score,
                    AVG(t.success) * 100.0 AS success_rate,
                    AVG(t.tokens) AS avg_tokens,
@@ -395,8 +1984,12 @@ def fetch_session_size_summary(session_id: int) -> List[Dict[str, Any]]:
 
 def delete_session(session_id: int) -> None:
     """Delete a session and all associated trials/conditions."""
+    flush()
     with _connect() as conn:
         conn.execute("DELETE FROM trials WHERE session_id = ?", (session_id,))
         conn.execute("DELETE FROM conditions WHERE session_id = ?", (session_id,))
+        conn.execute("DELETE FROM events WHERE session_id = ?", (session_id,))
+        conn.execute("DELETE FROM work_queue WHERE session_id = ?", (session_id,))
         conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+        _bump_data_version(conn)
         conn.commit()
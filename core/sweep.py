@@ -0,0 +1,120 @@
+"""
+Multi-model sweeps.
+
+Runs the full experiment for several provider/model pairs at once, one
+thread per model. Each model gets its own session (tagged with a shared
+sweep id), its own token-bucket limiter and its own HTTP connection pool,
+so wall time is bounded by the slowest model rather than the sum of all.
+"""
+import concurrent.futures
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from core import storage
+from core.experiment import ExperimentRunner
+from config.settings import (
+    GROQ_MODEL_PRESETS,
+    MOCK_MODEL_PRESETS,
+    OLLAMA_MODEL_PRESETS,
+    PROBLEM_MODE,
+    RESULTS_DIR,
+)
+
+ModelPair = Tuple[str, str]
+
+_PRESETS = {"groq": GROQ_MODEL_PRESETS, "ollama": OLLAMA_MODEL_PRESETS, "mock": MOCK_MODEL_PRESETS}
+# Providers expanded by 'all' (the mock only runs when asked for)
+_ALL_PROVIDERS = ("groq", "ollama")
+
+
+def parse_models(spec: Optional[str]) -> List[ModelPair]:
+    """
+    Expand a comma-separated model list into (provider, model) pairs.
+
+    Items are ``provider:model`` (split on the first colon, so Ollama tags
+    survive), a bare provider name for all of its presets, or ``all`` (every
+    real provider's presets).
+    """
+    pairs: List[ModelPair] = []
+    for item in (spec or "all").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if item == "all":
+            pairs += [(p, m) for p in _ALL_PROVIDERS for m in _PRESETS[p]]
+        elif item in _PRESETS:
+            pairs += [(item, m) for m in _PRESETS[item]]
+        else:
+            provider, sep, model = item.partition(":")
+            if not sep or provider not in _PRESETS or not model:
+                raise ValueError(f"Expected provider:model, a provider name or 'all', got {item!r}")
+            pairs.append((provider, model))
+    # Keep the first occurrence of each pair
+    return list(dict.fromkeys(pairs))
+
+
+def _run_model(pair: ModelPair, methods: List[str], sizes: Optional[List[int]],
+               problem_mode: str, sweep_id: int) -> Dict:
+    provider, model = pair
+    runner = ExperimentRunner(provider, model, problem_mode=problem_mode, dedicated_pool=True)
+    start = time.time()
+    results = runner.run_full_experiment(methods, sizes=sizes, sweep_id=sweep_id)
+    results["wall_time"] = round(time.time() - start, 2)
+    results["client"] = runner.llm.get_stats()
+    return results
+
+
+def run_sweep(pairs: Sequence[ModelPair], methods: Optional[List[str]] = None,
+              sizes: Optional[List[int]] = None, problem_mode: str = PROBLEM_MODE) -> Dict:
+    """Run every pair concurrently under one sweep id; a failing model does not stop the others."""
+    if not pairs:
+        raise ValueError("A sweep needs at least one provider/model pair")
+    methods = methods or ["linear", "det"]
+    storage.init_db()
+    sweep_id = storage.create_sweep({
+        "models": [f"{p}:{m}" for p, m in pairs],
+        "methods": methods,
+        "sizes": sizes,
+        "problem_mode": problem_mode,
+    })
+    print(f"🧭 Sweep {sweep_id}: {len(pairs)} models in parallel")
+
+    start = time.time()
+    runs: Dict[str, Dict] = {}
+    errors: Dict[str, str] = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(pairs), thread_name_prefix="sweep") as executor:
+        futures = {
+            executor.submit(_run_model, pair, methods, sizes, problem_mode, sweep_id): pair
+            for pair in pairs
+        }
+        for future in concurrent.futures.as_completed(futures):
+            name = "{}:{}".format(*futures[future])
+            try:
+                runs[name] = future.result()
+                print(f"✅ {name} finished in {runs[name]['wall_time']}s")
+            except Exception as e:
+                errors[name] = str(e)
+                print(f"❌ {name} failed: {e}")
+    storage.flush()
+
+    results = {
+        "sweep_id": sweep_id,
+        "timestamp": datetime.now().isoformat(),
+        "wall_time": round(time.time() - start, 2),
+        "runs": runs,
+        "errors": errors,
+        "overview": storage.fetch_model_overview(sweep_id=sweep_id),
+    }
+    _save_sweep(results)
+    return results
+
+
+def _save_sweep(results: Dict) -> None:
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    filepath = os.path.join(RESULTS_DIR, f"sweep_{results['sweep_id']}.json")
+    with open(filepath, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"\n✅ Sweep results saved to {filepath}")
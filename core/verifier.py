@@ -0,0 +1,105 @@
+"""
+Ground-truth verification of extracted answers.
+
+A ``SystemVerifier`` wraps the compiled ``LinearSystem`` of one equation
+system (``data.linear_system``) and checks assignments by their residuals
+``A·x − b``. ``verify_many`` stacks any number of responses into a
+matrix so a whole rescoring chunk is checked in one NumPy call.
+
+An answer is correct when every variable is assigned and each equation's
+residual is within ``VERIFY_RTOL`` of its scale (Σ|a_ij|·max(|x_j|, 1) + |b_i|),
+which tolerates answers rounded to a couple of decimals.
+
+Systems without a unique solution (rank-deficient or inconsistent, or a
+system dict whose ``solution`` is None, like the legacy 7-variable one)
+cannot be checked: their verdicts are None, so ``accuracy`` leaves them out.
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from config.settings import VERIFY_RTOL
+from data.linear_system import LinearSystem, get_linear_system
+
+
+class SystemVerifier:
+    """Residual checks against one compiled system."""
+
+    def __init__(self, system: LinearSystem, rtol: float = VERIFY_RTOL, verifiable: Optional[bool] = None):
+        self.system = system
+        self.variables = system.variables
+        self.rtol = rtol
+        # Only a unique solution makes "correct" meaningful
+        self.verifiable = _has_unique_solution(system) if verifiable is None else verifiable
+
+    def residuals(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Max absolute and max scaled residual per row of ``X``."""
+        R = np.abs(self.system.residuals(X))
+        scale = self.system.matvec(np.maximum(np.abs(X), 1.0), absolute=True) + np.abs(self.system.b)
+        return R.max(axis=1, initial=0.0), (R / scale).max(axis=1, initial=0.0)
+
+    def verify_many(self, assignments: Sequence[Mapping[str, float]]) -> Tuple[np.ndarray, np.ndarray]:
+        """(correct, max_residual) arrays for a batch of assignment dicts (NaN residual if incomplete)."""
+        if not len(assignments):
+            return np.zeros(0, dtype=bool), np.zeros(0)
+        X = self.system.vectorize(assignments)
+        complete = ~np.isnan(X).any(axis=1)
+        max_residual, relative = self.residuals(np.where(complete[:, None], X, 0.0))
+        max_residual[~complete] = np.nan
+        return complete & (relative <= self.rtol), max_residual
+
+    def verify(self, assignments: Mapping[str, float]) -> Dict:
+        if not self.verifiable:
+            return {"correct": None, "max_residual": None}
+        correct, max_residual = self.verify_many([assignments])
+        residual = float(max_residual[0])
+        return {"correct": bool(correct[0]), "max_residual": None if np.isnan(residual) else residual}
+
+
+def _has_unique_solution(system: LinearSystem) -> bool:
+    A = system.A
+    if A.shape[0] < A.shape[1]:
+        return False
+    augmented = np.column_stack([A, system.b])
+    return np.linalg.matrix_rank(A) == A.shape[1] == np.linalg.matrix_rank(augmented)
+
+
+@lru_cache(maxsize=512)
+def _get_verifier(system: LinearSystem, verifiable: Optional[bool] = None) -> SystemVerifier:
+    return SystemVerifier(system, verifiable=verifiable)
+
+
+def get_verifier(system: Union[LinearSystem, Mapping]) -> SystemVerifier:
+    """Verifier for a compiled system or a ``data.equations`` / ``data.generator`` dict (memoized)."""
+    unsolvable = isinstance(system, Mapping) and "solution" in system and system["solution"] is None
+    return _get_verifier(get_linear_system(system), False if unsolvable else None)
+
+
+def verify_results(results: List[Tuple[Mapping, Dict]]) -> None:
+    """
+    Add ``correct`` / ``max_residual`` to (system, score_result) pairs in
+    place, with one vectorized check per distinct system (None for systems
+    that cannot be verified).
+    """
+    groups: Dict[int, List[Dict]] = {}
+    verifiers: Dict[int, SystemVerifier] = {}
+    for system, result in results:
+        verifier = get_verifier(system)
+        verifiers[id(verifier)] = verifier
+        groups.setdefault(id(verifier), []).append(result)
+    for key, group in groups.items():
+        if not verifiers[key].verifiable:
+            for result in group:
+                result["correct"] = result["max_residual"] = None
+            continue
+        correct, max_residual = verifiers[key].verify_many([r["assignments"] for r in group])
+        for result, ok, residual in zip(group, correct, max_residual):
+            result["correct"] = bool(ok)
+            result["max_residual"] = None if np.isnan(residual) else float(residual)
+
+
+def accuracy(results: Iterable[Mapping]) -> Optional[float]:
+    """Percent of verified results that are correct (None when none were verified)."""
+    verified = [r["correct"] for r in results if r.get("correct") is not None]
+    return round(sum(verified) / len(verified) * 100, 1) if verified else None
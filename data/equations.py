@@ -1,6 +1,12 @@
 """
 Test equations for the experiment.
+
+The three hand-written systems below are the legacy baseline; any other size,
+or an explicit seed, comes from ``data.generator``.
 """
+from typing import Optional
+
+from data.generator import get_generated
 
 # 3-Variable System (Baseline)
 EQUATIONS_3VAR = {
@@ -25,7 +31,7 @@ EQUATIONS_5VAR = {
         "3x - y + 2z - w - v = 7",
         "x + y - z + w + 2v = 6"
     ],
-    "solution":  None  # Will be calculated
+    "solution":  {"x": 74/33, "y": 10/33, "z": 20/11, "w": 28/33, "v": 73/33}
 }
 
 # 7-Variable System (Linear Collapses)
@@ -41,6 +47,9 @@ EQUATIONS_7VAR = {
         "4x + 2y - z - 3w + v - u = 10",
         "x + 3y + 2z - w - v + 2u = 8"
     ],
+    # No solution: t never appears and the 7 equations in 6 unknowns are
+    # inconsistent (rank 6, augmented rank 7). Kept as-is for comparability
+    # with stored results; use a generated system for a solvable 7-variable run.
     "solution": None
 }
 
@@ -50,6 +59,11 @@ ALL_EQUATIONS = {
     7: EQUATIONS_7VAR
 }
 
-def get_equations(size: int) -> dict:
-    """Get equations by size."""
-    return ALL_EQUATIONS. get(size, EQUATIONS_3VAR)
\ No newline at end of file
+def get_equations(size: int, seed: Optional[int] = None) -> dict:
+    """
+    Get equations by size. Without a seed, sizes 3/5/7 return the legacy
+    systems; other sizes (or any seed) return a generated system.
+    """
+    if seed is None and size in ALL_EQUATIONS:
+        return ALL_EQUATIONS[size]
+    return get_generated(size, seed or 0)
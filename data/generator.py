@@ -0,0 +1,159 @@
+"""
+Procedural linear-system generator.
+
+Builds seeded, well-conditioned integer systems of any size with an exact
+rational solution, so experiments are not limited to the three hand-written
+systems in ``data.equations``. Generated suites are cached on disk as JSON.
+"""
+import json
+import os
+import random
+from fractions import Fraction
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config.settings import EQUATIONS_CACHE_DIR
+from data.linear_system import LEGACY_VARIABLES, LinearSystem, register
+
+# Bump when the generation procedure changes so stale suite files are ignored
+GENERATOR_VERSION = 1
+
+# Condition-number budget per variable; random integer matrices above it are redrawn
+MAX_CONDITION_PER_VARIABLE = 25.0
+
+
+def variable_names(size: int) -> List[str]:
+    """x, y, z, w, v, u, t for up to 7 variables, x1..xN beyond that."""
+    if size <= len(LEGACY_VARIABLES):
+        return LEGACY_VARIABLES[:size]
+    return [f"x{i}" for i in range(1, size + 1)]
+
+
+def solve_exact(matrix: Sequence[Sequence[int]], rhs: Sequence) -> List[Fraction]:
+    """Gauss-Jordan elimination over Fractions; raises ValueError if the system is singular."""
+    n = len(matrix)
+    rows = [[Fraction(v) for v in row] + [Fraction(b)] for row, b in zip(matrix, rhs)]
+    for col in range(n):
+        pivot = next((r for r in range(col, n) if rows[r][col] != 0), None)
+        if pivot is None:
+            raise ValueError("Singular system")
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        pivot_value = rows[col][col]
+        rows[col] = [v / pivot_value for v in rows[col]]
+        for r in range(n):
+            if r != col and rows[r][col] != 0:
+                factor = rows[r][col]
+                rows[r] = [a - factor * b for a, b in zip(rows[r], rows[col])]
+    return [row[n] for row in rows]
+
+
+def _random_matrix(rng: random.Random, size: int, coefficient_range: int) -> List[List[int]]:
+    # Roughly a quarter of the terms are absent, like the hand-written systems
+    return [
+        [0 if rng.random() < 0.25 else rng.choice([c for c in range(-coefficient_range, coefficient_range + 1) if c])
+         for _ in range(size)]
+        for _ in range(size)
+    ]
+
+
+def generate_system(size: int, seed: int = 0, coefficient_range: int = 5,
+                    value_range: int = 9, integer_solution: bool = True) -> Dict:
+    """
+    Generate a well-conditioned ``size``-variable system.
+
+    With ``integer_solution`` the solution is drawn from [-value_range,
+    value_range] and the right-hand side follows from it; otherwise the
+    right-hand side is drawn and the (rational) solution is solved exactly.
+    The compiled ``LinearSystem`` is registered with ``data.linear_system``.
+    Returns the same shape as the entries in ``data.equations`` plus ``seed``,
+    ``matrix``, ``rhs`` and ``solution_exact`` (Fractions).
+    """
+    if size < 1:
+        raise ValueError("size must be positive")
+    rng = random.Random(f"{GENERATOR_VERSION}:{size}:{seed}")
+    variables = variable_names(size)
+    max_condition = MAX_CONDITION_PER_VARIABLE * max(size, 2)
+    while True:
+        matrix = _random_matrix(rng, size, coefficient_range)
+        if any(sum(1 for c in row if c) < min(2, size) for row in matrix):
+            continue
+        if np.linalg.cond(np.array(matrix, dtype=float)) > max_condition:
+            continue
+        if integer_solution:
+            solution = [Fraction(rng.randint(-value_range, value_range)) for _ in range(size)]
+            rhs = [sum(a * x for a, x in zip(row, solution)) for row in matrix]
+        else:
+            rhs = [Fraction(rng.randint(-value_range * coefficient_range, value_range * coefficient_range))
+                   for _ in range(size)]
+            try:
+                solution = solve_exact(matrix, rhs)
+            except ValueError:
+                continue
+        break
+
+    rhs_out = [int(b) if b.denominator == 1 else str(b) for b in rhs]
+    # Compiled from the matrix and memoized, so consumers never re-parse the strings
+    system = register(LinearSystem.from_dense(matrix, rhs_out, variables))
+    return {
+        "size": size,
+        "seed": seed,
+        "variables": variables,
+        "equations": list(system.equations),
+        "matrix": matrix,
+        "rhs": rhs_out,
+        "solution": {v: float(x) for v, x in zip(variables, solution)},
+        "solution_exact": dict(zip(variables, solution)),
+    }
+
+
+# Systems loaded through get_suite, so per-trial lookups reuse the on-disk cache
+_suite_systems: Dict[tuple, Dict] = {}
+
+
+@lru_cache(maxsize=4096)
+def _cached_system(size: int, seed: int) -> Dict:
+    return generate_system(size, seed)
+
+
+def get_generated(size: int, seed: int = 0) -> Dict:
+    """Memoized ``generate_system`` with default parameters (callers must not mutate the result)."""
+    return _suite_systems.get((size, seed)) or _cached_system(size, seed)
+
+
+def _to_json(system: Dict) -> Dict:
+    out = dict(system)
+    out["solution_exact"] = {v: str(x) for v, x in system["solution_exact"].items()}
+    return out
+
+
+def _from_json(data: Dict) -> Dict:
+    data["solution_exact"] = {v: Fraction(x) for v, x in data["solution_exact"].items()}
+    register(LinearSystem.from_dense(data["matrix"], data["rhs"], data["variables"]))
+    return data
+
+
+def get_suite(size: int, count: int, base_seed: int = 0,
+              cache_dir: Optional[str] = EQUATIONS_CACHE_DIR) -> List[Dict]:
+    """
+    ``count`` distinct systems (seeds base_seed..base_seed+count-1), read from
+    the on-disk cache when present and written there otherwise.
+    """
+    path = None
+    if cache_dir:
+        path = os.path.join(cache_dir, f"suite_v{GENERATOR_VERSION}_n{size}_s{base_seed}_c{count}.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                suite = [_from_json(s) for s in json.load(f)]
+            _suite_systems.update(((size, s["seed"]), s) for s in suite)
+            return suite
+    suite = [generate_system(size, base_seed + i) for i in range(count)]
+    _suite_systems.update(((size, s["seed"]), s) for s in suite)
+    if path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump([_to_json(s) for s in suite], f)
+        os.replace(tmp, path)
+    return suite
@@ -0,0 +1,226 @@
+"""
+Compiled representation of a linear equation system.
+
+Equations are parsed once into a ``LinearSystem``: variable order and index,
+coefficients in COO form (row, col, value), the right-hand side, and a dense
+matrix built lazily on first use. Systems are memoized per equation tuple,
+so prompts, scoring and verification of the same system share one parse.
+
+Parsing is a single regex pass per equation and products use the sparse
+form when the matrix is mostly zeros, so large sparse systems never pay for
+a dense n×n matrix or quadratic string work.
+"""
+import re
+from fractions import Fraction
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+LEGACY_VARIABLES = ["x", "y", "z", "w", "v", "u", "t"]
+
+# Products use the COO form below this fraction of non-zero coefficients
+SPARSE_MAX_DENSITY = 0.1
+
+_TERM = re.compile(r'([+-]?)\s*(\d+(?:\.\d+)?(?:/\d+)?)?\s*\*?\s*([A-Za-z]\w*)')
+_NAME = re.compile(r'([A-Za-z]+)(\d*)$')
+
+
+def _variable_order(name: str):
+    """x, y, z, w, v, u, t first, then natural order (x2 before x10)."""
+    if name in LEGACY_VARIABLES:
+        return (0, LEGACY_VARIABLES.index(name), "", 0)
+    match = _NAME.match(name)
+    if match:
+        return (1, 0, match.group(1), int(match.group(2) or 0))
+    return (2, 0, name, 0)
+
+
+def format_equation(coefficients: Sequence, variables: Sequence[str], rhs) -> str:
+    """Render one row like '2x + 3y - z = 1' (zero terms dropped, unit coefficients implicit)."""
+    terms = []
+    for coef, var in zip(coefficients, variables):
+        if coef == 0:
+            continue
+        magnitude = "" if abs(coef) == 1 else str(_plain(abs(coef)))
+        if not terms:
+            terms.append(f"{'-' if coef < 0 else ''}{magnitude}{var}")
+        else:
+            terms.append(f"{'-' if coef < 0 else '+'} {magnitude}{var}")
+    return f"{' '.join(terms)} = {rhs}"
+
+
+def parse_equation(equation: str) -> Tuple[Dict[str, Fraction], Fraction]:
+    """{variable: coefficient} and right-hand side of 'ax + by - z = c'."""
+    lhs, sep, rhs = equation.partition("=")
+    if not sep:
+        raise ValueError(f"Not an equation: {equation!r}")
+    terms: Dict[str, Fraction] = {}
+    for sign, magnitude, var in _TERM.findall(lhs):
+        value = Fraction(magnitude) if magnitude else Fraction(1)
+        terms[var] = terms.get(var, Fraction(0)) + (-value if sign == "-" else value)
+    return terms, Fraction(rhs.strip())
+
+
+class LinearSystem:
+    """
+    ``A·x = b`` over named variables.
+
+    ``rows``/``cols``/``values`` hold the non-zero coefficients (COO);
+    ``A`` is the dense matrix, built on first access. ``sparse`` selects the
+    product path and defaults to the density of the system.
+    """
+
+    def __init__(self, variables: Sequence[str], rows: np.ndarray, cols: np.ndarray,
+                 values: np.ndarray, b: np.ndarray, equations: Optional[Sequence[str]] = None,
+                 sparse: Optional[bool] = None):
+        self.variables = tuple(variables)
+        self.index = {v: i for i, v in enumerate(self.variables)}
+        self.b = np.asarray(b, dtype=float)
+        self.shape = (len(self.b), len(self.variables))
+        # Row-major order with duplicate (row, col) entries summed and zeros dropped
+        flat = np.asarray(rows, dtype=np.intp) * self.shape[1] + np.asarray(cols, dtype=np.intp)
+        keys, inverse = np.unique(flat, return_inverse=True)
+        summed = np.zeros(len(keys))
+        np.add.at(summed, inverse, np.asarray(values, dtype=float))
+        keep = summed != 0
+        self.rows, self.cols = np.divmod(keys[keep], max(1, self.shape[1]))
+        self.values = summed[keep]
+        self._equations = tuple(equations) if equations is not None else None
+        self._dense: Optional[np.ndarray] = None
+        if sparse is None:
+            sparse = self.nnz < SPARSE_MAX_DENSITY * max(1, self.shape[0] * self.shape[1])
+        self.sparse = sparse
+        # Segment starts per non-empty row, for reduceat in the sparse product
+        self._row_ids, self._row_starts = np.unique(self.rows, return_index=True)
+
+    # -- construction --------------------------------------------------------
+
+    @classmethod
+    def from_equations(cls, equations: Sequence[str], variables: Optional[Sequence[str]] = None,
+                       sparse: Optional[bool] = None) -> "LinearSystem":
+        """Parse equation strings; ``variables`` fixes the column order (default: inferred)."""
+        parsed = [parse_equation(eq) for eq in equations]
+        if variables is None:
+            variables = sorted({v for terms, _ in parsed for v in terms}, key=_variable_order)
+        index = {v: i for i, v in enumerate(variables)}
+        rows, cols, values = [], [], []
+        for r, (terms, _) in enumerate(parsed):
+            for var, coef in terms.items():
+                if var not in index:
+                    raise ValueError(f"Unknown variable {var!r} in {equations[r]!r}")
+                if coef:
+                    rows.append(r)
+                    cols.append(index[var])
+                    values.append(float(coef))
+        b = [float(rhs) for _, rhs in parsed]
+        return cls(variables, np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp),
+                   np.array(values), np.array(b), equations=equations, sparse=sparse)
+
+    @classmethod
+    def from_dense(cls, matrix: Sequence[Sequence], rhs: Sequence, variables: Sequence[str],
+                   sparse: Optional[bool] = None) -> "LinearSystem":
+        """Build from a coefficient matrix; ``rhs`` entries may be ints, Fractions or 'p/q' strings."""
+        A = np.asarray(matrix, dtype=float).reshape(len(rhs), len(variables))
+        rows, cols = np.nonzero(A)
+        system = cls(variables, rows, cols, A[rows, cols], [float(Fraction(str(v))) for v in rhs],
+                     sparse=sparse)
+        system._dense = A
+        system._equations = tuple(
+            format_equation(row, system.variables, value) for row, value in zip(matrix, rhs)
+        )
+        return system
+
+    # -- views ---------------------------------------------------------------
+
+    @property
+    def nnz(self) -> int:
+        return len(self.values)
+
+    @property
+    def A(self) -> np.ndarray:
+        if self._dense is None:
+            dense = np.zeros(self.shape)
+            dense[self.rows, self.cols] = self.values
+            self._dense = dense
+        return self._dense
+
+    @property
+    def equations(self) -> Tuple[str, ...]:
+        """Equation strings (rendered from the coefficients if the system was not parsed)."""
+        if self._equations is None:
+            cells: List[Dict[int, float]] = [{} for _ in range(self.shape[0])]
+            for r, c, v in zip(self.rows, self.cols, self.values):
+                cells[r][c] = v
+            self._equations = tuple(
+                format_equation([row[c] for c in sorted(row)], [self.variables[c] for c in sorted(row)], _plain(b))
+                for row, b in zip(cells, self.b)
+            )
+        return self._equations
+
+    @property
+    def used_variables(self) -> Tuple[str, ...]:
+        """Variables with at least one non-zero coefficient."""
+        return tuple(self.variables[c] for c in np.unique(self.cols))
+
+    # -- arithmetic ------------------------------------------------------------
+
+    def vectorize(self, assignments: Iterable[Mapping[str, float]]) -> np.ndarray:
+        """Stack assignment dicts into a (k, n) matrix; missing variables are NaN."""
+        rows = [[a.get(v, np.nan) for v in self.variables] for a in assignments]
+        return np.array(rows, dtype=float).reshape(len(rows), self.shape[1])
+
+    def matvec(self, X: np.ndarray, absolute: bool = False) -> np.ndarray:
+        """``X @ A.T`` for a (k, n) batch of solutions (``|A|`` with ``absolute``)."""
+        X = np.atleast_2d(X)
+        values = np.abs(self.values) if absolute else self.values
+        if not self.sparse:
+            A = np.abs(self.A) if absolute else self.A
+            return X @ A.T
+        out = np.zeros((X.shape[0], self.shape[0]))
+        if self.nnz:
+            products = X[:, self.cols] * values
+            out[:, self._row_ids] = np.add.reduceat(products, self._row_starts, axis=1)
+        return out
+
+    def residuals(self, X: np.ndarray) -> np.ndarray:
+        """``A·x − b`` for each row of ``X``, shape (k, m)."""
+        return self.matvec(X) - self.b
+
+    def __repr__(self) -> str:
+        kind = "sparse" if self.sparse else "dense"
+        return f"LinearSystem({self.shape[0]}x{self.shape[1]}, nnz={self.nnz}, {kind})"
+
+
+def _plain(value) -> Union[int, float, str]:
+    """Render coefficients like the hand-written systems: 3, not 3.0; fractions as 'p/q'."""
+    value = Fraction(str(value)) if not isinstance(value, Fraction) else value
+    if value.denominator == 1:
+        return int(value)
+    return str(value)
+
+
+# Systems built from a matrix (data.generator), keyed like the parse memo below
+_prebuilt: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], LinearSystem] = {}
+
+
+def register(system: LinearSystem) -> LinearSystem:
+    """Make an already-built system the memoized one, so its equations are never re-parsed."""
+    return _prebuilt.setdefault((system.equations, system.variables), system)
+
+
+@lru_cache(maxsize=512)
+def _compile(equations: Tuple[str, ...], variables: Optional[Tuple[str, ...]]) -> LinearSystem:
+    return _prebuilt.get((equations, variables)) or LinearSystem.from_equations(equations, variables)
+
+
+def compile_equations(equations: Sequence[str], variables: Optional[Sequence[str]] = None) -> LinearSystem:
+    """Memoized ``LinearSystem.from_equations`` (variables inferred when not given)."""
+    return _compile(tuple(equations), tuple(variables) if variables is not None else None)
+
+
+def get_linear_system(system: Union[LinearSystem, Mapping]) -> LinearSystem:
+    """Compiled system for a ``data.equations`` / ``data.generator`` dict (memoized)."""
+    if isinstance(system, LinearSystem):
+        return system
+    return compile_equations(system["equations"], system["variables"])
@@ -4,6 +4,16 @@ DET Linear Solver - Main Entry Point (Consolidated)
 Usage: 
     python3 main.py --mode demo --provider ollama --model deepseek-v3.1:671b-cloud
     python3 main.py --mode experiment --provider ollama --model deepseek-v3.1:671b-cloud
+    python3 main.py --mode experiment --cache replay   # re-score recorded responses offline
+    python3 main.py --mode experiment --resume 12      # finish an interrupted session
+    python3 main.py --mode experiment --sizes 3,10,20 --problems per_trial
+    python3 main.py --mode experiment --distributed    # queue trials, then start workers:
+    python3 main.py --mode worker
+    python3 main.py --mode sweep --models groq,ollama:qwen3-coder:480b-cloud
+    python3 main.py --mode experiment --provider mock --model recorded   # offline playback
+    python3 main.py --mode rescore --only-stale
+    python3 main.py --mode compact --train-dict        # recompress responses, drop legacy copies (backs up first)
+    python3 main.py --mode bench --baseline data/results/bench/bench_20250101_120000.json
 """
 
 import argparse
@@ -15,8 +25,12 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from config.settings import (
     LLM_PROVIDER,
     MODEL_NAME,
+    MOCK_MODEL_NAME,
     GROQ_MODEL_PRESETS,
     OLLAMA_MODEL_PRESETS,
+    RESPONSE_CACHE_MODE,
+    EXPERIMENT_SIZES,
+    PROBLEM_MODE,
 )
 
 def test_connection(provider: str, model: str):
@@ -143,6 +157,7 @@ def run_demo(provider: str, model: str):
                 "response": response[:500],
                 "variables_found": score_result["variables_found"],
                 "assignments": score_result["assignments"],
+                "scorer_version": score_result["scorer_version"],
             },
         )
 
@@ -156,19 +171,132 @@ def run_demo(provider: str, model: str):
         print(f"  {name:<12}: {score:5.1f}/100 {status}")
 
 
-def run_full_experiment(methods=None, provider=None, model_name=None):
-    """Run the full experiment comparing Linear vs DET."""
+def run_full_experiment(methods=None, provider=None, model_name=None, resume_session_id=None,
+                        distributed=False, sizes=None, problem_mode=PROBLEM_MODE):
+    """Run the full experiment comparing Linear vs DET (or finish a stored session)."""
     from core.experiment import run_experiment
     from analysis.visualize import print_summary, create_visualizations
 
     if methods is None:
         methods = ["linear", "det"]
 
-    results = run_experiment(methods, provider=provider, model_name=model_name)
+    results = run_experiment(methods, provider=provider, model_name=model_name,
+                             resume_session_id=resume_session_id, distributed=distributed,
+                             sizes=sizes, problem_mode=problem_mode)
     print_summary(results)
     create_visualizations(results)
 
 
+def run_model_sweep(models=None, sizes=None, problem_mode=PROBLEM_MODE):
+    """Run the full experiment for several provider/model pairs concurrently."""
+    from core.sweep import parse_models, run_sweep
+
+    pairs = parse_models(models)
+    print("=" * 60)
+    print(f"🧭 SWEEP: {', '.join(f'{p}:{m}' for p, m in pairs)}")
+    print("=" * 60)
+
+    results = run_sweep(pairs, sizes=sizes, problem_mode=problem_mode)
+
+    print("\n" + "=" * 60)
+    print(f"📊 SWEEP {results['sweep_id']} SUMMARY ({results['wall_time']}s wall time)")
+    print("=" * 60)
+    for row in results["overview"]:
+        accuracy = f"{row['accuracy']:5.1f}%" if row["accuracy"] is not None else "   n/a"
+        name = f"{row['provider']}:{row['model']}"
+        print(f"  {name:<36} score {row['avg_score']:5.1f} | "
+              f"success {row['success_rate']:5.1f}% | accuracy {accuracy} | {row['total_trials']} trials")
+        latency = (row.get("percentiles") or {}).get("latency")
+        if latency:
+            print(f"  {'':<36} latency p50 {latency['p50']:.2f}s | p90 {latency['p90']:.2f}s | p99 {latency['p99']:.2f}s")
+    for name, error in results["errors"].items():
+        print(f"  ❌ {name}: {error}")
+
+
+def run_worker(idle_exit=None):
+    """Serve queued trials from distributed experiments until stopped."""
+    from core import storage
+    from core.distributed import TrialWorker
+    from core.llm_client import run_sync
+
+    storage.init_db()
+    worker = TrialWorker()
+    print(f"👷 Worker {worker.worker_id} waiting for queued trials (Ctrl+C to stop)")
+    stats = run_sync(worker.run(idle_exit=idle_exit))
+    print(f"✅ Worker done: {stats['completed']} completed, {stats['failed']} failed, "
+          f"{stats['lost_leases']} lost leases")
+
+
+def rescore(chunk_size: int, workers=None, session_id=None, only_stale: bool = False):
+    """Re-score stored trials in parallel with the current scorer."""
+    print("=" * 60)
+    print("🔁 RESCORING STORED TRIALS")
+    print("=" * 60)
+
+    from core.rescore import rescore_trials
+    rescore_trials(chunk_size=chunk_size, workers=workers, session_id=session_id, only_stale=only_stale)
+
+
+def rebuild_rollups():
+    """Recompute dashboard rollup tables from trials and report any drift."""
+    from core import storage
+
+    storage.init_db()
+    report = storage.rebuild_rollups()
+    if report["drifted"]:
+        print(f"⚠️  {len(report['drifted'])} of {report['groups']} rollup groups had drifted (now rebuilt):")
+        for key in report["drifted"]:
+            print(f"   {key}")
+    else:
+        print(f"✅ Rollups consistent ({report['groups']} groups)")
+
+
+def compact_responses(train_dict: bool = False):
+    """Recompress stored responses (optionally with a freshly trained dictionary)."""
+    from core import storage
+
+    storage.init_db()
+    if train_dict:
+        dict_id = storage.train_response_dictionary()
+        print(f"📚 Trained response dictionary: {dict_id}" if dict_id else "⚠️  Not enough responses to train a dictionary")
+    report = storage.compact_responses()
+    if report["backup"]:
+        print(f"💾 Backed up the results DB to {report['backup']} "
+              f"before dropping {report['inline_dropped']} legacy inline responses")
+    ratio = f"{report['ratio']:.1f}x" if report["ratio"] else "n/a"
+    print(
+        f"✅ {report['responses']} responses ({report['recompressed']} recompressed, {report['codec']}): "
+        f"{report['raw_bytes'] / 1e6:.1f} MB raw -> {report['stored_bytes'] / 1e6:.1f} MB stored ({ratio})"
+    )
+
+
+def run_benchmark_suite(suites=None, trial_counts=None, concurrency_levels=None, baseline=None):
+    """Run the throughput benchmarks and compare them against a baseline report."""
+    from benchmarks import run_benchmarks
+    from benchmarks.scheduler_bench import CONCURRENCY_LEVELS
+    from benchmarks.storage_bench import TRIAL_COUNTS
+
+    print("=" * 60)
+    print("⏱️  BENCHMARKS")
+    print("=" * 60)
+    report = run_benchmarks(suites, trial_counts or TRIAL_COUNTS, concurrency_levels or CONCURRENCY_LEVELS,
+                            baseline_path=baseline)
+
+    print("\n" + "=" * 60)
+    for name, metric in report["metrics"].items():
+        print(f"  {name:<42} {metric['value']:>12,.1f} {metric['unit']}")
+    comparison = report.get("comparison")
+    if comparison:
+        print(f"\n📏 Against baseline {comparison['baseline']} (tolerance {comparison['tolerance'] * 100:.0f}%):")
+        for row in comparison["metrics"]:
+            mark = "❌" if row["regression"] else "  "
+            print(f"  {mark} {row['name']:<42} {row['change']:+7.1f}%")
+    print(f"\n✅ Benchmark report saved to {report['path']}")
+    if comparison and comparison["regressions"]:
+        print(f"❌ {len(comparison['regressions'])} regression(s)")
+        sys.exit(1)
+
+
 def analyze_results():
     """Analyze existing results."""
     from analysis.visualize import analyze
@@ -181,32 +309,148 @@ def main():
     )
     parser.add_argument(
         "--mode",
-        choices=["test", "demo", "experiment", "analyze"],
+        choices=["test", "demo", "experiment", "sweep", "analyze", "rescore", "rollups", "compact", "worker",
+                 "bench"],
         default="demo",
         help="Execution mode",
     )
     parser.add_argument(
         "--provider",
-        choices=["groq", "ollama"],
+        choices=["groq", "ollama", "mock"],
         default=LLM_PROVIDER,
         help="LLM provider to use",
     )
     parser.add_argument(
         "--model",
-        default=MODEL_NAME,
-        help="Model name.",
+        default=None,
+        help="Model name (mock: synthetic, recorded or a recorded model's name).",
+    )
+    parser.add_argument(
+        "--cache",
+        choices=["off", "read_through", "record", "replay"],
+        default=RESPONSE_CACHE_MODE,
+        help="Response cache mode (replay serves recorded responses only, for offline re-runs)",
+    )
+
+    parser.add_argument(
+        "--models",
+        default=None,
+        help="Sweep: comma-separated provider:model pairs, or 'groq' / 'ollama' / 'mock' / 'all' for presets "
+             "(default: all, which leaves out the mock)",
+    )
+
+    parser.add_argument(
+        "--resume",
+        type=int,
+        default=None,
+        metavar="SESSION_ID",
+        help="Experiment: run only the trials missing from a stored session, then recompute its conditions",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(n) for n in value.split(",") if n.strip()],
+        default=EXPERIMENT_SIZES,
+        help="Experiment/sweep: comma-separated system sizes (3/5/7 use the hand-written systems)",
+    )
+    parser.add_argument(
+        "--problems",
+        choices=["fixed", "per_trial"],
+        default=PROBLEM_MODE,
+        help="Experiment/sweep: one system per size, or a distinct generated system per trial",
+    )
+    parser.add_argument(
+        "--distributed",
+        action="store_true",
+        help="Experiment: queue trials for --mode worker processes and wait for them",
+    )
+    parser.add_argument(
+        "--idle-exit",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Worker: exit after the queue has been empty this long (default: run until stopped)",
+    )
+    parser.add_argument(
+        "--bench",
+        type=lambda value: [s.strip() for s in value.split(",") if s.strip()],
+        default=None,
+        help="Bench: comma-separated suites out of scorer, storage, e2e (default: all)",
+    )
+    parser.add_argument(
+        "--bench-trials",
+        type=lambda value: [int(n) for n in value.split(",") if n.strip()],
+        default=None,
+        help="Bench: storage table sizes in trials (default: 10000,100000)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=lambda value: [int(n) for n in value.split(",") if n.strip()],
+        default=None,
+        help="Bench: end-to-end concurrency levels (default: 1,8,32,128)",
+    )
+    parser.add_argument(
+        "--baseline",
+        default=None,
+        metavar="REPORT",
+        help="Bench: earlier report to compare against; exits non-zero on regressions",
+    )
+    parser.add_argument(
+        "--session",
+        type=int,
+        default=None,
+        help="Rescore: limit to one session id",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=2000,
+        help="Rescore: rows read, scored and written per batch",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Rescore: scoring processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--only-stale",
+        action="store_true",
+        help="Rescore: skip trials already scored by the current scorer version",
+    )
+    parser.add_argument(
+        "--train-dict",
+        action="store_true",
+        help="Compact: train a shared compression dictionary from stored responses first",
     )
 
     args = parser.parse_args()
+    if args.model is None:
+        args.model = MOCK_MODEL_NAME if args.provider == "mock" else MODEL_NAME
+
+    from core.response_cache import configure_response_cache
+    configure_response_cache(args.cache)
 
     if args.mode == "test":
         test_connection(args.provider, args.model)
     elif args.mode == "demo":
         run_demo(args.provider, args.model)
     elif args.mode == "experiment":
-        run_full_experiment(provider=args.provider, model_name=args.model)
+        run_full_experiment(provider=args.provider, model_name=args.model, resume_session_id=args.resume,
+                            distributed=args.distributed, sizes=args.sizes, problem_mode=args.problems)
+    elif args.mode == "sweep":
+        run_model_sweep(args.models, sizes=args.sizes, problem_mode=args.problems)
     elif args.mode == "analyze":
         analyze_results()
+    elif args.mode == "rescore":
+        rescore(args.chunk_size, args.workers, args.session, args.only_stale)
+    elif args.mode == "rollups":
+        rebuild_rollups()
+    elif args.mode == "compact":
+        compact_responses(args.train_dict)
+    elif args.mode == "worker":
+        run_worker(args.idle_exit)
+    elif args.mode == "bench":
+        run_benchmark_suite(args.bench, args.bench_trials, args.concurrency, args.baseline)
 
 
 if __name__ == "__main__":
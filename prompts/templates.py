@@ -1,12 +1,18 @@
 """
 Standardized prompt templates for Linear vs DET methods.
 """
+from data.linear_system import LEGACY_VARIABLES, compile_equations
 
-def get_linear_prompt(equations: list) -> str:
+
+def get_linear_prompt(equations: list, variables: list = None) -> str:
     """
     Standard linear prompting approach.
     """
     equations_text = "\n".join(equations)
+    if variables and not set(variables) <= set(LEGACY_VARIABLES):
+        answer_format = "\n".join(f"{v} = [value]" for v in variables)
+    else:
+        answer_format = "x = [value]\ny = [value]\nz = [value]\n(and so on for all variables)"
     
     return f"""Solve this system of linear equations step-by-step. 
 
@@ -19,22 +25,21 @@ INSTRUCTIONS:
 3. Verify your solution by substituting back
 
 Provide the final answer in this exact format:
-x = [value]
-y = [value]
-z = [value]
-(and so on for all variables)
+{answer_format}
 
 SOLUTION:"""
 
 
-def get_det_prompt(equations: list) -> str:
+def get_det_prompt(equations: list, variables: list = None) -> str:
     """
     Standardized Dynamic Expression Tree (DET) prompting.
     Optimized for high accuracy and minimal latency (formerly v2).
     """
     equations_text = "\n".join(equations)
-    num_vars = _count_variables(equations)
-    var_list = _get_variable_names(num_vars)
+    if variables and not set(variables) <= set(LEGACY_VARIABLES):
+        var_list = variables
+    else:
+        var_list = _get_variable_names(_count_variables(equations))
     
     return f"""Solve using TREE DECOMPOSITION: 
 
@@ -58,19 +63,13 @@ START: """
 
 
 def _count_variables(equations: list) -> int:
-    """Count variables in equations."""
-    text = " ".join(equations).lower()
-    vars_found = set()
-    for char in text:
-        if char in ['x', 'y', 'z', 'w', 'v', 'u', 't']: 
-            vars_found.add(char)
-    return len(vars_found) if vars_found else 3
+    """Count variables that appear in the equations (from the memoized compiled system)."""
+    return len(compile_equations(equations).used_variables) or 3
 
 
 def _get_variable_names(num_vars: int) -> list: 
     """Get variable names for given count."""
-    all_vars = ['x', 'y', 'z', 'w', 'v', 'u', 't']
-    return all_vars[:num_vars]
+    return LEGACY_VARIABLES[:num_vars]
 
 
 def get_method_name(method: str) -> str:
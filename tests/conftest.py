@@ -0,0 +1,31 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Never touch the tracked results DB: point the settings at a scratch file before core is imported
+os.environ["RESULTS_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="tot-tests-"), "experiments.db")
+os.environ.setdefault("DB_ASYNC_WRITES", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import storage  # noqa: E402
+
+
+@pytest.fixture
+def results_db(tmp_path):
+    """A fresh, fully migrated results DB for one test."""
+    previous = storage.use_database(str(tmp_path / "experiments.db"))
+    storage.init_db()
+    yield storage.RESULTS_DB_PATH
+    storage.use_database(previous)
+
+
+@pytest.fixture
+def mock_client():
+    """An LLMClient on a synthetic mock model that answers instantly and correctly."""
+    from core.llm_client import LLMClient
+    from core.mock_llm import configure_mock_backend
+
+    configure_mock_backend("test", time_scale=0, playback=False, accuracy=1.0, error_rate=0, rate_limit_rate=0)
+    return LLMClient(provider="mock", model_name="test")
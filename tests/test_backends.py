@@ -0,0 +1,116 @@
+import itertools
+import time
+
+import pytest
+
+from core.backends import (
+    CLOSED, HALF_OPEN, OPEN, Backend, BackendPool, BackendUnavailable, CircuitBreaker,
+)
+from core.llm_client import run_sync
+from data.equations import get_equations
+from prompts.templates import get_linear_prompt
+
+_models = itertools.count()
+
+
+def _pool(*names):
+    # A fresh model name per pool: limiters are process-wide per provider/model/backend
+    model = f"pool-{next(_models)}"
+    return BackendPool([Backend("mock", model, name) for name in names])
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(threshold=3, cooldown=10)
+    breaker.record_failure(0)
+    breaker.record_failure(0)
+    breaker.record_success()
+    breaker.record_failure(1)
+    breaker.record_failure(1)
+    assert breaker.state(1) == CLOSED
+    breaker.record_failure(2)
+    assert breaker.state(2) == OPEN and not breaker.available(2)
+    assert breaker.reopens_in(5) == 7
+    # Failures of attempts already in flight do not push the cooldown back
+    breaker.record_failure(4)
+    assert breaker.reopens_in(5) == 7 and breaker.ejections == 1
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(threshold=1, cooldown=10)
+    breaker.record_failure(0)
+    assert breaker.state(10) == HALF_OPEN and breaker.available(10)
+    assert breaker.on_start(10) is True
+    assert not breaker.available(10)
+    breaker.release_probe()
+    assert breaker.available(10)
+
+    breaker.on_start(11)
+    breaker.record_failure(11, probe=True)
+    assert breaker.state(12) == OPEN and breaker.reopens_in(12) == 9
+
+    assert breaker.on_start(21) is True
+    breaker.record_success()
+    assert breaker.state(21) == CLOSED and breaker.on_start(21) is False
+
+
+def test_pick_balances_in_flight_attempts():
+    pool = _pool("a", "b", "c")
+    picked = [pool.pick()[0].name for _ in range(6)]
+    assert sorted(picked) == ["a", "a", "b", "b", "c", "c"]
+
+    a = pool.backends[0]
+    pool.finish(a)
+    pool.finish(a)
+    assert pool.pick()[0] is a
+
+
+def test_pick_prefers_the_backend_without_a_rate_limit_wait():
+    pool = _pool("a", "b")
+    pool.backends[0].rate_limiter.penalize(30)
+    assert [pool.pick()[0].name for _ in range(2)] == ["b", "a"]
+
+
+def test_retry_avoids_the_failed_backend():
+    pool = _pool("a", "b")
+    a = pool.backends[0]
+    assert all(pool.pick(avoid=a)[0].name == "b" for _ in range(3))
+    # Unless it is the only healthy one
+    solo = _pool("a")
+    assert solo.pick(avoid=solo.backends[0])[0] is solo.backends[0]
+
+
+def _fail(pool, backend):
+    for _ in range(backend.breaker.threshold):
+        backend.in_flight += 1
+        pool.finish(backend, failed=True)
+
+
+def test_failing_backend_is_ejected_until_every_one_is():
+    pool = _pool("a", "b")
+    a, b = pool.backends
+    _fail(pool, a)
+    assert [pool.pick()[0] for _ in range(3)] == [b, b, b]
+    for _ in range(3):
+        pool.finish(b)
+
+    _fail(pool, b)
+    with pytest.raises(BackendUnavailable) as error:
+        pool.pick()
+    assert 0 < error.value.retry_after <= a.breaker.cooldown
+    assert pool.healthy_count() == 0
+    assert [s["state"] for s in pool.get_stats()] == [OPEN, OPEN]
+
+
+def test_client_routes_around_an_ejected_backend(mock_client):
+    mock_client.backends = _pool("a", "b")
+    a, b = mock_client.backends.backends
+    a.breaker = CircuitBreaker(threshold=1, cooldown=3600)
+    a.breaker.record_failure(time.monotonic())
+
+    system = get_equations(3, 0)
+    prompt = get_linear_prompt(system["equations"], system["variables"])
+    for seed in range(4):
+        run_sync(mock_client.agenerate_with_stats(prompt, seed=seed))
+    stats = {s["name"]: s for s in mock_client.get_stats()["backends"]}
+    assert (stats["a"]["requests"], stats["b"]["requests"]) == (0, 4)
+    assert stats["b"]["in_flight"] == 0 and stats["b"]["tokens"] > 0
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from core import storage
+from core.concurrency import OK, OVERLOAD, AdaptiveConcurrencyLimiter
+
+
+def _limiter(**kwargs):
+    kwargs.setdefault("persist", False)
+    return AdaptiveConcurrencyLimiter("mock:m", initial=4, min_limit=1, max_limit=16, backoff=0.5, **kwargs)
+
+
+def _hold(limiter, slots):
+    async def acquire():
+        for _ in range(slots):
+            await limiter.acquire()
+    asyncio.run(acquire())
+
+
+def test_saturated_successes_grow_the_limit_additively():
+    limiter = _limiter()
+    _hold(limiter, 4)
+    for _ in range(4):
+        limiter.release(OK, latency=1.0, completion_tokens=100)
+    # +1/limit per response, only while at least half the slots were in use (4 and 3 of 4)
+    assert limiter.limit == pytest.approx(4 + 1 / 4 + 1 / 4.25)
+    assert limiter.increases == 2
+
+
+def test_idle_limit_does_not_grow():
+    limiter = _limiter()
+    _hold(limiter, 1)
+    limiter.release(OK, latency=1.0, completion_tokens=100)
+    assert limiter.limit == 4
+
+
+def test_overload_halves_the_limit_once_per_round_trip():
+    limiter = _limiter()
+    _hold(limiter, 4)
+    limiter.release(OK, latency=60.0, completion_tokens=100)  # 4 -> 4.25
+    limiter.release(OVERLOAD)
+    limiter.release(OVERLOAD)
+    assert limiter.limit == pytest.approx(4.25 * 0.5)
+    assert limiter.decreases == 1
+
+
+def test_latency_spike_cuts_the_limit_gently():
+    limiter = _limiter(latency_tolerance=2.0)
+    _hold(limiter, 2)
+    limiter.release(OK, latency=0.1, completion_tokens=100)  # 4 -> 4.25
+    limiter.release(OK, latency=10.0, completion_tokens=100)
+    assert limiter.limit == pytest.approx(4.25 * 0.9)
+    assert limiter.decreases == 1
+
+
+def test_learned_limit_is_saved_and_reloaded(results_db):
+    limiter = _limiter(persist=True)
+    limiter.limit = 9.0
+    limiter.save()
+    assert storage.fetch_concurrency_limit("mock:m")["limit"] == 9.0
+    assert _limiter(persist=True).limit == 9.0
+
+
+def test_unmigrated_db_is_not_written(tmp_path):
+    previous = storage.use_database(str(tmp_path / "missing.db"))
+    try:
+        limiter = _limiter(persist=True)
+        limiter.limit = 9.0
+        limiter.save()
+        assert not (tmp_path / "missing.db").exists()
+    finally:
+        storage.use_database(previous)
@@ -0,0 +1,67 @@
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from data import generator
+from data.equations import EQUATIONS_3VAR, get_equations
+from data.linear_system import compile_equations
+
+
+def _exact_residuals(system):
+    x = [system["solution_exact"][v] for v in system["variables"]]
+    return [sum(a * xi for a, xi in zip(row, x)) - Fraction(str(b)) for row, b in zip(system["matrix"], system["rhs"])]
+
+
+@pytest.mark.parametrize("size", [1, 3, 10, 30])
+@pytest.mark.parametrize("integer_solution", [True, False])
+def test_solution_is_exact(size, integer_solution):
+    system = generator.generate_system(size, seed=4, integer_solution=integer_solution)
+    assert all(r == 0 for r in _exact_residuals(system))
+    assert system["solution"] == {v: float(x) for v, x in system["solution_exact"].items()}
+    assert np.linalg.cond(np.array(system["matrix"], dtype=float)) <= (
+        generator.MAX_CONDITION_PER_VARIABLE * max(size, 2))
+
+
+def test_equations_compile_back_to_the_matrix():
+    system = generator.generate_system(12, seed=1, integer_solution=False)
+    compiled = compile_equations(system["equations"], system["variables"])
+    assert np.array_equal(compiled.A, np.array(system["matrix"], dtype=float))
+    assert np.allclose(compiled.b, [float(Fraction(str(b))) for b in system["rhs"]])
+
+
+def test_generation_is_seeded():
+    assert generator.generate_system(8, seed=3) == generator.generate_system(8, seed=3)
+    assert generator.generate_system(8, seed=3)["matrix"] != generator.generate_system(8, seed=4)["matrix"]
+    assert generator.variable_names(3) == ["x", "y", "z"]
+    assert generator.variable_names(9)[-1] == "x9"
+
+
+def test_solve_exact():
+    matrix = [[2, 3, -1], [1, -2, 4], [3, 1, -1]]
+    assert generator.solve_exact(matrix, [1, 11, 4]) == [Fraction(15, 7), Fraction(-3, 7), Fraction(2)]
+    assert [float(x) for x in generator.solve_exact(matrix, [1, 11, 4])] == list(EQUATIONS_3VAR["solution"].values())
+    with pytest.raises(ValueError):
+        generator.solve_exact([[1, 2], [2, 4]], [1, 2])
+
+
+def test_suites_are_cached_on_disk(tmp_path, monkeypatch):
+    suite = generator.get_suite(6, 3, base_seed=10, cache_dir=str(tmp_path))
+    [path] = tmp_path.iterdir()
+    assert [s["seed"] for s in suite] == [10, 11, 12]
+
+    def no_generation(*args, **kwargs):
+        raise AssertionError("suite should come from the cache file")
+
+    monkeypatch.setattr(generator, "generate_system", no_generation)
+    cached = generator.get_suite(6, 3, base_seed=10, cache_dir=str(tmp_path))
+    assert cached == suite
+    assert isinstance(cached[0]["solution_exact"]["x"], Fraction)
+    assert get_equations(6, 11) == suite[1]
+
+
+def test_legacy_sizes_are_unchanged():
+    assert get_equations(3) is EQUATIONS_3VAR
+    assert get_equations(7)["solution"] is None
+    assert get_equations(3, seed=2)["seed"] == 2
+    assert get_equations(15)["size"] == 15
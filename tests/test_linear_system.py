@@ -0,0 +1,77 @@
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from data.equations import EQUATIONS_3VAR
+from data.linear_system import LinearSystem, compile_equations, parse_equation, register
+
+
+def test_parse_equation():
+    assert parse_equation("2x + 3y - z = 1") == ({"x": 2, "y": 3, "z": -1}, 1)
+    assert parse_equation("-x + 1/2 y + x - 3/4 = -5/3") == (
+        {"x": 0, "y": Fraction(1, 2)}, Fraction(-5, 3))
+    with pytest.raises(ValueError):
+        parse_equation("2x + 3y")
+
+
+def test_dense_compile_of_a_legacy_system():
+    system = compile_equations(EQUATIONS_3VAR["equations"])
+    assert system.variables == ("x", "y", "z")
+    assert np.array_equal(system.A, [[2, 3, -1], [1, -2, 4], [3, 1, -1]])
+    assert np.array_equal(system.b, [1, 11, 4])
+    assert not system.sparse
+    solution = [EQUATIONS_3VAR["solution"][v] for v in system.variables]
+    assert np.allclose(system.residuals(np.array(solution)), 0)
+
+
+def test_variables_are_ordered_naturally():
+    system = compile_equations(["x10 + x2 = 1", "x1 - x2 = 0", "y + x = 2"])
+    assert system.variables == ("x", "y", "x1", "x2", "x10")
+
+
+def test_coo_entries_are_summed_and_zeros_dropped():
+    system = LinearSystem(["x", "y"], rows=np.array([0, 0, 1, 1]), cols=np.array([1, 1, 0, 1]),
+                          values=np.array([2.0, 3.0, 1.0, 0.0]), b=np.array([1.0, 2.0]))
+    assert (list(system.rows), list(system.cols), list(system.values)) == ([0, 1], [1, 0], [5.0, 1.0])
+    assert np.array_equal(system.A, [[0, 5], [1, 0]])
+
+
+def test_sparse_and_dense_products_agree():
+    rng = np.random.default_rng(0)
+    n = 200
+    dense = np.where(rng.random((n, n)) < 0.02, rng.integers(-5, 6, (n, n)), 0)
+    dense[7] = 0  # an empty row
+    variables = [f"x{i}" for i in range(1, n + 1)]
+    sparse = LinearSystem.from_dense(dense, list(range(n)), variables)
+    assert sparse.sparse and sparse.nnz == np.count_nonzero(dense)
+
+    as_dense = LinearSystem.from_dense(dense, list(range(n)), variables, sparse=False)
+    X = rng.normal(size=(4, n))
+    assert np.allclose(sparse.matvec(X), as_dense.matvec(X))
+    assert np.allclose(sparse.matvec(X, absolute=True), X @ np.abs(dense).T)
+    assert np.allclose(sparse.residuals(X), X @ dense.T - np.arange(n))
+
+
+def test_rendered_equations_parse_back():
+    matrix = [[1, -1, 0], [0, 3, Fraction(1, 2)], [-2, 0, 1]]
+    system = LinearSystem.from_dense(matrix, [4, "7/3", -1], ["x", "y", "z"])
+    assert system.equations == ("x - y = 4", "3y + 1/2z = 7/3", "-2x + z = -1")
+    reparsed = LinearSystem.from_equations(system.equations, system.variables)
+    assert np.array_equal(reparsed.A, system.A) and np.allclose(reparsed.b, system.b)
+
+
+def test_compiled_systems_are_memoized():
+    equations = ["x + y = 3", "x - y = 1"]
+    assert compile_equations(equations, ["x", "y"]) is compile_equations(list(equations), ("x", "y"))
+
+    prebuilt = register(LinearSystem.from_dense([[1, 2], [3, 4]], [5, 6], ["x", "y"]))
+    assert compile_equations(prebuilt.equations, prebuilt.variables) is prebuilt
+
+
+def test_unknown_variables_and_missing_assignments():
+    with pytest.raises(ValueError, match="'q'"):
+        LinearSystem.from_equations(["x + q = 1"], ["x"])
+    system = compile_equations(EQUATIONS_3VAR["equations"])
+    X = system.vectorize([{"x": 1, "y": 2}])
+    assert np.isnan(X[0, 2]) and X.shape == (1, 3)
@@ -0,0 +1,66 @@
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from core import storage
+
+LEGACY_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         "data", "results", "experiments.db")
+
+# Migrations that have shipped: they may only ever be appended to, never edited or reordered
+SHIPPED = [
+    (1, "legacy columns"),
+    (2, "method family + indexes"),
+    (3, "trial rollups"),
+    (4, "compressed out-of-row responses"),
+    (5, "data version counter"),
+    (6, "progress events"),
+    (7, "work queue"),
+    (8, "problem seed"),
+    (9, "correctness"),
+    (10, "sweeps"),
+    (11, "call metrics"),
+    (12, "concurrency limits"),
+    (13, "metric histograms"),
+]
+
+
+def _applied(conn):
+    return [tuple(r) for r in conn.execute("SELECT version, name FROM schema_version ORDER BY version")]
+
+
+def test_migrations_are_append_only():
+    versions = [version for version, _, _ in storage.MIGRATIONS]
+    assert versions == list(range(1, len(versions) + 1))
+    assert [(version, name) for version, name, _ in storage.MIGRATIONS][:len(SHIPPED)] == SHIPPED
+
+
+def test_fresh_db_applies_every_migration_once(results_db):
+    storage.init_db()
+    conn = sqlite3.connect(results_db)
+    assert _applied(conn) == [(version, name) for version, name, _ in storage.MIGRATIONS]
+
+
+def test_legacy_db_migrates_without_losing_trials(tmp_path):
+    if not os.path.exists(LEGACY_DB):
+        pytest.skip("no legacy results DB in this checkout")
+    path = str(tmp_path / "legacy.db")
+    shutil.copy(LEGACY_DB, path)
+    with sqlite3.connect(path) as conn:
+        before = {row[0]: row[1:] for row in conn.execute("SELECT id, session_id, score, response FROM trials")}
+
+    previous = storage.use_database(path)
+    try:
+        storage.init_db()
+        with sqlite3.connect(path) as conn:
+            assert _applied(conn)[-1][0] == storage.MIGRATIONS[-1][0]
+        after = {
+            t["id"]: (t["session_id"], t["score"], t["response"])
+            for session_id in {session_id for session_id, _, _ in before.values()}
+            for t in storage.fetch_trials(session_id, include_response=True)
+        }
+    finally:
+        storage.use_database(previous)
+    assert after == before
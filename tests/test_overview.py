@@ -0,0 +1,17 @@
+from core import storage
+
+RESULT = {"score": 80.0, "success": True, "tokens": 120, "time": 1.5}
+
+
+def test_last_run_ignores_sessions_without_trials(results_db):
+    first = storage.create_session("experiment", "mock", "a", {})
+    storage.insert_trial(first, 3, "linear", 1, RESULT)
+    second = storage.create_session("experiment", "mock", "b", {})
+    storage.insert_trial(second, 3, "linear", 1, RESULT)
+    # A later run of "a" that never stored a trial
+    storage.create_session("experiment", "mock", "a", {})
+
+    overview = storage.fetch_model_overview()
+    assert [row["model"] for row in overview] == ["b", "a"]
+    first_created = storage.fetch_session(first)["created_at"]
+    assert overview[1]["last_run"] == first_created
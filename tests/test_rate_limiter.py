@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from core.rate_limiter import TokenBucketRateLimiter, parse_duration, retry_after_seconds
+
+
+@pytest.mark.parametrize("value, seconds", [
+    ("6.2s", 6.2), ("1m30s", 90.0), ("250ms", 0.25), ("12", 12.0), ("1h", 3600.0),
+])
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == pytest.approx(seconds)
+
+
+def test_parse_duration_rejects_unknown_values():
+    assert parse_duration("soon") is None
+    assert parse_duration(None) is None
+
+
+def test_retry_after_prefers_milliseconds():
+    assert retry_after_seconds({"retry-after-ms": "1500", "retry-after": "9"}) == 1.5
+    assert retry_after_seconds({"retry-after": "2"}) == 2.0
+    assert retry_after_seconds({}) is None
+
+
+def test_requests_bucket_spaces_out_callers():
+    limiter = TokenBucketRateLimiter("t", rpm=60, tpm=0, state_path=None)
+    assert all(limiter.reserve() == 0 for _ in range(60))
+    # Bucket empty: each further request waits one more refill interval (1s at 60 rpm)
+    assert limiter.reserve() == pytest.approx(1.0, abs=0.05)
+    assert limiter.reserve() == pytest.approx(2.0, abs=0.05)
+
+
+def test_reconcile_charges_actual_tokens():
+    limiter = TokenBucketRateLimiter("t", rpm=0, tpm=600, state_path=None)
+    assert limiter.reserve(100) == 0
+    limiter.reconcile(100, 700)
+    # 100 tokens over the limit at 10 tokens/s
+    assert limiter.pending_wait() == pytest.approx(10.0, abs=0.1)
+
+
+def test_headers_teach_tpm_and_block_until_reset():
+    limiter = TokenBucketRateLimiter("t", rpm=0, tpm=0, state_path=None)
+    assert limiter.reserve(10_000) == 0
+    limiter.update_from_headers({"x-ratelimit-limit-tokens": "6000",
+                                 "x-ratelimit-remaining-tokens": "0",
+                                 "x-ratelimit-reset-tokens": "7.5s"})
+    assert limiter.pending_wait() == pytest.approx(7.5, abs=0.1)
+
+
+def test_penalize_blocks_every_caller():
+    limiter = TokenBucketRateLimiter("t", rpm=600, tpm=0, state_path=None)
+    limiter.penalize(5)
+    assert limiter.reserve() == pytest.approx(5.0, abs=0.1)
+
+
+def test_sqlite_state_is_shared_between_processes(tmp_path):
+    path = str(tmp_path / "limits.db")
+    first = TokenBucketRateLimiter("groq:m", rpm=60, tpm=0, state_path=path)
+    second = TokenBucketRateLimiter("groq:m", rpm=60, tpm=0, state_path=path)
+
+    async def drain():
+        for _ in range(60):
+            await first.aacquire()
+        await first.apenalize(0)
+
+    asyncio.run(drain())
+    assert second.reserve() == pytest.approx(1.0, abs=0.05)
+    # pending_wait reads this process's last view without claiming a request
+    assert second.pending_wait() == pytest.approx(2.0, abs=0.05)
+    assert second.pending_wait() == pytest.approx(2.0, abs=0.05)
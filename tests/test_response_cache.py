@@ -0,0 +1,89 @@
+import time
+
+import pytest
+
+from core.llm_client import run_sync
+from core.response_cache import CacheMissError, ResponseCache
+from data.equations import get_equations
+from prompts.templates import get_linear_prompt
+
+KEY_ARGS = dict(provider="groq", model="m", prompt="solve", temperature=0.7, max_tokens=100, seed=1)
+
+
+def _cache(tmp_path, mode, **kwargs):
+    return ResponseCache(str(tmp_path / "cache.db"), mode=mode, **kwargs)
+
+
+def _prompt(seed=0):
+    system = get_equations(3, seed)
+    return get_linear_prompt(system["equations"], system["variables"])
+
+
+@pytest.mark.parametrize("field, value", [
+    ("provider", "ollama"), ("model", "other"), ("prompt", "solve!"), ("temperature", 0.0),
+    ("max_tokens", 200), ("seed", 2),
+])
+def test_key_covers_every_request_field(field, value):
+    assert ResponseCache.make_key(**KEY_ARGS) == ResponseCache.make_key(**KEY_ARGS)
+    assert ResponseCache.make_key(**{**KEY_ARGS, field: value}) != ResponseCache.make_key(**KEY_ARGS)
+
+
+@pytest.mark.parametrize("mode, reads, writes", [
+    ("off", False, False), ("read_through", True, True), ("record", False, True), ("replay", True, False),
+])
+def test_modes(tmp_path, mode, reads, writes):
+    cache = _cache(tmp_path, mode)
+    assert (cache.reads, cache.writes) == (reads, writes)
+
+
+def test_unknown_mode_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        _cache(tmp_path, "readwrite")
+
+
+def test_replay_miss_raises(tmp_path):
+    cache = _cache(tmp_path, "replay")
+    with pytest.raises(CacheMissError):
+        cache.get("missing")
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = _cache(tmp_path, "read_through", ttl_seconds=0.01)
+    cache.put("k", "groq", "m", "x = 1", 10, 0.5)
+    assert cache.get("k") == ("x = 1", 10, 0.5)
+    time.sleep(0.02)
+    assert cache.get("k") is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = _cache(tmp_path, "read_through", max_bytes=10)
+    cache.put("a", "groq", "m", "aaaa", 1, 0.1)
+    cache.put("b", "groq", "m", "bbbb", 1, 0.1)
+    time.sleep(0.01)
+    cache.get("a")
+    cache.put("c", "groq", "m", "cccc", 1, 0.1)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_read_through_serves_repeated_trials_from_cache(tmp_path, mock_client):
+    mock_client.cache = _cache(tmp_path, "read_through")
+    first = run_sync(mock_client.agenerate_with_stats(_prompt(), seed=1))
+    again = run_sync(mock_client.agenerate_with_stats(_prompt(), seed=1))
+    other_trial = run_sync(mock_client.agenerate_with_stats(_prompt(), seed=2))
+
+    assert not first["cached"] and again["cached"] and not other_trial["cached"]
+    assert (again["text"], again["tokens"]) == (first["text"], first["tokens"])
+    assert mock_client.total_requests == 2
+
+
+def test_record_mode_always_calls_the_api(tmp_path, mock_client):
+    mock_client.cache = _cache(tmp_path, "record")
+    run_sync(mock_client.agenerate_with_stats(_prompt(), seed=1))
+    second = run_sync(mock_client.agenerate_with_stats(_prompt(), seed=1))
+    assert not second["cached"] and mock_client.total_requests == 2
+
+    mock_client.cache = _cache(tmp_path, "replay")
+    assert run_sync(mock_client.agenerate_with_stats(_prompt(), seed=1))["cached"]
+    with pytest.raises(CacheMissError):
+        run_sync(mock_client.agenerate_with_stats(_prompt(), seed=3))
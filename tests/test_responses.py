@@ -0,0 +1,70 @@
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from core import storage
+from tests.test_migrations import LEGACY_DB
+
+RESULT = {"score": 80.0, "success": True, "tokens": 120, "time": 1.5}
+RESPONSES = [
+    "x = 1\ny = 2\nz = 3",
+    "Step 1: eliminate x\nStep 2: substitute\nx = 1\ny = 2\nz = 3",
+    "ünïcødé → ✓, x₁ = ½",
+]
+
+
+def _store(responses):
+    session_id = storage.create_session("experiment", "mock", "m", {})
+    for i, text in enumerate(responses, 1):
+        storage.insert_trial(session_id, 3, "linear", i, RESULT, text)
+    return session_id
+
+
+def _responses(session_id):
+    return [t["response"] for t in storage.fetch_trials(session_id, include_response=True)]
+
+
+def test_responses_round_trip(results_db):
+    session_id = _store(RESPONSES)
+    assert _responses(session_id) == RESPONSES
+    [first] = storage.fetch_trials(session_id, fields=["id"])[:1]
+    assert storage.fetch_response(first["id"]) == RESPONSES[0]
+
+
+def test_responses_survive_dictionary_training_and_compaction(results_db):
+    session_id = _store(RESPONSES * 10)
+    assert storage.train_response_dictionary() is not None
+    later = _store(RESPONSES)
+
+    report = storage.compact_responses()
+    assert report["recompressed"] == len(RESPONSES) * 10
+    assert report["backup"] is None
+    assert _responses(session_id) == RESPONSES * 10
+    assert _responses(later) == RESPONSES
+
+
+def test_legacy_inline_responses_are_only_dropped_by_compaction(tmp_path):
+    if not os.path.exists(LEGACY_DB):
+        pytest.skip("no legacy results DB in this checkout")
+    path = str(tmp_path / "legacy.db")
+    shutil.copy(LEGACY_DB, path)
+
+    def inline_count(db):
+        with sqlite3.connect(db) as conn:
+            return conn.execute("SELECT COUNT(*) FROM trials WHERE response IS NOT NULL").fetchone()[0]
+
+    stored = inline_count(path)
+    previous = storage.use_database(path)
+    try:
+        storage.init_db()
+        assert inline_count(path) == stored
+
+        report = storage.compact_responses()
+        assert report["inline_dropped"] == stored
+        assert inline_count(path) == 0
+        assert inline_count(report["backup"]) == stored
+        assert report["responses"] == stored
+    finally:
+        storage.use_database(previous)
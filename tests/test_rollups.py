@@ -0,0 +1,90 @@
+import random
+import sqlite3
+import statistics
+
+import pytest
+
+from core import storage
+
+METHODS = ["linear", "det", "det_v2", "tot"]
+
+
+def _populate(rng):
+    sessions = []
+    for mode, model in [("experiment", "a"), ("experiment", "b"), ("demo", "a")]:
+        session_id = storage.create_session(mode, "mock", model, {})
+        sessions.append(session_id)
+        for trial in range(40):
+            score = None if rng.random() < 0.1 else round(rng.uniform(0, 100), 2)
+            storage.insert_trial(session_id, rng.choice([3, 5]), rng.choice(METHODS), trial, {
+                "score": score,
+                "success": score is not None and score > 50,
+                "tokens": rng.randint(100, 900),
+                "time": rng.uniform(0.5, 3.0),
+                "correct": rng.choice([True, False, None]),
+            })
+    return sessions
+
+
+def _direct_method_summary(db):
+    """The dashboard's method summary, aggregated straight from trials."""
+    conn = sqlite3.connect(db)
+    rows = conn.execute(
+        """
+        SELECT t.method_family, t.score, t.success, t.tokens, t.time, t.correct
+        FROM trials t JOIN sessions s ON s.id = t.session_id
+        WHERE s.mode = 'experiment'
+        """
+    ).fetchall()
+    by_method = {}
+    for method, *values in rows:
+        by_method.setdefault(method, []).append(values)
+    summary = {}
+    for method, trials in by_method.items():
+        scores = [t[0] for t in trials if t[0] is not None]
+        correct = [t[4] for t in trials if t[4] is not None]
+        summary[method] = {
+            "runs": len(trials),
+            "avg_score": statistics.fmean(scores),
+            "std_score": statistics.pstdev(scores),
+            "success_rate": 100.0 * statistics.fmean(t[1] for t in trials),
+            "avg_tokens": statistics.fmean(t[2] for t in trials),
+            "avg_time": statistics.fmean(t[3] for t in trials),
+            "accuracy": 100.0 * statistics.fmean(correct),
+        }
+    return summary
+
+
+def _assert_rollups_match(db):
+    from_rollups = {row.pop("method"): row for row in storage.fetch_summary()["method_summary"]}
+    direct = _direct_method_summary(db)
+    assert set(from_rollups) == set(direct) == {"linear", "det", "tot"}
+    for method, expected in direct.items():
+        assert from_rollups[method] == pytest.approx(expected)
+    assert storage.rebuild_rollups()["drifted"] == []
+
+
+def test_rollups_track_inserts_updates_and_deletes(results_db):
+    rng = random.Random(7)
+    sessions = _populate(rng)
+    _assert_rollups_match(results_db)
+
+    trials = storage.fetch_trials(sessions[0])
+    storage.update_trial_scores(
+        (t["id"], {"total": 10.0, "completeness": 0.1, "consistency": 0.1, "reasoning": 0.1, "success": False,
+                   "variables_found": 0, "assignments": {}, "correct": False})
+        for t in trials[:15]
+    )
+    _assert_rollups_match(results_db)
+
+    storage.delete_session(sessions[1])
+    _assert_rollups_match(results_db)
+
+
+def test_rebuild_reports_drift(results_db):
+    _populate(random.Random(1))
+    with sqlite3.connect(results_db) as conn:
+        conn.execute("UPDATE trial_rollups SET sum_score = sum_score + 1 WHERE method_family = 'tot'")
+    report = storage.rebuild_rollups()
+    assert report["drifted"] and all(key[4] == "tot" for key in report["drifted"])
+    assert storage.rebuild_rollups()["drifted"] == []
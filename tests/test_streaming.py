@@ -0,0 +1,80 @@
+import pytest
+
+from core.llm_client import run_sync
+from core.response_cache import ResponseCache
+from core.scorer import StreamingStopHook
+from data.equations import get_equations
+from prompts.templates import get_linear_prompt
+
+VARIABLES = ["x", "y", "z"]
+
+
+def _feed(hook, text, chunk=3):
+    """Feed ``text`` in small deltas; returns the characters consumed when the hook fired, or None."""
+    for i in range(0, len(text), chunk):
+        if hook(text[i:i + chunk]):
+            return i + chunk
+    return None
+
+
+def test_final_block_stops_once_a_block_covers_every_variable():
+    text = "x = 1\nthen\ny = 2\nz = 3\n\nFinal:\nx = 1\ny = 2\nz = 3\nVerification..."
+    consumed = _feed(StreamingStopHook(VARIABLES, "final_block"), text)
+    assert consumed is not None
+    assert text.index("z = 3\nV") <= consumed <= text.index("Verification") + 3
+
+
+def test_all_variables_stops_on_scattered_assignments():
+    text = "x = 1\nthen\ny = 2\nand\nz = -3/4\nmore"
+    assert _feed(StreamingStopHook(VARIABLES, "all_variables"), text) is not None
+    assert _feed(StreamingStopHook(VARIABLES, "final_block"), text) is None
+
+
+def test_think_blocks_and_never_do_not_stop():
+    thinking = "<think>\nx = 1\ny = 2\nz = 3\n</think>\nworking\n"
+    assert _feed(StreamingStopHook(VARIABLES, "final_block"), thinking) is None
+    assert _feed(StreamingStopHook(VARIABLES, "never"), "x = 1\ny = 2\nz = 3\n") is None
+
+
+def test_reset_starts_over():
+    hook = StreamingStopHook(VARIABLES, "final_block")
+    assert _feed(hook, "x = 1\ny = 2\nz = 3\n") is not None
+    hook.reset()
+    assert not hook.done and hook("x = 1\n") is False
+
+
+def test_unknown_condition_is_rejected():
+    with pytest.raises(ValueError):
+        StreamingStopHook(VARIABLES, "first_line")
+
+
+def _prompt():
+    system = get_equations(3, 0)
+    return get_linear_prompt(system["equations"], system["variables"])
+
+
+def test_streamed_answer_matches_the_plain_one(mock_client):
+    plain = run_sync(mock_client.agenerate_with_stats(_prompt(), seed=1, stream=False))
+    streamed = run_sync(mock_client.agenerate_with_stats(_prompt(), seed=1, stream=True))
+    # Each mock call draws its own length; the answer is the same
+    assert streamed["text"].split("Final answer:")[1] == plain["text"].split("Final answer:")[1]
+    assert not streamed["stopped_early"] and streamed["ttft"] is not None
+
+
+def test_early_stop_cancels_the_stream_and_skips_the_cache(tmp_path, mock_client):
+    mock_client.cache = ResponseCache(str(tmp_path / "cache.db"), mode="read_through")
+    seen = []
+
+    def at_step_2(delta):
+        seen.append(delta)
+        return "Step 2" in "".join(seen)
+
+    stopped = run_sync(mock_client.agenerate_with_stats(_prompt(), seed=1, stream=True, stop_when=at_step_2))
+    assert stopped["stopped_early"] and mock_client.early_stops == 1
+    assert "Step 1" in stopped["text"] and "Final answer" not in stopped["text"]
+
+    # The truncated text was not cached: the same trial is generated again, in full
+    full = run_sync(mock_client.agenerate_with_stats(_prompt(), seed=1, stream=True))
+    assert not full["cached"] and not full["stopped_early"]
+    assert "Final answer" in full["text"]
+    assert run_sync(mock_client.agenerate_with_stats(_prompt(), seed=1, stream=True))["cached"]
@@ -0,0 +1,71 @@
+import pytest
+
+from core import storage
+
+METHODS = ["linear", "det", "det_v2", "tot"]
+
+
+def _populate(mode="experiment", model="m", n=50):
+    session_id = storage.create_session(mode, "mock", model, {})
+    for trial in range(n):
+        storage.insert_trial(session_id, 3, METHODS[trial % 4], trial,
+                             {"score": float(trial), "success": trial % 2 == 0, "tokens": 10, "time": 0.1},
+                             f"response {trial}")
+    return session_id
+
+
+def _ids(session_id):
+    return [t["id"] for t in storage.fetch_trials(session_id, fields=["id"])]
+
+
+def test_iter_trials_streams_every_row_across_chunks(results_db):
+    session_id = _populate()
+    ids = [t["id"] for t in storage.iter_trials(session_id, chunk_size=7)]
+    assert ids == sorted(_ids(session_id)) and len(ids) == 50
+
+
+def test_cursor_pages_reassemble_the_session(results_db):
+    session_id = _populate()
+    pages, cursor = [], 0
+    while True:
+        page = list(storage.iter_trials(session_id, after_id=cursor, limit=12, chunk_size=5))
+        if not page:
+            break
+        pages.append(page)
+        cursor = page[-1]["id"]
+    assert [len(page) for page in pages] == [12, 12, 12, 12, 2]
+    assert [t["id"] for page in pages for t in page] == sorted(_ids(session_id))
+
+
+def test_fields_are_projected(results_db):
+    session_id = _populate(n=4)
+    [trial] = storage.iter_trials(session_id, fields=["score"], limit=1)
+    assert set(trial) == {"id", "score"}
+
+    [trial] = storage.iter_trials(session_id, fields=["trial", "response"], limit=1)
+    assert trial == {"id": trial["id"], "trial": 0, "response": "response 0"}
+
+    # The response blob is never read unless asked for
+    assert "response" not in next(storage.iter_trials(session_id))
+
+
+def test_unknown_fields_are_rejected_up_front(results_db):
+    session_id = _populate(n=1)
+    with pytest.raises(ValueError, match="bogus"):
+        storage.iter_trials(session_id, fields=["score", "bogus"])
+    with pytest.raises(ValueError):
+        storage.iter_trials()
+
+
+def test_filters_and_model_scope(results_db):
+    session_id = _populate()
+    _populate(mode="demo")
+    _populate(model="other")
+
+    det = list(storage.iter_trials(session_id, method="det", fields=["method"]))
+    assert {t["method"] for t in det} == {"det", "det_v2"}
+    assert all(t["success"] for t in storage.iter_trials(session_id, success=True))
+
+    by_model = list(storage.iter_trials(provider="mock", model="m", fields=["score", "session_created"]))
+    assert len(by_model) == 50
+    assert {t["session_created"] for t in by_model} == {storage.fetch_session(session_id)["created_at"]}
@@ -0,0 +1,41 @@
+from core.verifier import accuracy, get_verifier, verify_results
+from data.equations import get_equations
+
+
+def test_exact_and_rounded_answers_are_correct():
+    system = get_equations(3)
+    verifier = get_verifier(system)
+    assert verifier.verify(system["solution"])["correct"]
+    rounded = {name: round(value, 2) for name, value in system["solution"].items()}
+    assert verifier.verify(rounded)["correct"]
+
+
+def test_wrong_or_incomplete_answers_are_not_correct():
+    system = get_equations(3)
+    verifier = get_verifier(system)
+    wrong = dict(system["solution"], z=system["solution"]["z"] + 1)
+    result = verifier.verify(wrong)
+    assert not result["correct"] and result["max_residual"] > 0.5
+    missing = {name: value for name, value in system["solution"].items() if name != "z"}
+    assert verifier.verify(missing) == {"correct": False, "max_residual": None}
+
+
+def test_verify_results_batches_across_systems():
+    small, large = get_equations(3), get_equations(5, 7)
+    results = [{"assignments": small["solution"]}, {"assignments": large["solution"]},
+               {"assignments": small["solution"]}]
+    verify_results([(small, results[0]), (large, results[1]), (large, results[2])])
+    assert [r["correct"] for r in results] == [True, True, False]
+    assert accuracy(results + [{"correct": None}]) == 66.7
+
+
+def test_systems_without_a_unique_solution_are_not_verified():
+    legacy = get_equations(7)  # inconsistent, solution None
+    assert get_verifier(legacy).verify({v: 1.0 for v in legacy["variables"]}) == {
+        "correct": None, "max_residual": None}
+    underdetermined = {"equations": ["x + y = 2", "2x + 2y = 4"], "variables": ["x", "y"]}
+    assert get_verifier(underdetermined).verify({"x": 1, "y": 1})["correct"] is None
+
+    results = [{"assignments": {"x": 1}}]
+    verify_results([(legacy, results[0])])
+    assert results[0]["correct"] is None and accuracy(results) is None
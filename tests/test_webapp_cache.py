@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from core import storage
+
+RESULT = {"score": 80.0, "success": True, "tokens": 120, "time": 1.5}
+
+
+@pytest.fixture
+def client(results_db):
+    from webapp.server import app
+    return app.test_client()
+
+
+def _session(n=5):
+    session_id = storage.create_session("experiment", "mock", "m", {})
+    for trial in range(n):
+        storage.insert_trial(session_id, 3, "linear", trial, RESULT)
+    return session_id
+
+
+def test_unchanged_summary_is_not_modified(client):
+    _session()
+    first = client.get("/api/summary")
+    assert first.status_code == 200 and first.headers["ETag"]
+
+    again = client.get("/api/summary", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304 and again.get_data() == b""
+    assert again.headers["ETag"] == first.headers["ETag"]
+
+
+def test_writes_change_the_etag(client):
+    session_id = _session()
+    etag = client.get("/api/summary").headers["ETag"]
+    storage.insert_trial(session_id, 3, "linear", 99, {**RESULT, "score": 0.0})
+
+    fresh = client.get("/api/summary", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200 and fresh.headers["ETag"] != etag
+    assert fresh.get_json()["method_summary"][0]["runs"] == 6
+
+
+def test_trial_stream_pages_and_etag(client):
+    session_id = _session(n=5)
+    url = f"/api/trials/{session_id}?limit=2&fields=score"
+    first = client.get(url)
+    page = json.loads(first.get_data())
+    assert [set(t) for t in page["trials"]] == [{"id", "score"}] * 2
+
+    ids, cursor = [], 0
+    while cursor is not None:
+        page = client.get(f"{url}&cursor={cursor}").get_json()
+        ids += [t["id"] for t in page["trials"]]
+        cursor = page["next_cursor"]
+    assert ids == [t["id"] for t in storage.fetch_trials(session_id, fields=["id"])]
+
+    assert client.get(url, headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+    # Another page of the same data is another resource
+    assert client.get(f"{url}&cursor={ids[1]}", headers={"If-None-Match": first.headers["ETag"]}).status_code == 200
+
+
+def test_bad_queries_are_rejected(client):
+    session_id = _session(n=1)
+    assert client.get(f"/api/trials/{session_id}?fields=bogus").status_code == 400
+    assert client.get(f"/api/trials/{session_id}?limit=0").status_code == 400
@@ -0,0 +1,109 @@
+from config.settings import WORK_MAX_ATTEMPTS
+from core import storage
+
+RESULT = {"score": 80.0, "success": True, "tokens": 120, "time": 1.5, "assignments": {"x": 1},
+          "response": "x = 1"}
+
+
+def _queue_trial():
+    session_id = storage.create_session("experiment", "mock", "m", {})
+    storage.enqueue_trials(session_id, "mock", "m", [(3, "linear", 1, None)])
+    return session_id
+
+
+def _statuses(session_id):
+    return storage.fetch_work_progress(session_id)[(3, "linear")]
+
+
+def test_live_lease_is_not_reclaimed(results_db):
+    _queue_trial()
+    assert len(storage.claim_work("w1", 10, lease_seconds=60, max_attempts=WORK_MAX_ATTEMPTS)) == 1
+    assert storage.claim_work("w2", 10, lease_seconds=60, max_attempts=WORK_MAX_ATTEMPTS) == []
+
+
+def test_expired_lease_is_reclaimed(results_db):
+    _queue_trial()
+    [first] = storage.claim_work("w1", 10, lease_seconds=-1, max_attempts=WORK_MAX_ATTEMPTS)
+    [second] = storage.claim_work("w2", 10, lease_seconds=60, max_attempts=WORK_MAX_ATTEMPTS)
+    assert second["id"] == first["id"]
+    assert second["attempts"] == 2
+
+
+def test_complete_after_lost_lease_stores_nothing(results_db):
+    session_id = _queue_trial()
+    [stale] = storage.claim_work("w1", 10, lease_seconds=-1, max_attempts=WORK_MAX_ATTEMPTS)
+    [current] = storage.claim_work("w2", 10, lease_seconds=60, max_attempts=WORK_MAX_ATTEMPTS)
+
+    assert storage.complete_work(stale, "w1", RESULT) is False
+    assert storage.fetch_trials(session_id) == []
+
+    assert storage.complete_work(current, "w2", RESULT) is True
+    assert storage.complete_work(current, "w2", RESULT) is False
+    assert len(storage.fetch_trials(session_id)) == 1
+    assert _statuses(session_id) == {"done": 1}
+
+
+def test_fail_work_gives_up_after_max_attempts(results_db):
+    session_id = _queue_trial()
+    for attempt in range(1, WORK_MAX_ATTEMPTS + 1):
+        [item] = storage.claim_work("w1", 10, lease_seconds=60, max_attempts=WORK_MAX_ATTEMPTS)
+        assert item["attempts"] == attempt
+        storage.fail_work(item, "w1", "boom", WORK_MAX_ATTEMPTS)
+        expected = "failed" if attempt == WORK_MAX_ATTEMPTS else "pending"
+        assert _statuses(session_id) == {expected: 1}
+
+    assert storage.claim_work("w1", 10, lease_seconds=60, max_attempts=WORK_MAX_ATTEMPTS) == []
+    [error] = storage.fetch_work_errors(session_id)
+    assert (error["attempts"], error["error"]) == (WORK_MAX_ATTEMPTS, "boom")
+
+
+def test_expired_lease_fails_after_max_attempts(results_db):
+    session_id = _queue_trial()
+    # Every worker that claims the trial dies without completing or failing it
+    for attempt in range(1, WORK_MAX_ATTEMPTS + 1):
+        [item] = storage.claim_work(f"w{attempt}", 10, lease_seconds=-1, max_attempts=WORK_MAX_ATTEMPTS)
+        assert item["attempts"] == attempt
+
+    assert storage.claim_work("w0", 10, lease_seconds=60, max_attempts=WORK_MAX_ATTEMPTS) == []
+    assert _statuses(session_id) == {"failed": 1}
+    [error] = storage.fetch_work_errors(session_id)
+    assert error["error"] == f"lease expired (worker w{WORK_MAX_ATTEMPTS})"
+
+
+class _FakeRunner:
+    class events:
+        @staticmethod
+        def emit(*args, **kwargs):
+            pass
+
+    async def arun_single_trial(self, equations, variables, method, seed=None):
+        return dict(RESULT)
+
+    def _emit_trial_finished(self, *args, **kwargs):
+        pass
+
+
+def test_worker_survives_a_storage_error(results_db, monkeypatch):
+    import asyncio
+    import sqlite3
+    from core.distributed import TrialWorker
+
+    session_id = storage.create_session("experiment", "mock", "m", {})
+    storage.enqueue_trials(session_id, "mock", "m", [(3, "linear", 1, None), (3, "linear", 2, None)])
+    complete_work = storage.complete_work
+    calls = []
+
+    def flaky_complete_work(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return complete_work(*args)
+
+    monkeypatch.setattr(storage, "complete_work", flaky_complete_work)
+    worker = TrialWorker("w1", max_concurrency=1, lease_seconds=60, poll_interval=0.01)
+    monkeypatch.setattr(worker, "_runner", lambda provider, model: _FakeRunner())
+
+    stats = asyncio.run(worker.run(idle_exit=0.05))
+    assert (stats["completed"], stats["failed"]) == (1, 1)
+    # The unrecorded trial stays leased until its lease expires
+    assert _statuses(session_id) == {"done": 1, "leased": 1}
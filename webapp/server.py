@@ -5,18 +5,82 @@ Run:
     python3 -m webapp.server
 Then open http://localhost:5000/
 """
-from flask import Flask, jsonify, send_from_directory, request
+import hashlib
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from flask import Flask, Response, jsonify, send_from_directory, request, stream_with_context
 from flask_cors import CORS
 
 from core import storage
+from config.settings import EVENTS_POLL_INTERVAL
 
 app = Flask(__name__, static_folder="static", static_url_path="")
-CORS(app, resources={r"/api/*": {"origins": "*"}}, allow_headers=["Content-Type", "Authorization", "ngrok-skip-browser-warning"])
+CORS(app, resources={r"/api/*": {"origins": "*"}}, allow_headers=["Content-Type", "Authorization", "ngrok-skip-browser-warning"], expose_headers=["ETag"])
+
+# Schema and migrations are applied once per process, not per request
+storage.init_db()
+
+
+# -- Result cache ------------------------------------------------------------
+# GET responses are cached per (path, query) and tagged with the storage data
+# version; any write (in this or another process) bumps the version, so the next
+# request recomputes. ETag/If-None-Match lets polling dashboards get 304s.
+
+RESULT_CACHE_SIZE = 256
+
+_result_cache: "OrderedDict[Tuple[str, bytes], Tuple[int, str, bytes]]" = OrderedDict()
+_result_cache_lock = threading.Lock()
+
+
+def _not_modified(etag: str) -> Optional[Response]:
+    if etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def cached(view: Callable[..., Any]) -> Callable[..., Any]:
+    """Serve a JSON view from the result cache while the data version is unchanged."""
+    @wraps(view)
+    def wrapper(*args: Any, **kwargs: Any) -> Response:
+        version = storage.data_version()
+        key = (request.path, request.query_string)
+        with _result_cache_lock:
+            entry = _result_cache.get(key)
+            if entry is not None and entry[0] == version:
+                _result_cache.move_to_end(key)
+            else:
+                entry = None
+        if entry is None:
+            result = view(*args, **kwargs)
+            if isinstance(result, tuple) or result.status_code != 200:
+                return result  # errors are not cached
+            body = result.get_data()
+            entry = (version, hashlib.sha1(body).hexdigest(), body)
+            with _result_cache_lock:
+                _result_cache[key] = entry
+                while len(_result_cache) > RESULT_CACHE_SIZE:
+                    _result_cache.popitem(last=False)
+        _, etag, body = entry
+        not_modified = _not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+        response = Response(body, mimetype="application/json")
+        response.set_etag(etag)
+        return response
+    return wrapper
 
 
 @app.route("/api/summary")
+@cached
 def api_summary():
-    storage.init_db()
     summary = storage.fetch_summary()
     
     # Generate stats in words
@@ -36,8 +100,8 @@ def api_summary():
 
 
 @app.route("/api/sessions/<int:session_id>/summary")
+@cached
 def api_session_summary(session_id: int):
-    storage.init_db()
     return jsonify({
         "size_summary": storage.fetch_session_size_summary(session_id)
     })
@@ -45,50 +109,229 @@ def api_session_summary(session_id: int):
 
 @app.route("/api/sessions/<int:session_id>", methods=["DELETE"])
 def api_delete_session(session_id: int):
-    storage.init_db()
     storage.delete_session(session_id)
     return jsonify({"status": "deleted", "id": session_id})
 
 
+def _include_response() -> bool:
+    """Raw responses are only loaded when asked for (?include_response=1)."""
+    return request.args.get("include_response", "").lower() in ("1", "true", "yes")
+
+
+def _trial_query_args() -> Dict[str, Any]:
+    """
+    Query parameters shared by the trial listings:
+    cursor (last seen id), limit, fields (comma separated), size, method, success.
+    """
+    fields = request.args.get("fields")
+    success = request.args.get("success", "")
+    return {
+        "fields": [f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+        "size": request.args.get("size", type=int),
+        "method": request.args.get("method") or None,
+        "success": success.lower() in ("1", "true", "yes") if success else None,
+        "after_id": request.args.get("cursor", 0, type=int),
+        "limit": request.args.get("limit", type=int),
+        "include_response": _include_response(),
+    }
+
+
+def _stream_trials(**query: Any) -> Response:
+    """
+    Stream ``{"trials": [...], "next_cursor": id|null}`` row by row, in id
+    order. Without ``limit`` every matching trial is sent and next_cursor is null.
+    Streams are not cached; their ETag is the data version plus the query.
+    """
+    etag = hashlib.sha1(f"{storage.data_version()}:{request.full_path}".encode()).hexdigest()
+    not_modified = _not_modified(etag)
+    if not_modified is not None:
+        return not_modified
+    limit: Optional[int] = query.pop("limit")
+    if limit is not None and limit <= 0:
+        return jsonify({"error": "limit must be positive"}), 400
+    try:
+        # One extra row tells us whether there is a next page
+        trials = storage.iter_trials(limit=limit + 1 if limit else None, **query)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def generate() -> Iterator[str]:
+        yield '{"trials": ['
+        next_cursor = last_id = None
+        for i, trial in enumerate(trials):
+            if i == limit:
+                next_cursor = last_id
+                break
+            yield ("," if i else "") + json.dumps(trial)
+            last_id = trial["id"]
+        yield f'], "next_cursor": {json.dumps(next_cursor)}}}'
+
+    response = Response(stream_with_context(generate()), mimetype="application/json")
+    response.set_etag(etag)
+    return response
+
+
 @app.route("/api/trials/<int:session_id>")
 def api_trials(session_id: int):
-    storage.init_db()
-    return jsonify({"trials": storage.fetch_trials(session_id)})
+    return _stream_trials(session_id=session_id, **_trial_query_args())
+
+
+@app.route("/api/trial/<int:trial_id>/response")
+@cached
+def api_trial_response(trial_id: int):
+    return jsonify({"id": trial_id, "response": storage.fetch_response(trial_id)})
 
 
 @app.route("/api/conditions/<int:session_id>")
+@cached
 def api_conditions(session_id: int):
-    storage.init_db()
     return jsonify({"conditions": storage.fetch_conditions(session_id)})
 
 
 @app.route("/api/models")
+@cached
 def api_models():
-    storage.init_db()
-    return jsonify({"models": storage.fetch_model_overview()})
+    # ?sweep=ID compares only the models of one sweep
+    sweep_id = request.args.get("sweep", type=int)
+    return jsonify({"models": storage.fetch_model_overview(sweep_id=sweep_id), "sweep_id": sweep_id})
+
+
+@app.route("/api/sweeps")
+@cached
+def api_sweeps():
+    return jsonify({"sweeps": storage.fetch_sweeps()})
 
 
 @app.route("/api/model/<provider>/<path:model>/trials")
 def api_model_trials(provider: str, model: str):
-    storage.init_db()
-    return jsonify({"trials": storage.fetch_model_trials(provider, model)})
+    return _stream_trials(provider=provider, model=model, **_trial_query_args())
 
 
 @app.route("/api/model/<provider>/<path:model>/methods")
+@cached
 def api_model_methods(provider: str, model: str):
-    storage.init_db()
     return jsonify({"methods": storage.fetch_model_method_summary(provider, model)})
 
 
 @app.route("/api/model/<provider>/<path:model>/sessions")
+@cached
 def api_model_sessions(provider: str, model: str):
-    storage.init_db()
     return jsonify({
         "sessions": storage.fetch_model_sessions_detailed(provider, model),
         "size_summary": storage.fetch_model_size_summary(provider, model)
     })
 
 
+# -- Live progress (Server-Sent Events) ---------------------------------------
+# A single tailer thread polls the events table written by experiment
+# processes and fans new rows out to per-viewer queues, so the DB load does not
+# grow with the number of open dashboards.
+
+SSE_HEARTBEAT_SECONDS = 15.0
+
+
+class _EventTailer:
+    def __init__(self, interval: float = EVENTS_POLL_INTERVAL):
+        self.interval = interval
+        self._viewers: Dict[int, List["queue.Queue"]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, session_id: int) -> "queue.Queue":
+        viewer: "queue.Queue" = queue.Queue()
+        with self._lock:
+            self._viewers.setdefault(session_id, []).append(viewer)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="event-tailer", daemon=True)
+                self._thread.start()
+        return viewer
+
+    def unsubscribe(self, session_id: int, viewer: "queue.Queue") -> None:
+        with self._lock:
+            viewers = self._viewers.get(session_id, [])
+            if viewer in viewers:
+                viewers.remove(viewer)
+            if not viewers:
+                self._viewers.pop(session_id, None)
+
+    def _run(self) -> None:
+        last_id = storage.latest_event_id()
+        while True:
+            try:
+                events = storage.fetch_events(after_id=last_id)
+            except Exception as e:
+                print(f"⚠️  Event tailer: {e}")
+                events = []
+            for event in events:
+                last_id = event["id"]
+                with self._lock:
+                    viewers = list(self._viewers.get(event["session_id"], []))
+                for viewer in viewers:
+                    viewer.put(event)
+            if len(events) < 1000:
+                time.sleep(self.interval)
+
+
+_tailer = _EventTailer()
+
+
+def _sse(event: Dict[str, Any]) -> str:
+    return f"id: {event['id']}\nevent: {event['kind']}\ndata: {json.dumps(event)}\n\n"
+
+
+@app.route("/api/sessions/<int:session_id>/stream")
+def api_session_stream(session_id: int):
+    """
+    Server-Sent Events for one session: the backlog after Last-Event-ID (or
+    ?after=), then live events until session_finished. A resumed session
+    (--resume) logs one session_started/session_finished pair per run; only
+    the session_finished after the latest session_started ends the stream.
+    """
+    after_id = request.headers.get("Last-Event-ID", type=int) or request.args.get("after", 0, type=int)
+    # Subscribe before reading the backlog so nothing falls between the two
+    viewer = _tailer.subscribe(session_id)
+
+    def generate() -> Iterator[str]:
+        last_id = after_id
+        current_run = storage.latest_event_id(session_id, kind="session_started")
+
+        def finishes(event: Dict[str, Any]) -> bool:
+            nonlocal current_run
+            if event["kind"] == "session_started":
+                current_run = max(current_run, event["id"])
+            return event["kind"] == "session_finished" and event["id"] > current_run
+
+        try:
+            while True:
+                backlog = storage.fetch_events(after_id=last_id, session_id=session_id)
+                for event in backlog:
+                    last_id = event["id"]
+                    yield _sse(event)
+                    if finishes(event):
+                        return
+                if len(backlog) < 1000:
+                    break
+            while True:
+                try:
+                    event = viewer.get(timeout=SSE_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event["id"] <= last_id:
+                    continue
+                last_id = event["id"]
+                yield _sse(event)
+                if finishes(event):
+                    return
+        finally:
+            _tailer.unsubscribe(session_id, viewer)
+
+    response = Response(stream_with_context(generate()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
 @app.route("/")
 def index():
     return send_from_directory(app.static_folder, "index.html")